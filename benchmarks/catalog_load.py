@@ -0,0 +1,55 @@
+"""
+Measures the catalog loader's rate on a generated CSV file for several
+numbers of parser processes.
+
+Usage (from the repository root):
+    python -m benchmarks.catalog_load [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+
+import loader
+from benchmarks import generators
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def write_catalog(path, rows):
+    """
+    Writes a synthetic catalog CSV file.
+
+    :param path: Path of the file to write (str).
+    :param rows: Number of products (int).
+    """
+    promotions = ("SecondHalfPrice,Second Half price!,",
+                  "ThirdOneFree,Third One Free!,",
+                  "PercentDiscount,30% off!,30", ",,")
+    kinds = {"stocked": "product", "non_stocked": "non_stocked",
+             "limited": "limited"}
+    with open(path, "w", encoding = "utf-8") as catalog_file:
+        catalog_file.write(",".join(loader.FIELDS) + "\n")
+        for i, (kind, name, price, quantity, maximum) in enumerate(
+                generators.make_catalog_rows(rows)):
+            catalog_file.write(f"{kinds[kind]},{name},{price},{quantity},"
+                               f"{maximum},{promotions[i % 4]}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--rows", type = int, default = 1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.csv")
+        write_catalog(path, args.rows)
+        print(f"{'workers':>7}  {'seconds':>8}  {'rows/sec':>12}")
+        for workers in WORKER_COUNTS:
+            _, stats = loader.load_store(path, workers = workers,
+                                         columnar = True)
+            print(f"{workers:>7}  {stats['seconds']:>8.2f}  "
+                  f"{stats['rows_per_sec']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
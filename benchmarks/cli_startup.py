@@ -0,0 +1,52 @@
+"""
+Measures the wall-clock time of short main.py subcommands, including
+interpreter start-up, as they run from cron and shell pipelines. A bare
+interpreter start is measured as the baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.cli_startup [--runs 30]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = (
+    ("python -c pass", [sys.executable, "-c", "pass"]),
+    ("main.py --help", [sys.executable, "main.py", "--help"]),
+    ("main.py total", [sys.executable, "main.py", "total"]),
+    ("main.py search pixel", [sys.executable, "main.py", "search", "pixel"]),
+)
+
+
+def time_command(command, runs):
+    """
+    Runs a command repeatedly and times each run.
+
+    :param command: Program and arguments (list[str]).
+    :param runs: Number of runs (int).
+    :return: Run times in milliseconds (list[float]).
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check = True, stdout = subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--runs", type = int, default = 30)
+    args = parser.parse_args()
+
+    print(f"{'command':<22}  {'median ms':>9}  {'min ms':>7}")
+    for label, command in COMMANDS:
+        times = time_command(command, args.runs)
+        print(f"{label:<22}  {statistics.median(times):>9.1f}  "
+              f"{min(times):>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
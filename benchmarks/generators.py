@@ -0,0 +1,98 @@
+"""
+Seeded generators for synthetic catalogs and orders, shared by the
+benchmarks. The same seed always produces the same data, so runs on
+different commits measure the same workload.
+"""
+import random
+
+import products
+
+# Share of each product kind in a generated catalog
+PRODUCT_MIX = (("stocked", 0.8), ("non_stocked", 0.05), ("limited", 0.15))
+
+# Share of products carrying a promotion
+PROMOTION_RATE = 0.3
+
+
+def make_promotions():
+    """
+    Builds one instance of every built-in promotion.
+
+    :return: The promotions (list[products.Promotion]).
+    """
+    return [
+        products.PercentDiscount("30% off!", percent = 30),
+        products.SecondHalfPrice("Second Half price!"),
+        products.ThirdOneFree("Third One Free!")
+    ]
+
+
+def make_catalog_rows(size, seed=0):
+    """
+    Generates the constructor arguments of a synthetic catalog.
+
+    :param size: Number of products (int).
+    :param seed: Random seed (int).
+    :return: (kind, name, price, quantity, maximum) tuples (list[tuple]).
+    """
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in PRODUCT_MIX]
+    weights = [weight for _, weight in PRODUCT_MIX]
+    rows = []
+    for i, kind in enumerate(rng.choices(kinds, weights, k = size)):
+        rows.append((kind, f"Product {i}",
+                     round(rng.uniform(1, 2000), 2),
+                     rng.randint(10 ** 6, 10 ** 7),
+                     rng.randint(1, 5)))
+    return rows
+
+
+def build_catalog(rows, seed=0):
+    """
+    Builds products from generated rows and attaches promotions.
+
+    :param rows: Rows from make_catalog_rows (list[tuple]).
+    :param seed: Random seed used to pick promoted products (int).
+    :return: The products (list[products.Product]).
+    """
+    rng = random.Random(seed)
+    promotions = make_promotions()
+    catalog = []
+    for kind, name, price, quantity, maximum in rows:
+        if kind == "non_stocked":
+            product = products.NonStockedProduct(name, price)
+        elif kind == "limited":
+            product = products.LimitedProduct(name, price, quantity, maximum)
+        else:
+            product = products.Product(name, price, quantity)
+        if rng.random() < PROMOTION_RATE:
+            product.set_promotion(rng.choice(promotions))
+        catalog.append(product)
+    return catalog
+
+
+def make_orders(catalog, count, lines, seed=0):
+    """
+    Generates shopping lists over the buyable products of a catalog.
+    Limited products are ordered once per list, within their limit.
+
+    :param catalog: Products to order from (list[products.Product]).
+    :param count: Number of shopping lists (int).
+    :param lines: Lines per shopping list (int).
+    :param seed: Random seed (int).
+    :return: Shopping lists of (Product, quantity) tuples (list[list]).
+    """
+    rng = random.Random(seed)
+    buyable = [product for product in catalog
+               if not isinstance(product, products.NonStockedProduct)]
+    orders = []
+    for _ in range(count):
+        shopping_list = []
+        for product in rng.sample(buyable, min(lines, len(buyable))):
+            if isinstance(product, products.LimitedProduct):
+                quantity = 1
+            else:
+                quantity = rng.randint(1, 3)
+            shopping_list.append((product, quantity))
+        orders.append(shopping_list)
+    return orders
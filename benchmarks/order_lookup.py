@@ -0,0 +1,59 @@
+"""
+Measures Store.order latency for a fixed-size order while the catalog grows.
+
+With the identity-keyed product index the per-order cost should stay flat
+as the number of products in the store increases.
+
+Usage (from the repository root):
+    python -m benchmarks.order_lookup [--lines 50] [--repeat 200]
+"""
+import argparse
+import time
+
+import products
+import store
+
+CATALOG_SIZES = (1_000, 10_000, 100_000, 300_000)
+
+
+def build_store(size):
+    """
+    Builds a store with `size` well-stocked products.
+
+    :param size: Number of products in the catalog (int).
+    :return: The store and its products (tuple[store.Store, list]).
+    """
+    product_list = [products.Product(f"Product {i}", price = 10,
+                                      quantity = 10 ** 9)
+                    for i in range(size)]
+    return store.Store(product_list), product_list
+
+
+def time_orders(store_obj, product_list, lines, repeat):
+    """
+    Times `repeat` orders of `lines` lines taken from the end of the catalog.
+
+    :return: Mean latency per order in microseconds (float).
+    """
+    shopping_list = [(product, 1) for product in product_list[-lines:]]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        store_obj.order(shopping_list)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--lines", type = int, default = 50)
+    parser.add_argument("--repeat", type = int, default = 200)
+    args = parser.parse_args()
+
+    print(f"{'catalog size':>12}  {'us/order':>10}")
+    for size in CATALOG_SIZES:
+        store_obj, product_list = build_store(size)
+        latency = time_orders(store_obj, product_list, args.lines, args.repeat)
+        print(f"{size:>12}  {latency:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares memory use and buy() throughput of the slotted product classes
+against the previous __dict__-based layout.
+
+Usage (from the repository root):
+    python -m benchmarks.product_memory [--size 1000000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import products
+
+
+def dict_layout(product_class):
+    """
+    Rebuilds a product class with the same methods but without __slots__,
+    so its instances keep their attributes in a per-instance __dict__.
+
+    :param product_class: The slotted class to copy (type).
+    :return: The __dict__-based copy (type).
+    """
+    slot_names = set(product_class.__slots__)
+    namespace = {name: value for name, value in vars(product_class).items()
+                 if name not in slot_names and name != "__slots__"}
+    return type(f"Dict{product_class.__name__}", (), namespace)
+
+
+def measure_catalog(product_class, size):
+    """
+    Builds a catalog of `size` products and measures its memory.
+
+    :return: The catalog, allocated bytes and build seconds
+             (tuple[list, int, float]).
+    """
+    names = [f"Product {i}" for i in range(size)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = [product_class(name, 10.0, 10 ** 9) for name in names]
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return catalog, allocated, elapsed
+
+
+def measure_buy(catalog):
+    """
+    Buys one unit of every product in the catalog.
+
+    :return: Purchases per second (float).
+    """
+    start = time.perf_counter()
+    for product in catalog:
+        product.buy(1)
+    return len(catalog) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--size", type = int, default = 1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'layout':>8}  {'bytes/product':>13}  {'build s':>8}  "
+          f"{'buys/s':>12}")
+    for label, product_class in (("dict", dict_layout(products.Product)),
+                                 ("slots", products.Product)):
+        catalog, allocated, elapsed = measure_catalog(product_class,
+                                                      args.size)
+        buys_per_second = measure_buy(catalog)
+        print(f"{label:>8}  {allocated / args.size:>13.1f}  "
+              f"{elapsed:>8.2f}  {buys_per_second:>12,.0f}")
+        del catalog
+
+
+if __name__ == "__main__":
+    main()
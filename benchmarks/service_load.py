@@ -0,0 +1,107 @@
+"""
+Load generator for the asyncio order service.
+
+Opens many concurrent client sessions, each placing orders back to back,
+and reports throughput in orders/sec with p50/p99 request latency. By
+default an in-process service over a synthetic, well-stocked store is
+started on localhost; pass --connect to load an already running service
+(its catalog must contain products named "Product 0" .. "Product N-1").
+
+Usage (from the repository root):
+    python -m benchmarks.service_load [--sessions 50] [--orders 200]
+    python -m benchmarks.service_load --connect 127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import products
+import store
+from service import OrderService
+
+
+def build_store(size):
+    """
+    Builds a store with `size` products that will not run out of stock.
+
+    :return: The store (store.Store).
+    """
+    return store.Store([products.Product(f"Product {i}", price = 10,
+                                         quantity = 10 ** 9)
+                        for i in range(size)])
+
+
+async def run_session(host, port, orders, catalog_size, lines, seed):
+    """
+    Places `orders` orders over one connection.
+
+    :return: Request latencies in seconds and the number of failed orders
+             (tuple[list[float], int]).
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    failures = 0
+    for _ in range(orders):
+        request = {"op": "order", "items": [
+            {"name": f"Product {rng.randrange(catalog_size)}", "quantity": 1}
+            for _ in range(lines)
+        ]}
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        failures += not response["ok"]
+    writer.close()
+    return latencies, failures
+
+
+async def run(args):
+    service = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+    else:
+        service = OrderService(build_store(args.catalog_size),
+                               max_pending = args.max_pending)
+        host, port = (await service.start())[:2]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_session(host, int(port), args.orders, args.catalog_size,
+                    args.lines, seed)
+        for seed in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    if service is not None:
+        await service.shutdown()
+
+    latencies = sorted(latency for session, _ in results
+                       for latency in session)
+    failures = sum(failed for _, failed in results)
+    percentiles = statistics.quantiles(latencies, n = 100)
+    print(f"sessions:   {args.sessions}")
+    print(f"orders:     {len(latencies)} ({failures} failed)")
+    print(f"orders/sec: {len(latencies) / elapsed:,.0f}")
+    print(f"p50:        {percentiles[49] * 1e3:.2f} ms")
+    print(f"p99:        {percentiles[98] * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sessions", type = int, default = 50)
+    parser.add_argument("--orders", type = int, default = 200,
+                        help = "orders per session")
+    parser.add_argument("--lines", type = int, default = 3,
+                        help = "lines per order")
+    parser.add_argument("--catalog-size", type = int, default = 1000)
+    parser.add_argument("--max-pending", type = int, default = 1024)
+    parser.add_argument("--connect", help = "HOST:PORT of a running service")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures ShardedStore order throughput from 1 to N worker processes.
+
+Orders are generated so that each one touches a single shard, and are
+submitted in batches with order_batch, so all shards work in parallel.
+
+Usage (from the repository root):
+    python -m benchmarks.shard_scaling [--max-shards N] [--orders 200000]
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+import products
+from sharding import ShardedStore, shard_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--max-shards", type = int,
+                        default = multiprocessing.cpu_count())
+    parser.add_argument("--orders", type = int, default = 200_000)
+    parser.add_argument("--batch", type = int, default = 5_000)
+    parser.add_argument("--lines", type = int, default = 5)
+    parser.add_argument("--catalog-size", type = int, default = 10_000)
+    args = parser.parse_args()
+
+    names = [f"Product {i}" for i in range(args.catalog_size)]
+    print(f"{'shards':>6}  {'orders/sec':>12}  {'speedup':>8}")
+    baseline = None
+    for shards in range(1, args.max_shards + 1):
+        by_shard = [[] for _ in range(shards)]
+        for name in names:
+            by_shard[shard_index(name, shards)].append(name)
+        rng = random.Random(shards)
+        orders = []
+        for _ in range(args.orders):
+            shard_names = rng.choice(by_shard)
+            orders.append([(rng.choice(shard_names), 1)
+                           for _ in range(args.lines)])
+
+        product_list = [products.Product(name, price = 10,
+                                         quantity = 10 ** 9)
+                        for name in names]
+        with ShardedStore(product_list, shards = shards) as store_obj:
+            start = time.perf_counter()
+            for offset in range(0, len(orders), args.batch):
+                store_obj.order_batch(orders[offset:offset + args.batch])
+            elapsed = time.perf_counter() - start
+
+        throughput = args.orders / elapsed
+        baseline = baseline or throughput
+        print(f"{shards:>6}  {throughput:>12,.0f}  "
+              f"{throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
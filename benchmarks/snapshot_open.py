@@ -0,0 +1,57 @@
+"""
+Measures how long it takes to save and open a store snapshot.
+
+Opening maps the file and wraps its columns without parsing them, so it
+should take about the same time for any catalog size.
+
+Usage (from the repository root):
+    python -m benchmarks.snapshot_open [--size 1000000] [--path store.snap]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import products
+import store
+from snapshot import load_snapshot, save_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--size", type = int, default = 1_000_000)
+    parser.add_argument("--path", help = "snapshot file to write")
+    args = parser.parse_args()
+    path = args.path or os.path.join(tempfile.mkdtemp(), "store.snap")
+
+    promotion = products.ThirdOneFree("Third One Free!")
+    product_list = []
+    for i in range(args.size):
+        product = products.Product(f"Product {i}", price = 10 + i % 100,
+                                   quantity = 1 + i % 50)
+        if i % 3 == 0:
+            product.set_promotion(promotion)
+        product_list.append(product)
+    store_obj = store.Store(product_list)
+
+    start = time.perf_counter()
+    save_snapshot(store_obj, path)
+    saved = time.perf_counter() - start
+
+    start = time.perf_counter()
+    catalog = load_snapshot(path)
+    opened = time.perf_counter() - start
+
+    start = time.perf_counter()
+    product = catalog[args.size // 2]
+    first_access = time.perf_counter() - start
+
+    print(f"products:     {len(catalog):,}")
+    print(f"file size:    {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+    print(f"save:         {saved * 1e3:.1f} ms")
+    print(f"open:         {opened * 1e3:.2f} ms")
+    print(f"first access: {first_access * 1e6:.1f} us ({product.show()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Runs the store and product hot-path benchmarks on synthetic catalogs of
+several sizes and writes the results as JSON.
+
+Each case reports the best mean time per operation over a few repeats,
+in nanoseconds. With --baseline the results are compared against a
+previous run and the command exits with status 1 if any case got slower
+than the threshold allows.
+
+Usage (from the repository root):
+    python -m benchmarks.suite [--sizes 1000 10000 100000]
+        [--output results.json] [--baseline baseline.json]
+        [--threshold 0.1]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import main as cli
+import store
+from benchmarks import generators
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Timed repetitions per case; the fastest one is reported
+REPEATS = 5
+
+
+def measure(operation, number):
+    """
+    Times `number` calls of an operation, REPEATS times.
+
+    :param operation: Callable taking the call index (callable).
+    :param number: Calls per repetition (int).
+    :return: Best mean nanoseconds per call (float).
+    """
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter_ns()
+        for i in range(number):
+            operation(i)
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def run_size(size, seed):
+    """
+    Runs every benchmark case on a catalog of the given size.
+
+    :param size: Number of products (int).
+    :param seed: Random seed for the generated data (int).
+    :return: Nanoseconds per operation keyed by case name (dict).
+    """
+    rows = generators.make_catalog_rows(size, seed)
+    results = {}
+
+    start = time.perf_counter_ns()
+    catalog = generators.build_catalog(rows, seed)
+    store_obj = store.Store(catalog)
+    results["catalog_construction"] = (time.perf_counter_ns() - start) / size
+
+    orders = generators.make_orders(catalog, 1_000, 5, seed)
+    results["store_order"] = measure(
+        lambda i: store_obj.order(orders[i % len(orders)]), len(orders))
+    results["get_total_quantity"] = measure(
+        lambda i: store_obj.get_total_quantity(), 1_000)
+    results["get_all_products"] = measure(
+        lambda i: store_obj.get_all_products(), 10)
+
+    names = [catalog[i * size // 100].name for i in range(100)]
+    results["find_product_by_name"] = measure(
+        lambda i: cli.find_product_by_name(store_obj, names[i % 100]), 1_000)
+
+    product = catalog[0]
+    for promotion in generators.make_promotions():
+        results[f"apply_promotion[{type(promotion).__name__}]"] = measure(
+            lambda i: promotion.apply_promotion(product, i % 10 + 1), 10_000)
+    return results
+
+
+def run(sizes, seed):
+    """
+    Runs the suite for every catalog size.
+
+    :param sizes: Catalog sizes (Iterable[int]).
+    :param seed: Random seed for the generated data (int).
+    :return: JSON-serializable results (dict).
+    """
+    return {
+        "python": platform.python_version(),
+        "seed": seed,
+        "unit": "ns/op",
+        "results": {str(size): run_size(size, seed) for size in sizes}
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Finds cases that got slower than a baseline run.
+
+    :param current: Results of this run (dict).
+    :param baseline: Results of the baseline run (dict).
+    :param threshold: Allowed slowdown, e.g. 0.1 for 10% (float).
+    :return: (size, case, baseline, current, ratio) tuples (list[tuple]).
+    """
+    regressions = []
+    for size, cases in current["results"].items():
+        baseline_cases = baseline["results"].get(size, {})
+        for case, value in cases.items():
+            old = baseline_cases.get(case)
+            if old and value / old > 1 + threshold:
+                regressions.append((size, case, old, value, value / old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+",
+                        default = DEFAULT_SIZES)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", help = "write the JSON results here")
+    parser.add_argument("--baseline", help = "JSON results to compare with")
+    parser.add_argument("--threshold", type = float, default = 0.1)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as file:
+            json.dump(results, file, indent = 2)
+    else:
+        json.dump(results, sys.stdout, indent = 2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding = "utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for size, case, old, new, ratio in regressions:
+            print(f"REGRESSION size={size} {case}: "
+                  f"{old:.0f} -> {new:.0f} ns/op ({ratio:.2f}x)",
+                  file = sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures order throughput with a write-ahead log at several group-commit
+sizes. Each group costs one fsync, so larger groups amortize it over more
+orders.
+
+Usage (from the repository root):
+    python -m benchmarks.wal_group_commit [--orders 2000] [--dir DIR]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import products
+import store
+from wal import WriteAheadLog
+
+GROUP_SIZES = (1, 8, 64, 512)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--orders", type = int, default = 2000)
+    parser.add_argument("--dir", help = "directory for the log files "
+                                        "(use the disk you deploy on)")
+    args = parser.parse_args()
+    directory = args.dir or tempfile.mkdtemp()
+
+    print(f"{'group size':>10}  {'orders/sec':>12}")
+    for group_size in GROUP_SIZES:
+        product_list = [products.Product(f"Product {i}", price = 10,
+                                         quantity = 10 ** 9)
+                        for i in range(100)]
+        store_obj = store.Store(product_list)
+        log_path = os.path.join(directory, f"group_{group_size}.wal")
+        store_obj.wal = WriteAheadLog(log_path, group_commit = group_size)
+
+        start = time.perf_counter()
+        for i in range(args.orders):
+            store_obj.order([(product_list[i % 100], 1),
+                             (product_list[(i * 7) % 100], 2)])
+        store_obj.wal.close()
+        elapsed = time.perf_counter() - start
+        os.remove(log_path)
+        print(f"{group_size:>10}  {args.orders / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
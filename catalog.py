@@ -0,0 +1,652 @@
+"""
+Columnar, array-backed product catalog.
+
+A ColumnarCatalog keeps the state of every product in parallel typed
+arrays (one column per attribute) instead of one Python object with its
+own __dict__ per product. Products are exposed through lightweight views
+that behave like Product, NonStockedProduct and LimitedProduct objects but
+read and write the columns directly. Views are only created for rows
+that are accessed. ColumnarStore is a Store over such a catalog that
+answers total-quantity, active-product and low-stock queries with
+vectorized reductions over the columns, and tracks membership in a bitmap
+over the rows, so neither keeps a Python object per product.
+"""
+from array import array
+import threading
+from itertools import compress
+from operator import and_
+
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+# NumPy is optional and only used by ColumnarStore's aggregates, so it is
+# imported on first use by _numpy() rather than with this module.
+np = None
+_numpy_imported = False
+
+# Product kind codes stored in the kind column
+PRODUCT = 0
+NON_STOCKED = 1
+LIMITED = 2
+
+# Marker for "no promotion" in the promotion id column
+NO_PROMOTION = -1
+
+
+def product_kind(product) -> int:
+    """
+    Maps a product object to its kind code.
+
+    :param product: The product to classify (Product).
+    :return: Kind code (int).
+    """
+    if isinstance(product, NonStockedProduct):
+        return NON_STOCKED
+    if isinstance(product, LimitedProduct):
+        return LIMITED
+    return PRODUCT
+
+
+def _numpy():
+    """
+    Imports NumPy the first time it is needed.
+
+    :return: The numpy module, or None if it is not installed.
+    """
+    global np, _numpy_imported
+    if not _numpy_imported:
+        _numpy_imported = True
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - exercised only without NumPy
+            numpy = None
+        np = numpy
+    return np
+
+
+def _new_product(product_class):
+    """
+    Creates an uninitialized product for unpickling a view, see
+    _ColumnView.__reduce__.
+
+    :param product_class: Product class to instantiate (type).
+    :return: The empty product (Product).
+    """
+    return product_class.__new__(product_class)
+
+
+class _ColumnView:
+    """
+    Redirects the attributes Product stores per instance to the columns of
+    a ColumnarCatalog row, so all Product behaviour (validation, buying,
+    promotions, change notifications) works unchanged on a view.
+    Concrete view classes declare the `_catalog` and `_row` slots.
+    Reservations and per-location stock have no columns and use the
+    `_reserved`, `_locations` and `_ranking` slots inherited from Product.
+    """
+    __slots__ = ()
+
+    @property
+    def _name(self):
+        return self._catalog.names[self._row]
+
+    @_name.setter
+    def _name(self, name):
+        self._catalog.names[self._row] = name
+
+    @property
+    def _price(self):
+        return self._catalog.prices[self._row]
+
+    @_price.setter
+    def _price(self, price):
+        self._catalog.prices[self._row] = price
+
+    @property
+    def _quantity(self):
+        return self._catalog.quantities[self._row]
+
+    @_quantity.setter
+    def _quantity(self, quantity):
+        self._catalog.quantities[self._row] = quantity
+
+    @property
+    def _active(self):
+        return bool(self._catalog.active[self._row])
+
+    @_active.setter
+    def _active(self, active):
+        self._catalog.active[self._row] = bool(active)
+
+    @property
+    def _maximum(self):
+        return self._catalog.maximums[self._row]
+
+    @_maximum.setter
+    def _maximum(self, maximum):
+        self._catalog.maximums[self._row] = maximum
+
+    @property
+    def promotion(self):
+        promotion_id = self._catalog.promotion_ids[self._row]
+        if promotion_id == NO_PROMOTION:
+            return None
+        return self._catalog.promotions[promotion_id]
+
+    @promotion.setter
+    def promotion(self, promotion):
+        self._catalog.promotion_ids[self._row] = (
+            self._catalog.intern_promotion(promotion)
+        )
+
+    # Listeners of single rows are kept sparsely by the catalog, keyed by
+    # row; listeners of the whole catalog hear about every row
+    def add_listener(self, listener):
+        listeners = self._catalog.row_listeners.setdefault(self._row, [])
+        if listener not in listeners:
+            listeners.append(listener)
+
+    def remove_listener(self, listener):
+        listeners = self._catalog.row_listeners.get(self._row, [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+    def _notify(self, field, old, new):
+        catalog = self._catalog
+        for listener in catalog.listeners:
+            listener.product_changed(self, field, old, new)
+        for listener in catalog.row_listeners.get(self._row, ()):
+            listener.product_changed(self, field, old, new)
+
+    # Copies and pickles are standalone products holding the row's values,
+    # so they neither drag the catalog along nor depend on it
+    def __getstate__(self):
+        _, state = super().__getstate__()
+        del state["_catalog"], state["_row"]
+        return None, state
+
+    def __reduce__(self):
+        # The last base is the product class the view stands in for
+        product_class = type(self).__bases__[-1]
+        return _new_product, (product_class,), self.__getstate__()
+
+
+class ProductView(_ColumnView, Product):
+    """
+    A Product backed by a row of a ColumnarCatalog.
+    """
+    __slots__ = ("_catalog", "_row")
+
+
+class NonStockedProductView(_ColumnView, NonStockedProduct):
+    """
+    A NonStockedProduct backed by a row of a ColumnarCatalog.
+    """
+    __slots__ = ("_catalog", "_row")
+
+
+class LimitedProductView(_ColumnView, LimitedProduct):
+    """
+    A LimitedProduct backed by a row of a ColumnarCatalog.
+    """
+    __slots__ = ("_catalog", "_row")
+
+
+_VIEW_CLASSES = {
+    PRODUCT: ProductView,
+    NON_STOCKED: NonStockedProductView,
+    LIMITED: LimitedProductView,
+}
+
+
+# ColumnarCatalog Class
+class ColumnarCatalog:
+    """
+    Stores products in parallel typed arrays, one row per product.
+    Columns may also be read-only-length buffers such as memoryviews over
+    a memory-mapped snapshot; they are copied into arrays the first time
+    a row is appended. Row views are created on first access and kept
+    only for the rows that have been accessed.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty catalog.
+        """
+        self.names = []
+        self.prices = array("d")
+        self.quantities = array("q")
+        self.active = array("b")
+        self.kinds = array("b")
+        self.maximums = array("q")
+        self.promotion_ids = array("i")
+        self.promotions = []  # promotion table, indexed by promotion id
+        self.listeners = []  # notified of changes to any row
+        self.row_listeners = {}  # row -> list of listeners of that row
+        self._promotion_index = {}  # id(promotion) -> promotion id
+        self._views = {}  # row -> view, for rows accessed so far
+
+    @classmethod
+    def from_products(cls, products):
+        """
+        Builds a catalog holding a copy of the given products.
+
+        :param products: Iterable of product objects (Iterable[Product]).
+        :return: The new catalog (ColumnarCatalog).
+        """
+        catalog = cls()
+        for product in products:
+            catalog.add_product(product)
+        return catalog
+
+    @classmethod
+    def from_columns(cls, names, prices, quantities, active, kinds,
+                     maximums, promotion_ids, promotions):
+        """
+        Builds a catalog directly from its columns, without copying them.
+
+        :param names: Name of each row (Sequence[str]).
+        :param prices: Price column, typecode "d".
+        :param quantities: Quantity column, typecode "q".
+        :param active: Active flag column, typecode "b".
+        :param kinds: Product kind column, typecode "b".
+        :param maximums: Purchase limit column, typecode "q".
+        :param promotion_ids: Promotion id column, typecode "i".
+        :param promotions: Promotion table (list[Promotion]).
+        :return: The new catalog (ColumnarCatalog).
+        """
+        catalog = cls()
+        catalog.names = names
+        catalog.prices = prices
+        catalog.quantities = quantities
+        catalog.active = active
+        catalog.kinds = kinds
+        catalog.maximums = maximums
+        catalog.promotion_ids = promotion_ids
+        for promotion in promotions:
+            catalog.intern_promotion(promotion)
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, row):
+        """
+        Gets the view of a catalog row, creating it on first access.
+
+        :param row: Row number (int).
+        :return: The product view for that row (Product).
+        :raises IndexError: If the row is out of range.
+        """
+        row = range(len(self))[row]
+        view = self._views.get(row)
+        if view is None:
+            view_class = _VIEW_CLASSES[self.kinds[row]]
+            view = view_class.__new__(view_class)
+            view._catalog = self
+            view._row = row
+            view._price_curve = None
+            view._reserved = 0
+            view._locations = None
+            view._ranking = ()
+            self._views[row] = view
+        return view
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def _make_growable(self):
+        """
+        Copies columns that cannot be appended to (e.g. memoryviews over
+        a snapshot) into arrays and names into a list.
+
+        :return: None
+        """
+        for column in ("prices", "quantities", "active", "kinds",
+                       "maximums", "promotion_ids"):
+            values = getattr(self, column)
+            if not isinstance(values, array):
+                growable = array(values.format)
+                growable.frombytes(memoryview(values).cast("B"))
+                setattr(self, column, growable)
+        if not isinstance(self.names, list):
+            self.names = list(self.names)
+
+    def intern_promotion(self, promotion) -> int:
+        """
+        Gets the id of a promotion in the promotion table, adding it
+        if it is not there yet.
+
+        :param promotion: Promotion object or None.
+        :return: Promotion id, or NO_PROMOTION for None (int).
+        """
+        if promotion is None:
+            return NO_PROMOTION
+        promotion_id = self._promotion_index.get(id(promotion))
+        if promotion_id is None:
+            promotion_id = len(self.promotions)
+            self.promotions.append(promotion)
+            self._promotion_index[id(promotion)] = promotion_id
+        return promotion_id
+
+    def append(self, name, price, quantity, kind=PRODUCT, maximum=0,
+               promotion=None, active=True):
+        """
+        Appends a product row to the catalog.
+
+        :param name: Name of the product (str).
+        :param price: Price of the product (float).
+        :param quantity: Quantity of the product in stock (int).
+        :param kind: PRODUCT, NON_STOCKED or LIMITED (int).
+        :param maximum: Maximum purchase limit for LIMITED products (int).
+        :param promotion: Promotion object or None.
+        :param active: Whether the product is active (bool).
+        :return: The number of the new row; its view is created on first
+                 access (int).
+        :raises ValueError: If any of the values is invalid.
+        """
+        if not name:
+            raise ValueError("Product name cannot be empty.")
+        if price < 0:
+            raise ValueError("Price cannot be negative.")
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative.")
+        if kind not in _VIEW_CLASSES:
+            raise ValueError(f"Unknown product kind {kind}.")
+        if kind == NON_STOCKED and quantity != 0:
+            raise ValueError(
+                "Non-stocked products must always have a quantity of 0."
+            )
+        if maximum < 0:
+            raise ValueError("Maximum purchase limit cannot be negative.")
+
+        if not isinstance(self.prices, array):
+            self._make_growable()
+
+        row = len(self)
+        self.names.append(name)
+        self.prices.append(price)
+        self.quantities.append(quantity)
+        self.active.append(bool(active))
+        self.kinds.append(kind)
+        self.maximums.append(maximum)
+        self.promotion_ids.append(self.intern_promotion(promotion))
+        return row
+
+    def add_product(self, product):
+        """
+        Appends a copy of a product object to the catalog.
+
+        :param product: The product to copy (Product).
+        :return: The number of the new row (int).
+        """
+        kind = product_kind(product)
+        return self.append(product.name, product.price, product.quantity,
+                           kind = kind,
+                           maximum = product.maximum if kind == LIMITED else 0,
+                           promotion = product.promotion,
+                           active = product.active)
+
+
+# ColumnarStore Class
+class ColumnarStore(Store):
+    """
+    A store whose products are rows of a ColumnarCatalog.
+    Stock aggregates are computed as reductions over the catalog columns
+    instead of being tracked per product object. Membership is a bitmap
+    over the rows and the store listens to the whole catalog, so opening
+    a store creates no per-product objects; views, locks and name index
+    entries only exist for the rows that are used.
+    """
+
+    def __init__(self, catalog, thread_safe=False):
+        """
+        Initializes the store with every product of a catalog.
+
+        :param catalog: The catalog backing the store (ColumnarCatalog).
+        :param thread_safe: Whether orders may be placed concurrently
+                            (bool), see Store.
+        """
+        super().__init__((), thread_safe = thread_safe)
+        self.catalog = catalog
+        # 1 for catalog rows that are in the store
+        self._listed = array("b", b"\x01") * len(catalog)
+        self._listed_count = len(catalog)
+        self._rows_by_name = None  # case-folded name -> rows, built lazily
+        catalog.listeners.append(self)
+
+    @property
+    def products(self):
+        """
+        Gets all products in the store, in catalog order.
+
+        :return: List of products (list[Product]).
+        """
+        catalog = self.catalog
+        return [catalog[row]
+                for row in compress(range(len(self._listed)), self._listed)]
+
+    def __contains__(self, product) -> bool:
+        """
+        Checks whether a product is a row of the catalog that is in the
+        store, in O(1).
+
+        :param product: The product to look up (Product).
+        :return: True if the product is in the store, False otherwise.
+        """
+        if getattr(product, "_catalog", None) is not self.catalog:
+            return False
+        return product._row < len(self._listed) \
+            and self._listed[product._row] == 1
+
+    def __len__(self) -> int:
+        return self._listed_count
+
+    def add_product(self, product):
+        """
+        Adds a product view of the store's catalog to the store inventory.
+        Adding a product that is already in the store has no effect.
+
+        :param product: The product to add (Product).
+        :return: None
+        :raises ValueError: If the product is not a row of the catalog.
+        """
+        if getattr(product, "_catalog", None) is not self.catalog:
+            raise ValueError(f"The product {product.name} "
+                             f"does not belong to the store's catalog.")
+        with self._index_lock:
+            if product in self:
+                return
+            row = product._row
+            missing = row + 1 - len(self._listed)
+            if missing > 0:
+                self._listed.frombytes(bytes(missing))
+            self._listed[row] = 1
+            self._listed_count += 1
+            if self._names_indexed:
+                self._index_name(product)
+            if self._rows_by_name is not None:
+                self._rows_by_name.setdefault(product.name.casefold(),
+                                              []).append(row)
+            if self.wal is not None:
+                self.wal.log_add(product)
+            if self.feed is not None:
+                self.feed.append("add", product,
+                                 (product.quantity, product.active))
+
+    def remove_product(self, product):
+        """
+        Removes a product from the store inventory. Its row stays in the
+        catalog.
+
+        :param product: The product to remove (Product).
+        :return: None
+        :raises ValueError: If the product is not in the store.
+        """
+        with self._index_lock:
+            if product not in self:
+                raise ValueError(f"The product {product.name} "
+                                 f"is not available in the store.")
+            self._listed[product._row] = 0
+            self._listed_count -= 1
+            self._product_locks.pop(product, None)
+            if self._names_indexed:
+                self._unindex_name(product)
+            if self._rows_by_name is not None:
+                self._unindex_row(product.name, product._row)
+            self._units_sold.pop(product, None)
+            if self.wal is not None:
+                self.wal.log_remove(product)
+            if self.feed is not None:
+                self.feed.append("remove", product, None)
+
+    def _seq(self, product) -> int:
+        return product._row
+
+    def _lock_of(self, product):
+        lock = self._product_locks.get(product)
+        if lock is None:
+            lock = self._product_locks[product] = threading.Lock()
+        return lock
+
+    def product_changed(self, product, field, old, new):
+        """
+        Handles a change to a catalog row; rows that are not in the store
+        are ignored. See Store.product_changed.
+        """
+        if product not in self:
+            return
+        if field == "name" and self._rows_by_name is not None:
+            with self._index_lock:
+                self._unindex_row(old, product._row)
+                self._rows_by_name.setdefault(new.casefold(),
+                                              []).append(product._row)
+        super().product_changed(product, field, old, new)
+
+    def _stock_changed(self, product, field, old, new):
+        # Aggregates are read from the columns, nothing to maintain
+        pass
+
+    def _push_stock(self, product):
+        # Low stock is read from the columns, nothing to maintain
+        pass
+
+    # Function: Find Products by Exact Name
+    def find_exact(self, name):
+        """
+        Gets the products whose name equals the given name, ignoring case.
+        The first lookup indexes the name column, without creating views.
+
+        :param name: Product name to look up (str).
+        :return: List of matching products (list[Product]).
+        """
+        folded_name = name.casefold()
+        with self._index_lock:
+            if self._rows_by_name is None:
+                rows_by_name = {}
+                for row, row_name in compress(enumerate(self.catalog.names),
+                                              self._listed):
+                    rows_by_name.setdefault(row_name.casefold(),
+                                            []).append(row)
+                self._rows_by_name = rows_by_name
+            rows = list(self._rows_by_name.get(folded_name, ()))
+        return [self.catalog[row] for row in rows]
+
+    def _unindex_row(self, name, row):
+        """
+        Removes a row from the exact-name index. The caller must hold the
+        index lock.
+
+        :param name: Name the row was indexed under (str).
+        :param row: Row number (int).
+        :return: None
+        """
+        folded = name.casefold()
+        rows = self._rows_by_name[folded]
+        rows.remove(row)
+        if not rows:
+            del self._rows_by_name[folded]
+
+    def _listed_active_mask(self):
+        """
+        Computes which catalog rows are both in the store and active.
+
+        :return: Boolean mask over the first len(self._listed) rows
+                 (numpy.ndarray, or an iterator of ints without NumPy).
+        """
+        rows = len(self._listed)
+        numpy = _numpy()
+        if numpy is None:
+            return map(and_, self.catalog.active[:rows], self._listed)
+        active = numpy.frombuffer(self.catalog.active,
+                                  dtype = numpy.int8)[:rows]
+        listed = numpy.frombuffer(self._listed, dtype = numpy.int8)
+        return (active & listed).astype(bool)
+
+    # Function: Get Total Quantity of Products
+    def get_total_quantity(self) -> int:
+        """
+        Sums the quantity column over all active products in the store.
+
+        :return: Total quantity of items in the store (int).
+        """
+        if not self._listed:
+            return 0
+        mask = self._listed_active_mask()
+        quantities = self.catalog.quantities
+        numpy = _numpy()
+        if numpy is None:
+            return sum(compress(quantities, mask))
+        rows = len(self._listed)
+        return int(numpy.frombuffer(quantities,
+                                    dtype = numpy.int64)[:rows][mask].sum())
+
+    # Function: Get All Active Products
+    def get_all_products(self):
+        """
+        Retrieves all active products in the store, in catalog order.
+
+        :return: List of active products (list[Product]).
+        """
+        if not self._listed:
+            return []
+        mask = self._listed_active_mask()
+        views = self.catalog
+        numpy = _numpy()
+        if numpy is None:
+            return [views[row] for row in compress(range(len(self._listed)),
+                                                   mask)]
+        return [views[row] for row in numpy.flatnonzero(mask).tolist()]
+
+    # Function: Get Low Stock
+    def low_stock(self, threshold):
+        """
+        Gets the stocked products whose quantity is at most the threshold,
+        including sold-out ones, by scanning the quantity column.
+
+        :param threshold: Largest quantity reported (int).
+        :return: Products ordered by ascending quantity, then catalog order
+                 (list[Product]).
+        """
+        if not self._listed:
+            return []
+        rows = len(self._listed)
+        catalog = self.catalog
+        numpy = _numpy()
+        if numpy is None:
+            found = sorted(
+                (quantity, row) for row, listed, kind, quantity
+                in zip(range(rows), self._listed, catalog.kinds,
+                       catalog.quantities)
+                if listed and kind != NON_STOCKED and quantity <= threshold
+            )
+            return [catalog[row] for _, row in found]
+        listed = numpy.frombuffer(self._listed, dtype = numpy.int8)
+        kinds = numpy.frombuffer(catalog.kinds, dtype = numpy.int8)[:rows]
+        quantities = numpy.frombuffer(catalog.quantities,
+                                      dtype = numpy.int64)[:rows]
+        found = numpy.flatnonzero((listed == 1) & (kinds != NON_STOCKED)
+                                  & (quantities <= threshold))
+        found = found[numpy.argsort(quantities[found], kind = "stable")]
+        return [catalog[row] for row in found.tolist()]
@@ -0,0 +1,149 @@
+"""
+Change feed of store inventory deltas for caches and replicas.
+
+Attach a ChangeFeed to a store (``store_obj.feed = ChangeFeed()``) and
+every quantity or active change of a stored product, and every product
+added to or removed from the store, is appended to the feed as an event
+
+    (sequence, kind, product, value)
+
+where kind is QUANTITY or ACTIVE with the new value, ADDED with the
+product's (quantity, active), or REMOVED with None. Quantity and active
+changes arrive through the products' change notifications, so they are
+recorded however the change was made.
+
+Events live in a fixed-size ring buffer. Each consumer reads with its
+own Cursor and only sees the events since its last poll, so keeping a
+replica in sync costs O(changes) rather than O(catalog). A cursor that
+falls more than `capacity` events behind can no longer be served and
+must resync from a full copy of the store.
+"""
+import threading
+
+QUANTITY = "quantity"
+ACTIVE = "active"
+ADDED = "add"
+REMOVED = "remove"
+
+
+# ChangeFeed Class
+class ChangeFeed:
+    """
+    A bounded, append-only sequence of inventory change events.
+    """
+
+    def __init__(self, capacity=65536):
+        """
+        Initializes an empty feed.
+
+        :param capacity: Number of most recent events kept (int).
+        :raises ValueError: If capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError("Change feed capacity must be positive.")
+        self.capacity = capacity
+        self._events = [None] * capacity
+        self._next = 0  # sequence number of the next event
+        self._lock = threading.Lock()
+
+    @property
+    def head(self) -> int:
+        """
+        Gets the sequence number the next event will get.
+
+        :return: Sequence number (int).
+        """
+        return self._next
+
+    @property
+    def oldest(self) -> int:
+        """
+        Gets the sequence number of the oldest event still buffered.
+
+        :return: Sequence number (int).
+        """
+        return max(0, self._next - self.capacity)
+
+    def append(self, kind, product, value):
+        """
+        Appends an event, overwriting the oldest one when the buffer is
+        full.
+
+        :param kind: QUANTITY, ACTIVE, ADDED or REMOVED (str).
+        :param product: The product that changed (Product).
+        :param value: The new value of the changed field.
+        """
+        with self._lock:
+            sequence = self._next
+            self._events[sequence % self.capacity] = \
+                (sequence, kind, product, value)
+            self._next = sequence + 1
+
+    def read(self, position, limit=None) -> list:
+        """
+        Gets the events from a sequence number on.
+
+        :param position: Sequence number of the first event (int).
+        :param limit: Maximum number of events, or None for all (int).
+        :return: The events (list[tuple]).
+        :raises ValueError: If the events at position were overwritten.
+        """
+        with self._lock:
+            if position < self.oldest:
+                raise ValueError(f"Change feed events before "
+                                 f"{self.oldest} were overwritten; "
+                                 f"resync from the store.")
+            end = self._next if limit is None \
+                else min(self._next, position + limit)
+            return [self._events[sequence % self.capacity]
+                    for sequence in range(position, end)]
+
+    def subscribe(self, from_start=False):
+        """
+        Creates a cursor reading the feed.
+
+        :param from_start: Start at the oldest buffered event instead of
+                           the next new one (bool).
+        :return: The cursor (Cursor).
+        """
+        return Cursor(self, self.oldest if from_start else self.head)
+
+
+# Cursor Class
+class Cursor:
+    """
+    A consumer's position in a ChangeFeed.
+    """
+    __slots__ = ("feed", "position")
+
+    def __init__(self, feed, position):
+        """
+        Initializes a cursor.
+
+        :param feed: The feed to read (ChangeFeed).
+        :param position: Sequence number of the next event to read (int).
+        """
+        self.feed = feed
+        self.position = position
+
+    @property
+    def pending(self) -> int:
+        """
+        Gets the number of events not read yet.
+
+        :return: Number of events (int).
+        """
+        return self.feed.head - self.position
+
+    def poll(self, limit=None) -> list:
+        """
+        Reads the events since the last poll and advances the cursor.
+
+        :param limit: Maximum number of events, or None for all (int).
+        :return: The events (list[tuple]).
+        :raises ValueError: If the cursor fell too far behind; resync from
+                            the store and subscribe again.
+        """
+        events = self.feed.read(self.position, limit)
+        self.position += len(events)
+        return events
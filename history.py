@@ -0,0 +1,291 @@
+"""
+Append-only columnar history of order lines with time-bucketed rollups.
+
+Attach an OrderHistory to a store (``store_obj.history = OrderHistory()``)
+and every line of a successful order is appended with its timestamp,
+product, quantity, list price, promotion and charged amount. Lines go
+into fixed-size segments of typed columns; products and promotions are
+stored as ids into small tables.
+
+Every line also updates rollups per minute, hour and day, keyed by
+promotion name: revenue, units and discount (list price minus charged
+amount). Dashboards read these buckets with rollup() instead of scanning
+the lines. Each resolution keeps a bounded number of the most recent
+buckets.
+
+When a directory is given, sealed segments beyond the `retain_segments`
+most recent ones are compacted to disk, one file per segment, and can be
+read back with read_segment(). Segment files are numbered in write order;
+a history opened on an existing directory continues after the highest
+number found there. Without a directory all segments stay in memory.
+
+Segment file layout: one line of JSON (row count, byte order, column
+typecodes and sizes, product and promotion name tables) followed by the
+raw column bytes in the same order.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+
+# Bucket width in seconds and number of buckets kept, per resolution
+RESOLUTIONS = {
+    "minute": (60, 1440),
+    "hour": (3600, 24 * 90),
+    "day": (86400, 730),
+}
+
+# Promotion name used for lines of products without a promotion
+NO_PROMOTION = "none"
+
+# Column names and typecodes of a segment, in file order
+_COLUMNS = (
+    ("timestamps", "d"),
+    ("product_ids", "i"),
+    ("quantities", "q"),
+    ("list_prices", "d"),
+    ("promotion_ids", "i"),
+    ("charged", "d"),
+)
+
+
+def _new_segment() -> dict:
+    """
+    Creates empty segment columns.
+
+    :return: Columns keyed by name (dict[str, array]).
+    """
+    return {name: array(typecode) for name, typecode in _COLUMNS}
+
+
+def _next_segment_number(directory) -> int:
+    """
+    Finds the number following the highest segment file in a directory.
+
+    :param directory: Directory holding segment files (str).
+    :return: Number for the next segment file (int).
+    """
+    numbers = [-1]
+    for file_name in os.listdir(directory):
+        stem, extension = os.path.splitext(file_name)
+        if extension == ".bin" and stem.startswith("segment-") \
+                and stem[len("segment-"):].isdigit():
+            numbers.append(int(stem[len("segment-"):]))
+    return max(numbers) + 1
+
+
+# Function: Read Segment
+def read_segment(path) -> dict:
+    """
+    Loads a segment compacted to disk.
+
+    :param path: Path of the segment file (str).
+    :return: The columns keyed by name, plus "products" and "promotions"
+             name tables indexed by the id columns (dict).
+    :raises ValueError: If the file was written with another byte order.
+    """
+    with open(path, "rb") as segment_file:
+        header = json.loads(segment_file.readline())
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Segment {path} was written on a "
+                             f"{header['byteorder']}-endian machine.")
+        segment = {"products": header["products"],
+                   "promotions": header["promotions"]}
+        for name, typecode, size in header["columns"]:
+            column = array(typecode)
+            column.frombytes(segment_file.read(size))
+            segment[name] = column
+    return segment
+
+
+# OrderHistory Class
+class OrderHistory:
+    """
+    Records order lines in columnar segments and maintains rollups.
+    """
+
+    def __init__(self, directory=None, segment_rows=65536,
+                 retain_segments=4):
+        """
+        Initializes an empty history.
+
+        :param directory: Directory for compacted segments, or None to keep
+                          all segments in memory (str).
+        :param segment_rows: Lines per segment (int).
+        :param retain_segments: Sealed segments kept in memory before
+                                older ones are compacted to disk (int).
+        :raises ValueError: If segment_rows is not positive.
+        """
+        if segment_rows <= 0:
+            raise ValueError("Segments must hold at least one row.")
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.retain_segments = retain_segments
+        self.segments = []  # sealed in-memory segments, oldest first
+        self.compacted = []  # paths of segments written to disk
+        self._next_segment = 0  # number of the next segment file
+        self._current = _new_segment()
+        self._products = []  # product id -> product name
+        self._product_ids = {}  # product -> product id
+        self._promotions = []  # promotion id -> promotion name
+        self._promotion_ids = {}  # promotion name -> promotion id
+        # resolution -> {bucket start: {promotion name: [revenue, units,
+        # discount]}}, buckets in insertion order
+        self._rollups = {resolution: {} for resolution in RESOLUTIONS}
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+            self._next_segment = _next_segment_number(directory)
+
+    def __len__(self) -> int:
+        """
+        Gets the number of lines held in memory.
+
+        :return: Number of lines (int).
+        """
+        return (sum(len(segment["timestamps"]) for segment in self.segments)
+                + len(self._current["timestamps"]))
+
+    def record_order(self, lines, timestamp=None):
+        """
+        Appends the lines of a completed order. The list price is the
+        product's current price times the quantity.
+
+        :param lines: (Product, quantity, charged amount) tuples.
+        :param timestamp: Unix time of the order, defaults to now (float).
+        :return: None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            for product, quantity, charged in lines:
+                self._append(product, quantity, charged, timestamp)
+
+    def _append(self, product, quantity, charged, timestamp):
+        """
+        Appends one line and updates the rollups. The caller must hold
+        the lock.
+        """
+        product_id = self._product_ids.get(product)
+        if product_id is None:
+            product_id = len(self._products)
+            self._products.append(product.name)
+            self._product_ids[product] = product_id
+        promotion = product.promotion
+        promotion_name = NO_PROMOTION if promotion is None \
+            else promotion.name
+        promotion_id = self._promotion_ids.get(promotion_name)
+        if promotion_id is None:
+            promotion_id = len(self._promotions)
+            self._promotions.append(promotion_name)
+            self._promotion_ids[promotion_name] = promotion_id
+        list_price = product.price * quantity
+
+        current = self._current
+        current["timestamps"].append(timestamp)
+        current["product_ids"].append(product_id)
+        current["quantities"].append(quantity)
+        current["list_prices"].append(list_price)
+        current["promotion_ids"].append(promotion_id)
+        current["charged"].append(charged)
+
+        discount = list_price - charged
+        for resolution, (width, retained) in RESOLUTIONS.items():
+            buckets = self._rollups[resolution]
+            start = timestamp - timestamp % width
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = {}
+                while len(buckets) > retained:
+                    del buckets[next(iter(buckets))]
+            totals = bucket.get(promotion_name)
+            if totals is None:
+                bucket[promotion_name] = [charged, quantity, discount]
+            else:
+                totals[0] += charged
+                totals[1] += quantity
+                totals[2] += discount
+
+        if len(current["timestamps"]) >= self.segment_rows:
+            self._seal()
+
+    def _seal(self):
+        """
+        Closes the current segment and compacts old segments to disk.
+        The caller must hold the lock.
+        """
+        self.segments.append(self._current)
+        self._current = _new_segment()
+        if self.directory is None:
+            return
+        while len(self.segments) > self.retain_segments:
+            self._compact(self.segments.pop(0))
+
+    def _compact(self, segment):
+        """
+        Writes a sealed segment to disk with segment-local name tables.
+        The file is written next to its destination and then renamed.
+
+        :param segment: The segment columns (dict).
+        """
+        local_products = {}
+        product_ids = array("i", (
+            local_products.setdefault(product_id, len(local_products))
+            for product_id in segment["product_ids"]
+        ))
+        local_promotions = {}
+        promotion_ids = array("i", (
+            local_promotions.setdefault(promotion_id, len(local_promotions))
+            for promotion_id in segment["promotion_ids"]
+        ))
+        columns = dict(segment, product_ids = product_ids,
+                       promotion_ids = promotion_ids)
+        header = {
+            "rows": len(segment["timestamps"]),
+            "byteorder": sys.byteorder,
+            "columns": [[name, typecode,
+                         len(columns[name]) * columns[name].itemsize]
+                        for name, typecode in _COLUMNS],
+            "products": [self._products[product_id]
+                         for product_id in local_products],
+            "promotions": [self._promotions[promotion_id]
+                           for promotion_id in local_promotions],
+        }
+
+        path = os.path.join(self.directory,
+                            f"segment-{self._next_segment:06d}.bin")
+        self._next_segment += 1
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as segment_file:
+            segment_file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name, _ in _COLUMNS:
+                columns[name].tofile(segment_file)
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        os.replace(temporary_path, path)
+        self.compacted.append(path)
+
+    # Function: Read Rollups
+    def rollup(self, resolution, start=None, end=None):
+        """
+        Gets the pre-aggregated buckets of a resolution.
+
+        :param resolution: "minute", "hour" or "day" (str).
+        :param start: Earliest bucket start to include (float).
+        :param end: Bucket starts must be before this time (float).
+        :return: (bucket start, promotion name, revenue, units, discount)
+                 tuples ordered by time and promotion (list[tuple]).
+        :raises ValueError: If the resolution is unknown.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}'.")
+        with self._lock:
+            return sorted(
+                (bucket_start, promotion_name, *totals)
+                for bucket_start, bucket in self._rollups[resolution].items()
+                if (start is None or bucket_start >= start)
+                and (end is None or bucket_start < end)
+                for promotion_name, totals in bucket.items()
+            )
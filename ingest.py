@@ -0,0 +1,119 @@
+"""
+Streaming ingestion of order logs in JSON Lines format.
+
+Each input line is one order record:
+
+    {"order_id": "A-1", "items": [{"name": "Google Pixel 7", "quantity": 2}]}
+
+Records are read lazily, their product names are resolved through the
+store's name index, the order is placed with Store.order, and one result
+line is written per record as soon as it is processed:
+
+    {"order_id": "A-1", "ok": true, "total": 1000.0}
+    {"order_id": "A-2", "ok": false, "error": "Not enough stock. ..."}
+
+Only one record is held in memory at a time, whatever the file size.
+Records without an order_id are identified by their line number.
+
+Usage:
+    python ingest.py ORDERS.jsonl [RESULTS.jsonl]
+"""
+import argparse
+import json
+import sys
+import time
+
+import main
+
+
+def read_orders(lines):
+    """
+    Parses order records from an iterable of JSON lines, skipping blanks.
+
+    :param lines: Iterable of lines, e.g. an open file (Iterable[str]).
+    :return: Generator of (line number, record or parse error) tuples.
+    """
+    for line_number, line in enumerate(lines, start = 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            yield line_number, error
+
+
+def process_orders(store_obj, numbered_records):
+    """
+    Places each order record on the store.
+
+    :param store_obj: The store to order from (store.Store).
+    :param numbered_records: Iterable of (line number, record) tuples,
+                             as produced by read_orders.
+    :return: Generator of result dicts, one per record.
+    """
+    for line_number, record in numbered_records:
+        if isinstance(record, Exception):
+            yield {"order_id": line_number, "ok": False,
+                   "error": f"Invalid JSON: {record}"}
+            continue
+        if not isinstance(record, dict):
+            yield {"order_id": line_number, "ok": False,
+                   "error": "Order record must be a JSON object."}
+            continue
+
+        order_id = record.get("order_id", line_number)
+        try:
+            shopping_list = main.build_shopping_list(store_obj,
+                                                     record["items"])
+            total_price = store_obj.order(shopping_list)
+        except KeyError as error:
+            yield {"order_id": order_id, "ok": False,
+                   "error": f"Missing field {error}."}
+        except (ValueError, TypeError) as error:
+            yield {"order_id": order_id, "ok": False, "error": str(error)}
+        else:
+            yield {"order_id": order_id, "ok": True, "total": total_price}
+
+
+def ingest(store_obj, input_file, output_file) -> dict:
+    """
+    Streams order records from one file to results in another.
+
+    :param store_obj: The store to order from (store.Store).
+    :param input_file: Open text file with one order record per line.
+    :param output_file: Open text file that receives one result per line.
+    :return: Order count, failed orders, seconds and orders/sec (dict).
+    """
+    orders = failed = 0
+    start = time.perf_counter()
+    for result in process_orders(store_obj, read_orders(input_file)):
+        output_file.write(json.dumps(result) + "\n")
+        orders += 1
+        failed += not result["ok"]
+    elapsed = time.perf_counter() - start
+    return {
+        "orders": orders,
+        "failed": failed,
+        "seconds": elapsed,
+        "orders_per_sec": orders / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Replay an order log")
+    parser.add_argument("orders", help = "JSON Lines file of order records")
+    parser.add_argument("results", nargs = "?",
+                        help = "where to write results (default: stdout)")
+    args = parser.parse_args()
+
+    with open(args.orders, encoding = "utf-8") as input_file:
+        if args.results:
+            with open(args.results, "w", encoding = "utf-8") as output_file:
+                stats = ingest(main.build_default_store(), input_file,
+                               output_file)
+        else:
+            stats = ingest(main.build_default_store(), input_file,
+                           sys.stdout)
+    print(f"{stats['orders']} orders ({stats['failed']} failed) in "
+          f"{stats['seconds']:.2f}s: "
+          f"{stats['orders_per_sec']:,.0f} orders/sec", file = sys.stderr)
@@ -0,0 +1,303 @@
+"""
+Bulk catalog loader for CSV and JSON Lines files.
+
+Each record describes one product:
+
+    kind,name,price,quantity,maximum,promotion,promotion_name,percent
+    product,MacBook Air M2,1450,100,,SecondHalfPrice,Second Half price!,
+    limited,Shipping,10,250,1,,,
+
+kind is product, non_stocked or limited; maximum is only used by limited
+products and quantity is ignored for non-stocked ones. promotion is the
+class name of a built-in promotion (PercentDiscount, SecondHalfPrice or
+ThirdOneFree), with percent only used by PercentDiscount. JSON Lines
+records use the same keys. CSV files need a header line and one record
+per line.
+
+The file is streamed in chunks of lines. Chunks are parsed into columns
+in a process pool, a bounded number at a time, and appended in file
+order. Identical promotion definitions are interned, so all their
+products share one Promotion instance. The columns become a
+ColumnarCatalog in one step, without building a Product per row;
+load_store then opens a store over its rows.
+
+Usage:
+    python loader.py CATALOG.csv|CATALOG.jsonl [--workers N]
+"""
+import csv
+import json
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import islice
+
+from catalog import (
+    ColumnarCatalog,
+    ColumnarStore,
+    LIMITED,
+    NON_STOCKED,
+    NO_PROMOTION,
+    PRODUCT
+)
+from snapshot import decode_promotion
+from store import Store
+
+FIELDS = ("kind", "name", "price", "quantity", "maximum", "promotion",
+          "promotion_name", "percent")
+
+_KINDS = {"product": PRODUCT, "non_stocked": NON_STOCKED, "limited": LIMITED}
+
+_PROMOTIONS = ("PercentDiscount", "SecondHalfPrice", "ThirdOneFree")
+
+
+def _parse_record(record):
+    """
+    Validates one record and converts it to column values.
+
+    :param record: Field values keyed by FIELDS (dict).
+    :return: (name, price, quantity, kind, maximum, promotion key or None)
+             (tuple).
+    :raises ValueError: If a field is missing or invalid.
+    """
+    kind = _KINDS.get(record.get("kind") or "product")
+    if kind is None:
+        raise ValueError(f"Unknown product kind '{record['kind']}'.")
+    name = record.get("name")
+    if not name:
+        raise ValueError("Product name cannot be empty.")
+    price = float(record["price"])
+    if price < 0:
+        raise ValueError("Price cannot be negative.")
+    quantity = 0 if kind == NON_STOCKED else int(record["quantity"])
+    if quantity < 0:
+        raise ValueError("Quantity cannot be negative.")
+    maximum = int(record["maximum"]) if kind == LIMITED else 0
+    if maximum < 0:
+        raise ValueError("Maximum purchase limit cannot be negative.")
+
+    promotion_key = None
+    promotion_type = record.get("promotion")
+    if promotion_type:
+        if promotion_type not in _PROMOTIONS:
+            raise ValueError(f"Unknown promotion '{promotion_type}'.")
+        percent = record.get("percent")
+        if promotion_type == "PercentDiscount":
+            if percent in (None, ""):
+                raise ValueError("PercentDiscount needs a percent.")
+            percent = float(percent)
+            if not (0 <= percent <= 100):
+                raise ValueError("Percent must be between 0 and 100.")
+        else:
+            percent = None
+        promotion_key = (promotion_type,
+                         record.get("promotion_name") or promotion_type,
+                         percent)
+    return name, price, quantity, kind, maximum, promotion_key
+
+
+def parse_chunk(lines, file_format, first_line):
+    """
+    Parses a chunk of records into columns. Runs in the worker processes.
+
+    :param lines: The chunk's lines (list[str]).
+    :param file_format: "csv" or "jsonl" (str).
+    :param first_line: Line number of the chunk's first line (int).
+    :return: Names, prices, quantities, kinds, maximums, chunk-local
+             promotion ids and the chunk's promotion keys (tuple).
+    :raises ValueError: If a record is invalid, naming its line.
+    """
+    names = []
+    prices = array("d")
+    quantities = array("q")
+    kinds = array("b")
+    maximums = array("q")
+    promotion_ids = array("i")
+    promotion_keys = {}  # promotion key -> chunk-local id
+
+    if file_format == "csv":
+        records = (dict(zip(FIELDS, row)) for row in csv.reader(lines))
+    else:
+        records = (json.loads(line) if line.strip() else None
+                   for line in lines)
+    for line_number, record in enumerate(records, start = first_line):
+        if not record:
+            continue
+        try:
+            name, price, quantity, kind, maximum, promotion_key = \
+                _parse_record(record)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Line {line_number}: {error}") from None
+        names.append(name)
+        prices.append(price)
+        quantities.append(quantity)
+        kinds.append(kind)
+        maximums.append(maximum)
+        if promotion_key is None:
+            promotion_ids.append(NO_PROMOTION)
+        else:
+            promotion_ids.append(
+                promotion_keys.setdefault(promotion_key, len(promotion_keys))
+            )
+    return (names, prices, quantities, kinds, maximums, promotion_ids,
+            list(promotion_keys))
+
+
+def _read_chunks(file, chunk_size, first_line):
+    """
+    Splits an open file into chunks of lines.
+
+    :param file: The open catalog file.
+    :param chunk_size: Lines per chunk (int).
+    :param first_line: Line number of the next line (int).
+    :return: Generator of (lines, first line number) tuples.
+    """
+    while True:
+        lines = list(islice(file, chunk_size))
+        if not lines:
+            return
+        yield lines, first_line
+        first_line += len(lines)
+
+
+def _parse_chunks(chunks, file_format, workers):
+    """
+    Parses chunks in file order, in a process pool when workers > 1.
+    At most 2 * workers chunks are read ahead, so memory stays bounded.
+
+    :return: Generator of parse_chunk results.
+    """
+    if workers <= 1:
+        for lines, first_line in chunks:
+            yield parse_chunk(lines, file_format, first_line)
+        return
+
+    # Deferred, since single-process loads do not need it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        pending = deque()
+        for lines, first_line in chunks:
+            pending.append(executor.submit(parse_chunk, lines, file_format,
+                                           first_line))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Function: Load Catalog
+def load_catalog(path, workers=None, chunk_size=50_000):
+    """
+    Loads a CSV or JSON Lines catalog file into a ColumnarCatalog.
+
+    :param path: Path of a .csv or .jsonl file (str).
+    :param workers: Parser processes, defaults to the CPU count (int).
+    :param chunk_size: Lines parsed per task (int).
+    :return: The catalog and load statistics with "rows", "seconds" and
+             "rows_per_sec" (tuple[ColumnarCatalog, dict]).
+    :raises ValueError: If a record is invalid or the CSV header is wrong.
+    """
+    start = time.perf_counter()
+    file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    names = []
+    prices = array("d")
+    quantities = array("q")
+    kinds = array("b")
+    maximums = array("q")
+    promotion_ids = array("i")
+    promotions = []
+    interned = {}  # promotion key -> promotion id
+
+    with open(path, encoding = "utf-8", newline = "") as catalog_file:
+        first_line = 1
+        if file_format == "csv":
+            header = next(csv.reader([catalog_file.readline()]), [])
+            if tuple(header) != FIELDS:
+                raise ValueError(f"CSV header must be: {','.join(FIELDS)}")
+            first_line = 2
+        chunks = _read_chunks(catalog_file, chunk_size, first_line)
+        for chunk in _parse_chunks(chunks, file_format, workers):
+            (chunk_names, chunk_prices, chunk_quantities, chunk_kinds,
+             chunk_maximums, chunk_promotion_ids, promotion_keys) = chunk
+            remap = []
+            for key in promotion_keys:
+                if key not in interned:
+                    promotion_type, name, percent = key
+                    interned[key] = len(promotions)
+                    promotions.append(decode_promotion({
+                        "type": promotion_type, "name": name,
+                        "percent": percent
+                    }))
+                remap.append(interned[key])
+            names.extend(chunk_names)
+            prices.extend(chunk_prices)
+            quantities.extend(chunk_quantities)
+            kinds.extend(chunk_kinds)
+            maximums.extend(chunk_maximums)
+            promotion_ids.extend(
+                remap[i] if i != NO_PROMOTION else NO_PROMOTION
+                for i in chunk_promotion_ids
+            )
+
+    catalog = ColumnarCatalog.from_columns(
+        names, prices, quantities, array("b", bytes([1]) * len(prices)),
+        kinds, maximums, promotion_ids, promotions
+    )
+    seconds = time.perf_counter() - start
+    stats = {"rows": len(prices), "seconds": seconds,
+             "rows_per_sec": len(prices) / seconds if seconds else 0.0}
+    return catalog, stats
+
+
+# Function: Load Store
+def load_store(path, workers=None, chunk_size=50_000, columnar=False,
+               thread_safe=False):
+    """
+    Loads a catalog file and opens a store over all of its products.
+    The products are views of the loaded catalog either way; a
+    ColumnarStore additionally computes its aggregates from the columns
+    but only accepts products of that catalog. A plain Store also accepts
+    products created elsewhere, and keeps per-product aggregates for the
+    views, which is cheap for small catalogs but costs memory and load
+    time for large ones.
+
+    :param path: Path of a .csv or .jsonl file (str).
+    :param workers: Parser processes, defaults to the CPU count (int).
+    :param chunk_size: Lines parsed per task (int).
+    :param columnar: Whether to open a ColumnarStore (bool).
+    :param thread_safe: Whether the store allows concurrent orders (bool).
+    :return: The store and load statistics, timed up to the opened store
+             (tuple[Store, dict]).
+    """
+    start = time.perf_counter()
+    catalog, stats = load_catalog(path, workers, chunk_size)
+    store_class = ColumnarStore if columnar else Store
+    store_obj = store_class(catalog, thread_safe = thread_safe)
+    seconds = time.perf_counter() - start
+    stats.update(seconds = seconds,
+                 rows_per_sec = stats["rows"] / seconds if seconds else 0.0)
+    return store_obj, stats
+
+
+def main():
+    import argparse  # only needed when run as a script
+
+    parser = argparse.ArgumentParser(description = "Load a product catalog")
+    parser.add_argument("catalog", help = "catalog file (.csv or .jsonl)")
+    parser.add_argument("--workers", type = int, default = None)
+    parser.add_argument("--chunk-size", type = int, default = 50_000)
+    args = parser.parse_args()
+
+    _, stats = load_store(args.catalog, args.workers, args.chunk_size,
+                          columnar = True)
+    print(f"{stats['rows']} products in {stats['seconds']:.2f}s: "
+          f"{stats['rows_per_sec']:,.0f} rows/sec", file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,26 @@
-import products  # Import the products module
-import store  # Import the store module
+"""
+Best Buy store front.
+
+Without arguments an interactive menu is started. Subcommands run once
+and exit, for use from scripts and cron jobs:
+
+    python main.py list
+    python main.py total
+    python main.py search QUERY [--limit N]
+    python main.py order FILE     (one "NAME,QUANTITY" line per item,
+                                   "-" reads standard input)
+
+Every command accepts --catalog PATH to load another catalog file,
+before or after the command name.
+Modules beyond the standard library are imported only once a command
+needs the store, which keeps the start-up of short commands cheap.
+"""
+import os
+import sys
+
+# Catalog file the default store is loaded from
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "inventory.csv")
 
 
 # Function: List All Products
@@ -27,6 +48,54 @@ def show_total_amount(store_obj):
     print(f"\nTotal quantity of items in the store: {total_quantity}")
 
 
+def match_product(store_obj, product_name):
+    """
+    Looks up a product by name without printing anything.
+    The exact match must be active; partial matches may be inactive.
+
+    :param store_obj: The store object containing products.
+    :param product_name: The name of the product to search for.
+    :return: The active exact match or None, and all products whose name
+             contains product_name (tuple[Product, list[Product]]).
+    :raises TypeError: If product_name is not a string.
+    """
+    if not isinstance(product_name, str):
+        raise TypeError("Product name must be a string.")
+    # The store's name index returns exact matches first
+    folded_name = product_name.casefold()
+    matching_products = store_obj.search(product_name)
+    for product_item in matching_products:
+        if product_item.name.casefold() != folded_name:
+            break
+        if product_item.active:  # Use 'active' property
+            return product_item, matching_products
+    return None, matching_products
+
+
+def build_shopping_list(store_obj, items):
+    """
+    Resolves order items given by product name into a shopping list.
+    Names are looked up in the store's exact-match index only.
+
+    :param store_obj: The store object containing products.
+    :param items: Iterable of {"name": str, "quantity": int} dicts.
+    :return: List of (Product, quantity) tuples (list[tuple]).
+    :raises ValueError: If a product has no active exact match.
+    :raises TypeError: If a name is not a string.
+    """
+    shopping_list = []
+    for item in items:
+        if not isinstance(item["name"], str):
+            raise TypeError("Product name must be a string.")
+        product = next((product_item for product_item
+                        in store_obj.find_exact(item["name"])
+                        if product_item.active), None)
+        if product is None:
+            raise ValueError(f"Product '{item['name']}' not found.")
+        shopping_list.append((product, int(item["quantity"])))
+    return shopping_list
+
+
 def find_product_by_name(store_obj, product_name):
     """
     Searches for a product by name in the store.
@@ -39,21 +108,10 @@ def find_product_by_name(store_obj, product_name):
     :param product_name: The name of the product to search for.
     :return: The exact matching product if found, otherwise None.
     """
-    # Find exact match
-    product = None
-    for product_item in store_obj.products:
-        if (product_item.name.lower() == product_name.lower()
-                and product_item.active):  # Use 'active' property
-            product = product_item
-            break
+    product, matching_products = match_product(store_obj, product_name)
 
     if not product:
-        # Search for partial matches
-        matching_products = []
-        for product_item in store_obj.products:
-            if product_name.lower() in product_item.name.lower():
-                matching_products.append(product_item)
-
+        # Show partial matches
         if matching_products:
             print(f"\nProducts matching your search '{product_name}':")
             for matched_product in matching_products:
@@ -111,38 +169,133 @@ def quit_program():
     :return: None
     """
     print("\nThank you for visiting Best Buy! Goodbye!")
-    exit()
+    sys.exit()
 
 
-# Function: Start Program
-def start():
+# Function: Build Default Store
+def build_default_store(catalog_path=DEFAULT_CATALOG):
     """
-    Starts the user interface for interacting with the store.
+    Creates the store with the initial stock of inventory and promotions,
+    loaded from a catalog file. This is a plain Store, so products can
+    still be added that are not rows of the catalog; large catalogs are
+    better opened with loader.load_store(..., columnar = True).
+
+    :param catalog_path: CSV or JSON Lines catalog (str), see loader.
+    :return: The store (store.Store).
+    """
+    import loader  # deferred, see the module docstring
+
+    store_obj, _ = loader.load_store(catalog_path, workers = 1)
+    return store_obj
+
+
+# Function: Read Order File
+def read_order_file(lines):
     """
+    Parses order items written as one "NAME,QUANTITY" line each. Blank
+    lines and lines starting with "#" are skipped.
 
-    # setup initial stock of inventory
-    product_list = [products.Product("MacBook Air M2", price = 1450,
-                                     quantity = 100),
-                    products.Product("Bose QuietComfort Earbuds",
-                                     price = 250, quantity = 500),
-                    products.Product("Google Pixel 7", price = 500,
-                                     quantity = 250),
-                    products.NonStockedProduct("Windows License", price = 125),
-                    products.LimitedProduct("Shipping", price = 10,
-                                            quantity = 250, maximum = 1)
-                    ]
+    :param lines: Iterable of lines (Iterable[str]).
+    :return: List of {"name": str, "quantity": int} dicts.
+    :raises ValueError: If a line is malformed.
+    """
+    items = []
+    for line_number, line in enumerate(lines, start = 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, _, quantity = line.rpartition(",")
+        try:
+            items.append({"name": name.strip(), "quantity": int(quantity)})
+        except ValueError:
+            raise ValueError(f"Line {line_number}: expected "
+                             f"NAME,QUANTITY, got '{line}'.") from None
+        if not name.strip():
+            raise ValueError(f"Line {line_number}: expected "
+                             f"NAME,QUANTITY, got '{line}'.")
+    return items
 
-    # Create promotion catalog
-    second_half_price = products.SecondHalfPrice("Second Half price!")
-    third_one_free = products.ThirdOneFree("Third One Free!")
-    thirty_percent = products.PercentDiscount("30% off!", percent = 30)
 
-    # Add promotions to products
-    product_list[0].set_promotion(second_half_price)
-    product_list[1].set_promotion(third_one_free)
-    product_list[3].set_promotion(thirty_percent)
+# Function: Run Command
+def run_command(args):
+    """
+    Runs one non-interactive subcommand.
 
-    best_buy = store.Store(product_list)
+    :param args: Parsed command-line arguments (argparse.Namespace).
+    :return: Exit status (int).
+    """
+    store_obj = build_default_store(args.catalog)
+
+    if args.command == "list":
+        for product in store_obj.get_all_products():
+            print(product.show())
+    elif args.command == "total":
+        print(store_obj.get_total_quantity())
+    elif args.command == "search":
+        matches = store_obj.search(args.query, args.limit)
+        for product in matches:
+            print(product.show())
+        return 0 if matches else 1
+    elif args.command == "order":
+        try:
+            if args.file == "-":
+                items = read_order_file(sys.stdin)
+            else:
+                with open(args.file, encoding = "utf-8") as order_file:
+                    items = read_order_file(order_file)
+            shopping_list = build_shopping_list(store_obj, items)
+            total_price = store_obj.order(shopping_list)
+        except (OSError, ValueError) as error:
+            print(f"Order failed: {error}", file = sys.stderr)
+            return 1
+        print(f"{total_price:.2f}")
+    return 0
+
+
+# Function: Main
+def main(argv=None):
+    """
+    Runs a subcommand, or the interactive menu when none is given.
+
+    :param argv: Command-line arguments without the program name
+                 (list[str]), defaults to sys.argv[1:].
+    :return: Exit status (int).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        start()
+        return 0
+
+    import argparse  # deferred, see the module docstring
+
+    parser = argparse.ArgumentParser(description = "Best Buy store front")
+    parser.add_argument("--catalog", default = DEFAULT_CATALOG,
+                        help = "catalog file (.csv or .jsonl)")
+    # Repeated on each command; suppressed so it keeps the value above
+    catalog_option = argparse.ArgumentParser(add_help = False)
+    catalog_option.add_argument("--catalog", default = argparse.SUPPRESS,
+                                help = "catalog file (.csv or .jsonl)")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    commands.add_parser("list", parents = [catalog_option],
+                        help = "list active products")
+    commands.add_parser("total", parents = [catalog_option],
+                        help = "print the total quantity")
+    search = commands.add_parser("search", parents = [catalog_option],
+                                 help = "search products by name")
+    search.add_argument("query")
+    search.add_argument("--limit", type = int, default = None)
+    order = commands.add_parser("order", parents = [catalog_option],
+                                help = "order items from a file")
+    order.add_argument("file", help = "NAME,QUANTITY lines, or - for stdin")
+    return run_command(parser.parse_args(argv))
+
+
+# Function: Start Program
+def start():
+    """
+    Starts the user interface for interacting with the store.
+    """
+    best_buy = build_default_store()
 
     while True:
         print("\nWelcome to Best Buy!")
@@ -170,5 +323,4 @@ def start():
 
 
 if __name__ == "__main__":
-    # Setup initial stock of inventory
-    start()
+    sys.exit(main())
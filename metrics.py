@@ -0,0 +1,214 @@
+"""
+Opt-in instrumentation for the store's hot paths.
+
+Attach a Metrics object to a store (``store_obj.metrics = Metrics()``)
+to record:
+
+- the latency of successful Store.order calls, as a histogram,
+- how many order lines were bought per promotion and how long pricing
+  them took,
+- why orders failed (inactive, not_in_store, limit, stock or invalid,
+  taken from the PurchaseError that rejected them),
+- how long thread-safe stores waited for product locks.
+
+While a store's `metrics` attribute is None the only cost is one
+attribute check per order and per lock acquisition. One Metrics object
+may be shared by several stores.
+
+Read the values with snapshot(), or export them in the Prometheus text
+format with to_prometheus(), write_textfile() or send().
+"""
+import bisect
+import os
+import socket
+import threading
+
+# Upper bounds of the order latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025,
+                   0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+FAILURE_REASONS = ("inactive", "not_in_store", "limit", "stock", "invalid")
+
+# Label used for order lines of products without a promotion
+NO_PROMOTION = "none"
+
+
+def _label(value) -> str:
+    """
+    Escapes a Prometheus label value.
+
+    :param value: The label value (str).
+    :return: The escaped value (str).
+    """
+    return (str(value).replace("\\", "\\\\").replace("\"", "\\\"")
+            .replace("\n", "\\n"))
+
+
+# Metrics Class
+class Metrics:
+    """
+    Collects timings and counters reported by the stores it is attached to.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty metrics.
+        """
+        self._lock = threading.Lock()
+        self._latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._latency_sum = 0.0
+        self._failures = dict.fromkeys(FAILURE_REASONS, 0)
+        self._promotion_lines = {}  # promotion name -> lines bought
+        self._promotion_seconds = {}  # promotion name -> seconds pricing
+        self._lock_waits = 0
+        self._lock_wait_seconds = 0.0
+
+    def record_order(self, seconds):
+        """
+        Records the latency of a successful order.
+
+        :param seconds: Time the order took (float).
+        """
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self._latency_counts[bucket] += 1
+            self._latency_sum += seconds
+
+    def record_failure(self, error):
+        """
+        Records a rejected order under its failure reason. Errors other
+        than a products.PurchaseError count as "invalid".
+
+        :param error: The error that rejected the order (ValueError).
+        """
+        reason = getattr(error, "reason", "invalid")
+        if reason not in self._failures:
+            reason = "invalid"
+        with self._lock:
+            self._failures[reason] += 1
+
+    def record_pricing(self, product, seconds):
+        """
+        Records the time spent pricing an order line under the product's
+        promotion. Passed to Product.buy_allocated, which times only its
+        price_for call, so stock bookkeeping does not count.
+
+        :param product: The product that was priced (Product).
+        :param seconds: Time spent in price_for (float).
+        """
+        promotion = product.promotion
+        name = promotion.name if promotion is not None else NO_PROMOTION
+        with self._lock:
+            self._promotion_lines[name] = \
+                self._promotion_lines.get(name, 0) + 1
+            self._promotion_seconds[name] = \
+                self._promotion_seconds.get(name, 0.0) + seconds
+
+    def record_lock_wait(self, seconds):
+        """
+        Records time spent waiting for product locks.
+
+        :param seconds: Time until all locks were held (float).
+        """
+        with self._lock:
+            self._lock_waits += 1
+            self._lock_wait_seconds += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Gets a consistent copy of all values.
+
+        :return: The metrics, with cumulative latency bucket counts keyed
+                 by upper bound (dict).
+        """
+        with self._lock:
+            counts = list(self._latency_counts)
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),),
+                                    counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            return {
+                "order_latency": {"buckets": buckets,
+                                  "count": cumulative,
+                                  "sum": self._latency_sum},
+                "order_failures": dict(self._failures),
+                "promotion_lines": dict(self._promotion_lines),
+                "promotion_seconds": dict(self._promotion_seconds),
+                "lock_waits": self._lock_waits,
+                "lock_wait_seconds": self._lock_wait_seconds
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Formats the metrics in the Prometheus text exposition format.
+
+        :return: The exposition text (str).
+        """
+        values = self.snapshot()
+        latency = values["order_latency"]
+        lines = [
+            "# HELP store_order_latency_seconds Latency of successful "
+            "orders.",
+            "# TYPE store_order_latency_seconds histogram"
+        ]
+        for bound, count in latency["buckets"].items():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"store_order_latency_seconds_bucket"
+                         f"{{le=\"{le}\"}} {count}")
+        lines.append(f"store_order_latency_seconds_sum {latency['sum']!r}")
+        lines.append(f"store_order_latency_seconds_count {latency['count']}")
+
+        lines.append("# HELP store_order_failures_total Rejected orders.")
+        lines.append("# TYPE store_order_failures_total counter")
+        for reason, count in values["order_failures"].items():
+            lines.append(f"store_order_failures_total"
+                         f"{{reason=\"{reason}\"}} {count}")
+
+        lines.append("# HELP store_promotion_lines_total Order lines "
+                     "bought per promotion.")
+        lines.append("# TYPE store_promotion_lines_total counter")
+        for name, count in values["promotion_lines"].items():
+            lines.append(f"store_promotion_lines_total"
+                         f"{{promotion=\"{_label(name)}\"}} {count}")
+        lines.append("# HELP store_promotion_seconds_total Time spent "
+                     "pricing order lines per promotion.")
+        lines.append("# TYPE store_promotion_seconds_total counter")
+        for name, seconds in values["promotion_seconds"].items():
+            lines.append(f"store_promotion_seconds_total"
+                         f"{{promotion=\"{_label(name)}\"}} {seconds!r}")
+
+        lines.append("# HELP store_lock_wait_seconds_total Time spent "
+                     "waiting for product locks.")
+        lines.append("# TYPE store_lock_wait_seconds_total counter")
+        lines.append(f"store_lock_wait_seconds_total "
+                     f"{values['lock_wait_seconds']!r}")
+        lines.append("# HELP store_lock_waits_total Product lock "
+                     "acquisitions.")
+        lines.append("# TYPE store_lock_waits_total counter")
+        lines.append(f"store_lock_waits_total {values['lock_waits']}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """
+        Writes the Prometheus text to a file, replacing it atomically so
+        a collector never reads a partial file.
+
+        :param path: Path of the file to write (str).
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding = "utf-8") as metrics_file:
+            metrics_file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def send(self, address, timeout=5.0):
+        """
+        Sends the Prometheus text over a TCP connection and closes it.
+
+        :param address: (host, port) of the receiver (tuple).
+        :param timeout: Connection timeout in seconds (float).
+        :raises OSError: If the connection fails.
+        """
+        with socket.create_connection(address, timeout = timeout) as conn:
+            conn.sendall(self.to_prometheus().encode("utf-8"))
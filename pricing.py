@@ -0,0 +1,135 @@
+"""
+Bulk pricing of many shopping lists at once.
+
+Lines are grouped by promotion type and priced with NumPy array arithmetic
+using the closed forms of the built-in promotions, instead of dispatching
+to Promotion.apply_promotion line by line. Other promotions are priced
+inside cart_context() of their cart, like in Store.quote. Pricing never
+changes stock,
+which makes it suitable for re-pricing carts in promotion simulations.
+NumPy is optional: without it every line is priced through
+apply_promotion.
+"""
+from products import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from promotions import cart_context
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+# Promotion kind codes used to group order lines
+NO_PROMOTION = 0
+PERCENT_DISCOUNT = 1
+SECOND_HALF_PRICE = 2
+THIRD_ONE_FREE = 3
+OTHER_PROMOTION = 4
+
+_PROMOTION_KINDS = {
+    type(None): NO_PROMOTION,
+    PercentDiscount: PERCENT_DISCOUNT,
+    SecondHalfPrice: SECOND_HALF_PRICE,
+    ThirdOneFree: THIRD_ONE_FREE,
+}
+
+
+def promotion_kind(promotion) -> int:
+    """
+    Maps a promotion to the kind code of its pricing group.
+    Subclasses of the built-in promotions may override apply_promotion,
+    so only exact types have a closed form; anything else is OTHER_PROMOTION.
+
+    :param promotion: Promotion object or None.
+    :return: Kind code (int).
+    """
+    return _PROMOTION_KINDS.get(type(promotion), OTHER_PROMOTION)
+
+
+# Function: Price Many Shopping Lists
+def price_orders(shopping_lists) -> list:
+    """
+    Calculates the total price of each shopping list without buying.
+    Stock levels, active flags and purchase limits are not checked.
+
+    :param shopping_lists: Iterable of shopping lists, each a list of
+                           (Product, quantity) tuples.
+    :return: Total price per shopping list (list[float]).
+    :raises ValueError: If any quantity is not greater than zero.
+    """
+    cart_ids = []
+    products = []
+    quantities = []
+    cart_totals = []
+    for cart_id, shopping_list in enumerate(shopping_lists):
+        cart_total = 0
+        for product, quantity in shopping_list:
+            cart_ids.append(cart_id)
+            products.append(product)
+            quantities.append(quantity)
+            cart_total += product.price * quantity
+        cart_totals.append(cart_total)
+    cart_count = len(cart_totals)
+
+    if any(quantity <= 0 for quantity in quantities):
+        raise ValueError("Quantity to buy must be greater than zero.")
+
+    if np is None:
+        totals = [0.0] * cart_count
+        for cart_id, product, quantity in zip(cart_ids, products, quantities):
+            if not product.promotion:
+                totals[cart_id] += product.price * quantity
+                continue
+            with cart_context(cart_totals[cart_id]):
+                totals[cart_id] += product.promotion.apply_promotion(
+                    product, quantity)
+        return totals
+
+    line_totals = _price_lines(products, quantities, cart_ids, cart_totals)
+    return np.bincount(np.asarray(cart_ids, dtype = np.intp),
+                       weights = line_totals,
+                       minlength = cart_count).tolist()
+
+
+def _price_lines(products, quantities, cart_ids, cart_totals):
+    """
+    Prices individual order lines, grouped by promotion kind.
+
+    :param products: Product of each line (list[Product]).
+    :param quantities: Quantity of each line (list[int]).
+    :param cart_ids: Cart index of each line (list[int]).
+    :param cart_totals: List-price total of each cart (list[float]).
+    :return: Price of each line (numpy.ndarray[float64]).
+    """
+    promotions = [product.promotion for product in products]
+    kinds = np.fromiter((promotion_kind(promotion)
+                         for promotion in promotions),
+                        dtype = np.int8, count = len(promotions))
+    prices = np.fromiter((product.price for product in products),
+                         dtype = np.float64, count = len(products))
+    qty = np.asarray(quantities, dtype = np.int64)
+    line_totals = np.empty(len(products), dtype = np.float64)
+
+    plain = kinds == NO_PROMOTION
+    line_totals[plain] = prices[plain] * qty[plain]
+
+    percent = np.flatnonzero(kinds == PERCENT_DISCOUNT)
+    if percent.size:
+        percents = np.fromiter((promotions[i].percent for i in percent),
+                               dtype = np.float64, count = percent.size)
+        line_totals[percent] = (prices[percent] * qty[percent]
+                                * (1 - percents / 100))
+
+    half = kinds == SECOND_HALF_PRICE
+    half_price_items = qty[half] // 2
+    full_price_items = half_price_items + qty[half] % 2
+    line_totals[half] = (full_price_items * prices[half]
+                         + half_price_items * prices[half] * 0.5)
+
+    third = kinds == THIRD_ONE_FREE
+    line_totals[third] = (qty[third] - qty[third] // 3) * prices[third]
+
+    for i in np.flatnonzero(kinds == OTHER_PROMOTION):
+        with cart_context(cart_totals[cart_ids[i]]):
+            line_totals[i] = promotions[i].apply_promotion(products[i],
+                                                           quantities[i])
+    return line_totals
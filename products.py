@@ -1,11 +1,59 @@
+import threading
+import time
 from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+
+from warehouses import rank_locations
+
+# Largest quantity covered by a product's precomputed price curve
+PRICE_CURVE_LIMIT = 10_000
+# Quantities covered by a newly built price curve, before it grows
+PRICE_CURVE_START = 16
+
+
+# Function: Format Price
+def _format_price(price) -> str:
+    """
+    Formats a price for display, writing whole prices without a decimal
+    part, so 1450 and 1450.0 both read "1450".
+
+    :param price: The price (float).
+    :return: The formatted price (str).
+    """
+    if isinstance(price, float) and price.is_integer():
+        return str(int(price))
+    return str(price)
+
+
+# PurchaseError Class
+class PurchaseError(ValueError):
+    """
+    Raised when an order line cannot be bought. The reason names the
+    check that failed: "inactive", "not_in_store", "limit", "stock" or
+    "invalid".
+    """
+
+    def __init__(self, message, reason):
+        """
+        :param message: The error message (str).
+        :param reason: Why the purchase failed (str).
+        """
+        super().__init__(message)
+        self.reason = reason
 
 
 # Product Class
 class Product:
     """
     Represents a general product in the store.
+    Instances use __slots__ instead of a per-instance __dict__, which keeps
+    large catalogs compact and makes attribute access in buy() cheaper.
     """
+    __slots__ = ("_name", "_price", "_quantity", "_reserved", "_active",
+                 "promotion", "_listeners", "_price_curve", "_locations",
+                 "_ranking")
+
     def __init__(self, name, price, quantity):
         """
         Initializes a product with a name, price, and quantity.
@@ -21,11 +69,134 @@ class Product:
             raise ValueError("Price cannot be negative.")
 
         # Initialize instance variables
-        self.name = name
-        self.price = price
+        self._name = name
+        self._price = price
         self._quantity = quantity  # underscore > protected attribute
+        self._reserved = 0  # Part of the quantity held by reservations
         self._active = True  # Product is active by default
         self.promotion = None  # New attribute for promotions
+        self._listeners = ()  # Observers notified about state changes
+        self._price_curve = None  # (pricing inputs, prices by quantity)
+        self._locations = None  # Warehouse -> quantity, if stocked by location
+        self._ranking = ()  # Warehouses in allocation order
+
+    # Copying and pickling
+    def __getstate__(self):
+        """
+        Gets the product's state for copying and pickling. Listeners and
+        reservations belong to the objects observing the product, so they
+        are left out.
+
+        :return: Slot values keyed by slot name, in the (dict, slots)
+                 format used for objects with __slots__ (tuple).
+        """
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot not in ("_listeners", "_price_curve", "_reserved") \
+                        and hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return None, state
+
+    def __setstate__(self, state):
+        """
+        Restores a copied or unpickled product without any listeners or
+        reservations.
+
+        :param state: State returned by __getstate__ (tuple).
+        """
+        _, slots = state
+        for slot, value in slots.items():
+            setattr(self, slot, value)
+        self._listeners = ()
+        self._reserved = 0
+        self._price_curve = None
+
+    # Change notifications
+    def add_listener(self, listener):
+        """
+        Registers an observer for changes to the product's state.
+
+        The listener must provide a
+        ``product_changed(product, field, old, new)`` method, which is
+        called after a tracked field (e.g. ``"quantity"`` or ``"active"``)
+        has changed.
+
+        :param listener: The observer to register.
+        """
+        if listener not in self._listeners:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        """
+        Unregisters an observer previously added with add_listener.
+
+        :param listener: The observer to remove.
+        """
+        self._listeners = tuple(observer for observer in self._listeners
+                                if observer is not listener)
+
+    def _notify(self, field, old, new):
+        """
+        Notifies all registered listeners that a field has changed.
+
+        :param field: Name of the changed field (str).
+        :param old: Value before the change.
+        :param new: Value after the change.
+        """
+        for listener in self._listeners:
+            listener.product_changed(self, field, old, new)
+
+    @property
+    def name(self) -> str:
+        """
+        Gets the name of the product.
+
+        :return: Name of the product (str).
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        """
+        Renames the product.
+
+        :param name: New name of the product (str).
+        :raises ValueError: If name is empty.
+        """
+        if not name:
+            raise ValueError("Product name cannot be empty.")
+        old_name = self._name
+        self._name = name
+        if name != old_name:
+            self._notify("name", old_name, name)
+
+    @property
+    def price(self) -> float:
+        """
+        Gets the price of the product.
+
+        :return: Price of the product (float).
+        """
+        return self._price
+
+    @price.setter
+    def price(self, price: float):
+        """
+        Sets a new price and drops cached quotes for the old price.
+
+        :param price: New price of the product (float).
+        :raises ValueError: If price is negative.
+        """
+        if price < 0:
+            raise ValueError("Price cannot be negative.")
+        old_price = self._price
+        self._price = price
+        if price != old_price:
+            self._price_curve = None
+            if self.promotion is not None:
+                price_cache.invalidate(self.promotion.cache_key(), old_price)
+            self._notify("price", old_price, price)
 
     # Getter and setter for promotion
     def get_promotion(self):
@@ -42,7 +213,11 @@ class Product:
 
         :param promotion: Promotion object to apply.
         """
+        old_promotion = self.promotion
+        if old_promotion is not None and old_promotion is not promotion:
+            price_cache.invalidate(old_promotion.cache_key(), self.price)
         self.promotion = promotion
+        self._price_curve = None
 
     @property
     def quantity(self):
@@ -59,14 +234,197 @@ class Product:
         Sets the quantity of the product. Deactivates it if quantity is zero.
 
         :param quantity: New quantity to set (int).
-        :raises ValueError: If quantity is negative.
+        :raises ValueError: If quantity is negative or below the reserved
+                            quantity.
         """
         if quantity < 0:
             raise ValueError("Quantity cannot be negative.")
+        if quantity < self._reserved:
+            raise ValueError(f"Quantity cannot be below the "
+                             f"{self._reserved} reserved.")
+        if self._locations is not None \
+                and quantity != sum(self._locations.values()):
+            raise ValueError("Stock of a product with locations "
+                             "must be set per location.")
+        self._set_quantity(quantity)
+
+    def _set_quantity(self, quantity: int):
+        """
+        Stores a validated quantity and notifies listeners. Deactivates
+        the product if quantity is zero.
+
+        :param quantity: New quantity (int).
+        """
+        old_quantity = self._quantity
         self._quantity = quantity
+        if quantity != old_quantity:
+            self._notify("quantity", old_quantity, quantity)
         if self._quantity == 0:
             self.deactivate()
 
+    # Per-location stock
+    @property
+    def locations(self) -> dict:
+        """
+        Gets the stock of each location, in allocation order.
+
+        :return: Quantity by warehouse, empty if the product is not
+                 stocked by location (dict).
+        """
+        if self._locations is None:
+            return {}
+        return {location: self._locations[location]
+                for location in self._ranking}
+
+    def stock_at(self, location) -> int:
+        """
+        Gets the stock of one location.
+
+        :param location: The warehouse (Warehouse).
+        :return: Quantity at that location (int).
+        """
+        if self._locations is None:
+            return 0
+        return self._locations.get(location, 0)
+
+    def set_stock(self, location, quantity: int):
+        """
+        Sets the stock of one location. The product's quantity becomes the
+        total over its locations; stock set through the quantity property
+        before the first location was added is replaced.
+
+        :param location: The warehouse (Warehouse).
+        :param quantity: Quantity at that location (int).
+        :raises ValueError: If quantity is negative or the new total is
+                            below the reserved quantity. Nothing is changed
+                            when this is raised.
+        """
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative.")
+        if self._locations is None:
+            total = quantity
+        else:
+            total = (self._quantity + quantity
+                     - self._locations.get(location, 0))
+        if total < self._reserved:
+            raise ValueError(f"Quantity cannot be below the "
+                             f"{self._reserved} reserved.")
+        if self._locations is None:
+            self._locations = {}
+        if location not in self._locations:
+            self._ranking = rank_locations(self._ranking + (location,))
+        self._locations[location] = quantity
+        self.quantity = total
+
+    def rank_locations(self, origin=None):
+        """
+        Recomputes the allocation order of the product's locations.
+
+        :param origin: (x, y) to rank by proximity to, or None to rank by
+                       warehouse priority (tuple).
+        """
+        self._ranking = rank_locations(self._ranking, origin)
+
+    def allocate(self, quantity: int) -> list:
+        """
+        Splits a quantity across locations in allocation order, without
+        changing any stock. Buying the quantity takes exactly this split.
+
+        :param quantity: Quantity to allocate (int).
+        :return: (Warehouse, quantity) tuples, empty if the product is
+                 not stocked by location (list[tuple]).
+        :raises ValueError: If the locations do not hold enough stock.
+        """
+        if self._locations is None:
+            return []
+        split = []
+        remaining = quantity
+        for location in self._ranking:
+            if not remaining:
+                break
+            taken = min(self._locations[location], remaining)
+            if taken:
+                split.append((location, taken))
+                remaining -= taken
+        if remaining:
+            raise ValueError(f"Not enough stock. "
+                             f"Only {quantity - remaining} available.")
+        return split
+
+    def return_stock(self, split):
+        """
+        Puts stock taken by a purchase back at its locations, e.g. when an
+        order is rolled back. The quantity grows by the returned total.
+
+        :param split: (Warehouse, quantity) tuples as returned by
+                      buy_allocated (list[tuple]).
+        """
+        returned = 0
+        for location, taken in split:
+            self._locations[location] += taken
+            returned += taken
+        self._set_quantity(self._quantity + returned)
+
+    @property
+    def reserved(self) -> int:
+        """
+        Gets the part of the quantity held by reservations.
+
+        :return: Reserved quantity (int).
+        """
+        return self._reserved
+
+    @property
+    def available(self) -> int:
+        """
+        Gets the quantity that is in stock and not reserved.
+
+        :return: Available quantity (int).
+        """
+        return self.quantity - self._reserved
+
+    def reserve(self, quantity: int):
+        """
+        Holds part of the available stock. Held stock stays in quantity
+        but can no longer be bought until it is released.
+
+        :param quantity: Quantity to hold (int).
+        :raises ValueError: If quantity is invalid or exceeds the available
+                            stock.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity to reserve must be greater than zero.")
+        if quantity > self.available:
+            raise ValueError(f"Not enough stock. "
+                             f"Only {self.available} available.")
+        self._hold(quantity)
+
+    def _hold(self, quantity: int):
+        """
+        Adds to the reserved quantity without validating it, e.g. to put
+        back holds released by a checkout that failed.
+
+        :param quantity: Quantity to hold (int).
+        """
+        old_reserved = self._reserved
+        self._reserved = old_reserved + quantity
+        self._notify("reserved", old_reserved, self._reserved)
+
+    def release(self, quantity: int):
+        """
+        Returns held stock to the available quantity.
+
+        :param quantity: Quantity to release (int).
+        :raises ValueError: If quantity is invalid or exceeds the reserved
+                            quantity.
+        """
+        if quantity <= 0 or quantity > self._reserved:
+            raise ValueError(f"Cannot release {quantity}, "
+                             f"only {self._reserved} reserved.")
+        old_reserved = self._reserved
+        self._reserved = old_reserved - quantity
+        self._notify("reserved", old_reserved, self._reserved)
+
     @property
     def active(self) -> bool:
         """
@@ -83,13 +441,16 @@ class Product:
 
         :param active: Boolean indicating whether the product is active.
         """
+        old_active = self._active
         self._active = active
+        if active != old_active:
+            self._notify("active", old_active, active)
 
     def deactivate(self):
         """
         Sets the product's active status to False.
         """
-        self._active = False
+        self.active = False
 
     def show(self) -> str:
         """
@@ -99,7 +460,7 @@ class Product:
         """
         promo_info = (f" (Promotion: "
                       f"{self.promotion.name})") if self.promotion else ""
-        return (f"{self.name}, Price: {self.price}, "
+        return (f"{self.name}, Price: {_format_price(self.price)}, "
                 f"Quantity: {self.quantity}{promo_info}")
 
     def buy(self, quantity: int) -> float:
@@ -109,20 +470,117 @@ class Product:
         :return: Total price after applying promotions (float).
         :raises ValueError: If requested quantity is invalid or exceeds stock.
         """
-        if quantity <= 0:
-            raise ValueError("Quantity to buy must be greater than zero.")
+        return self.buy_allocated(quantity)[0]
 
-        if quantity > self.quantity:
-            raise ValueError(f"Not enough stock. "
-                             f"Only {self.quantity} available.")
+    def buy_allocated(self, quantity: int, on_priced=None) -> tuple:
+        """
+        Processes a purchase like buy() and reports the locations the
+        quantity was taken from. Subclasses add their purchase checks here.
 
-        total_price = (
+        :param quantity: Quantity to purchase (int).
+        :param on_priced: Called with the product and the seconds spent in
+                          price_for(), or None (callable).
+        :return: Total price after applying promotions and the split across
+                 locations, empty if the product is not stocked by location
+                 (tuple[float, list]).
+        :raises PurchaseError: If requested quantity is invalid or exceeds
+                               stock.
+        """
+        if quantity <= 0:
+            raise PurchaseError("Quantity to buy must be greater than zero.",
+                                "invalid")
+
+        available = self.quantity - self._reserved
+        if quantity > available:
+            raise PurchaseError(f"Not enough stock. "
+                                f"Only {available} available.", "stock")
+
+        if on_priced is None:
+            total_price = self.price_for(quantity)
+        else:
+            start = time.perf_counter()
+            total_price = self.price_for(quantity)
+            on_priced(self, time.perf_counter() - start)
+
+        split = self.allocate(quantity)
+        for location, taken in split:
+            self._locations[location] -= taken
+        self._set_quantity(self.quantity - quantity)
+        return total_price, split
+
+    def price_for(self, quantity: int) -> float:
+        """
+        Calculates the price of a quantity, applying the promotion.
+        Stock is neither checked nor changed.
+
+        :param quantity: Quantity to price (int).
+        :return: Total price after applying promotions (float).
+        """
+        return (
             self.promotion.apply_promotion(self, quantity)
             if self.promotion else self.price * quantity
         )
 
-        self.quantity -= quantity
-        return total_price
+    def quote(self, quantity: int) -> float:
+        """
+        Quotes the price of a quantity without buying it.
+        Promotional prices for quantities that can be bought in one order
+        are looked up in the product's precomputed price curve; larger
+        quantities are served from the shared price_cache.
+
+        :param quantity: Quantity to quote (int).
+        :return: Total price after applying promotions (float).
+        :raises ValueError: If quantity is not greater than zero.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity to buy must be greater than zero.")
+        if self.promotion is None:
+            return self.price * quantity
+        curve = self.price_curve(quantity)
+        if curve is not None:
+            return curve[quantity]
+        return price_cache.get(self, quantity)
+
+    def max_order_quantity(self) -> int:
+        """
+        Gets the largest quantity a single order can currently buy.
+
+        :return: Maximum quantity (int).
+        """
+        return self.available
+
+    def price_curve(self, quantity: int = 1):
+        """
+        Gets the precomputed total prices for quantities 0..n, where n is
+        at least the given quantity. The curve starts small and doubles
+        when a larger quantity is asked for, up to max_order_quantity()
+        capped at PRICE_CURVE_LIMIT. It is rebuilt when the price, the
+        promotion or its parameters change.
+
+        :param quantity: Quantity the curve must cover (int).
+        :return: Prices indexed by quantity, or None if the quantity is
+                 beyond the curve or the promotion cannot be cached
+                 (array[float]).
+        """
+        promotion = self.promotion
+        key = promotion.cache_key() if promotion is not None else None
+        if key is None:
+            return None
+        inputs = (self._price, promotion, key)
+        cached = self._price_curve
+        covered = 0
+        if cached is not None and cached[0] == inputs:
+            if quantity < len(cached[1]):
+                return cached[1]
+            covered = len(cached[1]) - 1
+
+        limit = min(self.max_order_quantity(), PRICE_CURVE_LIMIT)
+        if quantity > limit:
+            return None
+        size = min(max(quantity, 2 * covered, PRICE_CURVE_START), limit)
+        curve = promotion.price_curve(self, size)
+        self._price_curve = (inputs, curve)
+        return curve
 
 
 # NonStockedProduct Class
@@ -133,6 +591,7 @@ class NonStockedProduct(Product):
     to ensure it is always zero, as these products are intangible
     and do not require stock tracking.
     """
+    __slots__ = ()
 
     def __init__(self, name: str, price: float):
         """
@@ -165,13 +624,24 @@ class NonStockedProduct(Product):
                 "Non-stocked products must always have a quantity of 0."
             )
 
+    def set_stock(self, location, quantity: int):
+        """
+        Ensures that non-stocked products cannot be stocked at locations.
+
+        :param location: The warehouse (Warehouse).
+        :param quantity: Attempted quantity at that location (int).
+        :raises ValueError: Always.
+        """
+        raise ValueError("Non-stocked products cannot be stocked "
+                         "at locations.")
+
     def show(self) -> str:
         """
         Displays details about the non-stocked product.
 
         :return: A string representation of the product.
         """
-        return f"{self.name} (Non-Stocked), Price: {self.price}"
+        return f"{self.name} (Non-Stocked), Price: {_format_price(self.price)}"
 
 
 # LimitedProduct Class
@@ -181,6 +651,7 @@ class LimitedProduct(Product):
     This subclass extends the base Product class to add the functionality
     of limiting the quantity that can be purchased in a single order.
     """
+    __slots__ = ("_maximum",)
 
     def __init__(self, name: str, price: float, quantity: int, maximum: int):
         """
@@ -218,20 +689,46 @@ class LimitedProduct(Product):
             raise ValueError("Maximum purchase limit cannot be negative.")
         self._maximum = maximum
 
-    def buy(self, quantity: int) -> float:
+    def max_order_quantity(self) -> int:
+        """
+        Gets the largest quantity a single order can currently buy.
+
+        :return: Maximum quantity, limited by the purchase limit (int).
+        """
+        return min(self.maximum, self.available)
+
+    def buy_allocated(self, quantity: int, on_priced=None) -> tuple:
         """
         Processes a purchase while enforcing the maximum purchase limit.
 
         :param quantity: Quantity to purchase (int).
-        :return: Total price after applying promotions (float).
-        :raises ValueError: If requested quantity exceeds the maximum limit.
-                           Also raises errors from the parent `buy` method.
+        :param on_priced: Pricing callback, see Product.buy_allocated
+                          (callable).
+        :return: Total price after applying promotions and the split across
+                 locations (tuple[float, list]).
+        :raises PurchaseError: If requested quantity exceeds the maximum
+                               limit. Also raises errors from the parent
+                               `buy_allocated` method.
+        """
+        if quantity > self.maximum:
+            raise PurchaseError(f"You cannot buy more than "
+                                f"{self.maximum} of this product.", "limit")
+
+        return super().buy_allocated(quantity, on_priced)
+
+    def reserve(self, quantity: int):
+        """
+        Holds stock while enforcing the maximum purchase limit.
+
+        :param quantity: Quantity to hold (int).
+        :raises ValueError: If quantity exceeds the maximum limit. Also
+                            raises errors from the parent `reserve` method.
         """
         if quantity > self.maximum:
             raise ValueError(f"You cannot buy more than "
                              f"{self.maximum} of this product.")
 
-        return super().buy(quantity)
+        super().reserve(quantity)
 
     def show(self) -> str:
         """
@@ -241,7 +738,7 @@ class LimitedProduct(Product):
         """
         return (f"{self.name} "
                 f"(Limited, Max: {self.maximum}), "
-                f"Price: {self.price}, "
+                f"Price: {_format_price(self.price)}, "
                 f"Quantity: {self.quantity}")
 
 
@@ -258,6 +755,31 @@ class Promotion(ABC):
     def apply_promotion(self, product, quantity) -> float:
         pass
 
+    def cache_key(self):
+        """
+        Gets the parameters that determine this promotion's prices.
+        Promotions with equal keys must price every (price, quantity)
+        pair identically. Returns None, which disables caching, unless a
+        subclass knows its parameters.
+
+        :return: Hashable key, or None (tuple).
+        """
+        return None
+
+    def price_curve(self, product, max_quantity):
+        """
+        Calculates the total price of every quantity from 0 to
+        max_quantity. Subclasses replace this with their closed form.
+
+        :param product: Product the promotion is applied to (Product).
+        :param max_quantity: Largest quantity to price (int).
+        :return: Prices indexed by quantity (array[float]).
+        """
+        curve = array("d", [0.0])
+        curve.extend(self.apply_promotion(product, quantity)
+                     for quantity in range(1, max_quantity + 1))
+        return curve
+
 
 # PercentDiscount Class
 class PercentDiscount(Promotion):
@@ -297,7 +819,38 @@ class PercentDiscount(Promotion):
         """
         if not (0 <= percent <= 100):
             raise ValueError("Percent must be between 0 and 100.")
+        old_key = self.cache_key()
         self._percent = percent
+        if old_key != self.cache_key():
+            price_cache.invalidate(old_key)
+
+    def cache_key(self):
+        """
+        Gets the parameters that determine this promotion's prices.
+
+        :return: The promotion type and percentage, or None for
+                 subclasses, which may price differently (tuple).
+        """
+        if type(self) is not PercentDiscount:
+            return None
+        return PercentDiscount, self._percent
+
+    def price_curve(self, product, max_quantity):
+        """
+        Calculates the discounted price of every quantity from 0 to
+        max_quantity.
+
+        :param product: Product the promotion is applied to (Product).
+        :param max_quantity: Largest quantity to price (int).
+        :return: Prices indexed by quantity (array[float]).
+        """
+        if type(self) is not PercentDiscount:
+            # Subclasses may price differently than the closed form
+            return Promotion.price_curve(self, product, max_quantity)
+        price = product.price
+        factor = 1 - self.percent / 100
+        return array("d", (price * quantity * factor
+                           for quantity in range(max_quantity + 1)))
 
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """
@@ -324,6 +877,34 @@ class SecondHalfPrice(Promotion):
     Applies a promotion where every second item is half price.
     """
 
+    def cache_key(self):
+        """
+        Gets the parameters that determine this promotion's prices.
+
+        :return: The promotion type, or None for subclasses (tuple).
+        """
+        if type(self) is not SecondHalfPrice:
+            return None
+        return (SecondHalfPrice,)
+
+    def price_curve(self, product, max_quantity):
+        """
+        Calculates the price of every quantity from 0 to max_quantity,
+        with every second item at half price.
+
+        :param product: Product the promotion is applied to (Product).
+        :param max_quantity: Largest quantity to price (int).
+        :return: Prices indexed by quantity (array[float]).
+        """
+        if type(self) is not SecondHalfPrice:
+            return Promotion.price_curve(self, product, max_quantity)
+        price = product.price
+        return array("d", (
+            (quantity // 2 + quantity % 2) * price
+            + quantity // 2 * price * 0.5
+            for quantity in range(max_quantity + 1)
+        ))
+
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """
         Calculates the total price with every second item at half price.
@@ -346,6 +927,146 @@ class ThirdOneFree(Promotion):
     Applies a promotion where every third item is free.
     """
 
+    def cache_key(self):
+        """
+        Gets the parameters that determine this promotion's prices.
+
+        :return: The promotion type, or None for subclasses (tuple).
+        """
+        if type(self) is not ThirdOneFree:
+            return None
+        return (ThirdOneFree,)
+
+    def price_curve(self, product, max_quantity):
+        """
+        Calculates the price of every quantity from 0 to max_quantity,
+        with every third item free.
+
+        :param product: Product the promotion is applied to (Product).
+        :param max_quantity: Largest quantity to price (int).
+        :return: Prices indexed by quantity (array[float]).
+        """
+        if type(self) is not ThirdOneFree:
+            return Promotion.price_curve(self, product, max_quantity)
+        price = product.price
+        return array("d", ((quantity - quantity // 3) * price
+                           for quantity in range(max_quantity + 1)))
+
     def apply_promotion(self, product, quantity) -> float:
         paid_items = quantity - (quantity // 3)
         return paid_items * product.price
+
+
+# PriceCache Class
+class PriceCache:
+    """
+    Bounded LRU cache of promotional prices for quoting.
+
+    Entries are keyed on the promotion's cache_key(), the product price and
+    the quantity, so products sharing a promotion and a price share
+    entries. Changing a product's price or promotion, or a discount's
+    percentage, invalidates the affected entries.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Initializes an empty cache.
+
+        :param maxsize: Maximum number of cached prices (int).
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (key, price, quantity) -> total
+        self._index = {}  # key -> price -> set of quantities
+        self._lock = threading.Lock()
+
+    def get(self, product, quantity) -> float:
+        """
+        Gets the promotional price of a quantity of a product, computing
+        and caching it on a miss.
+
+        :param product: The product to price (Product).
+        :param quantity: Quantity to price (int).
+        :return: Total price after applying the promotion (float).
+        """
+        key = product.promotion.cache_key()
+        if key is None:
+            return product.price_for(quantity)
+
+        entry = (key, product.price, quantity)
+        with self._lock:
+            total_price = self._entries.get(entry)
+            if total_price is not None:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return total_price
+            self.misses += 1
+
+        total_price = product.price_for(quantity)
+        with self._lock:
+            self._entries[entry] = total_price
+            self._index.setdefault(key, {}).setdefault(
+                product.price, set()).add(quantity)
+            if len(self._entries) > self.maxsize:
+                self._forget(*self._entries.popitem(last = False)[0])
+        return total_price
+
+    def _forget(self, key, price, quantity):
+        """
+        Removes an evicted entry from the index. Caller holds the lock.
+        """
+        prices = self._index[key]
+        quantities = prices[price]
+        quantities.discard(quantity)
+        if not quantities:
+            del prices[price]
+            if not prices:
+                del self._index[key]
+
+    def invalidate(self, key, price=None):
+        """
+        Drops the cached prices of a promotion key, either for one product
+        price or for all prices.
+
+        :param key: Promotion cache key (tuple), None is ignored.
+        :param price: Product price, or None for every price (float).
+        :return: None
+        """
+        if key is None:
+            return
+        with self._lock:
+            prices = self._index.get(key)
+            if not prices:
+                return
+            for cached_price in ([price] if price is not None
+                                 else list(prices)):
+                for quantity in prices.pop(cached_price, ()):
+                    del self._entries[(key, cached_price, quantity)]
+            if not prices:
+                del self._index[key]
+
+    def clear(self):
+        """
+        Drops all cached prices and resets the statistics.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Gets the cache statistics.
+
+        :return: Hits, misses, current size and maximum size (dict).
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._entries), "maxsize": self.maxsize}
+
+
+# Shared cache used by Product.quote
+price_cache = PriceCache()
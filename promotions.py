@@ -0,0 +1,202 @@
+"""
+Stackable, prioritized promotions.
+
+A PromotionSet is a Promotion made of several PromotionRule objects, so it
+can be assigned with Product.set_promotion like any single promotion.
+Each rule wraps a promotion and may limit it to a time window and to
+carts above a minimum total. Rules are either exclusive (the cheapest
+applicable one wins, ties going to the higher priority) or stackable
+(applied on top, in priority order).
+
+Whenever the rules change, the set compiles them into a flat pricing plan:
+two tuples of (start, end, minimum cart total, discount function) steps
+sorted by priority. Pricing a line then only walks those tuples. Each
+discount function returns the ratio of the promoted price to the list
+price, and the ratios of the best exclusive rule and of all applicable
+stackable rules are multiplied.
+
+Store.order and Store.quote publish the cart's list-price total and the
+current time through cart_context(); outside of it a line is treated as a
+cart of its own, priced at the current time.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from products import (
+    Promotion,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree
+)
+
+# (cart list-price total, timestamp) of the order being priced
+_cart = contextvars.ContextVar("cart", default = None)
+
+
+@contextmanager
+def cart_context(cart_total, now=None):
+    """
+    Makes a cart's list-price total and pricing time visible to the
+    promotion sets applied inside the with-block.
+
+    :param cart_total: Sum of price * quantity over the cart (float).
+    :param now: Pricing time as a Unix timestamp, defaults to the current
+                time (float).
+    """
+    token = _cart.set((cart_total, time.time() if now is None else now))
+    try:
+        yield
+    finally:
+        _cart.reset(token)
+
+
+def _discount_function(promotion):
+    """
+    Compiles a promotion into a function of (product, quantity) returning
+    its promoted price as a fraction of the list price.
+
+    :param promotion: The promotion to compile (Promotion).
+    :return: The discount function (callable).
+    """
+    promotion_type = type(promotion)
+    if promotion_type is PercentDiscount:
+        return lambda product, quantity: 1 - promotion.percent / 100
+    if promotion_type is SecondHalfPrice:
+        return lambda product, quantity: (
+            (quantity - quantity // 2 * 0.5) / quantity
+        )
+    if promotion_type is ThirdOneFree:
+        return lambda product, quantity: (quantity - quantity // 3) / quantity
+
+    def ratio(product, quantity):
+        list_price = product.price * quantity
+        if not list_price:
+            return 1.0
+        return promotion.apply_promotion(product, quantity) / list_price
+    return ratio
+
+
+# PromotionRule Class
+class PromotionRule:
+    """
+    A promotion together with the conditions under which it applies.
+    Rules are immutable; replace a rule to change it.
+    """
+    __slots__ = ("promotion", "priority", "starts_at", "ends_at",
+                 "min_cart_total", "stackable")
+
+    def __init__(self, promotion, priority=0, starts_at=None, ends_at=None,
+                 min_cart_total=0.0, stackable=False):
+        """
+        Initializes a promotion rule.
+
+        :param promotion: The promotion to apply (Promotion).
+        :param priority: Higher priorities are preferred (int).
+        :param starts_at: Unix timestamp the rule starts at, or None (float).
+        :param ends_at: Unix timestamp the rule ends at, or None (float).
+        :param min_cart_total: Minimum list-price total of the cart (float).
+        :param stackable: Whether the rule applies on top of others (bool).
+        :raises ValueError: If the time window or cart total is invalid.
+        """
+        if starts_at is not None and ends_at is not None \
+                and ends_at <= starts_at:
+            raise ValueError("A promotion must end after it starts.")
+        if min_cart_total < 0:
+            raise ValueError("Minimum cart total cannot be negative.")
+        self.promotion = promotion
+        self.priority = priority
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.min_cart_total = min_cart_total
+        self.stackable = stackable
+
+
+# PromotionSet Class
+class PromotionSet(Promotion):
+    """
+    Combines several promotion rules into one promotion.
+    """
+
+    def __init__(self, name, rules=()):
+        """
+        Initializes a promotion set and compiles its pricing plan.
+
+        :param name: Name of the promotion set (str).
+        :param rules: Initial rules (Iterable[PromotionRule]).
+        """
+        super().__init__(name)
+        self._rules = list(rules)
+        self._compile()
+
+    @property
+    def rules(self):
+        """
+        Gets the rules of the set.
+
+        :return: The rules (tuple[PromotionRule]).
+        """
+        return tuple(self._rules)
+
+    def add_rule(self, rule):
+        """
+        Adds a rule and recompiles the pricing plan.
+
+        :param rule: The rule to add (PromotionRule).
+        """
+        self._rules.append(rule)
+        self._compile()
+
+    def remove_rule(self, rule):
+        """
+        Removes a rule and recompiles the pricing plan.
+
+        :param rule: The rule to remove (PromotionRule).
+        :raises ValueError: If the rule is not part of the set.
+        """
+        self._rules.remove(rule)
+        self._compile()
+
+    def _compile(self):
+        """
+        Builds the pricing plan from the current rules.
+        """
+        ordered = sorted(self._rules, key = lambda rule: -rule.priority)
+        steps = [(rule.stackable,
+                  (-float("inf") if rule.starts_at is None
+                   else rule.starts_at,
+                   float("inf") if rule.ends_at is None else rule.ends_at,
+                   rule.min_cart_total,
+                   _discount_function(rule.promotion)))
+                 for rule in ordered]
+        self._exclusive = tuple(step for stackable, step in steps
+                                if not stackable)
+        self._stackable = tuple(step for stackable, step in steps
+                                if stackable)
+
+    def apply_promotion(self, product, quantity) -> float:
+        """
+        Prices a line by evaluating the compiled pricing plan.
+
+        :param product: Product being purchased (Product).
+        :param quantity: Quantity being purchased (int).
+        :return: Total price after applying the promotions (float).
+        :raises ValueError: If quantity is not greater than zero.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be greater than zero.")
+        list_price = product.price * quantity
+        cart = _cart.get()
+        if cart is None:
+            cart_total, now = list_price, time.time()
+        else:
+            cart_total, now = cart
+
+        ratio = 1.0
+        for starts_at, ends_at, min_cart_total, discount in self._exclusive:
+            if starts_at <= now < ends_at and cart_total >= min_cart_total:
+                ratio = min(ratio, discount(product, quantity))
+        for starts_at, ends_at, min_cart_total, discount in self._stackable:
+            if starts_at <= now < ends_at and cart_total >= min_cart_total:
+                ratio *= discount(product, quantity)
+        return list_price * ratio
@@ -0,0 +1,230 @@
+"""
+asyncio order-processing service in front of a Store.
+
+Clients connect over a local TCP or Unix socket and exchange one JSON
+object per line. Supported requests:
+
+    {"op": "list"}
+    {"op": "total"}
+    {"op": "search", "query": "pixel"}
+    {"op": "order", "items": [{"name": "Google Pixel 7", "quantity": 2}]}
+
+Every response has an "ok" flag, and an "error" message when it is false.
+Requests from all sessions go through one bounded queue that a single
+worker drains, so the store is only ever touched from one task. When the
+queue is full, sessions stop reading from their sockets until there is
+room again, which pushes back on clients through TCP flow control.
+
+Usage:
+    python service.py [--host 127.0.0.1] [--port 8765] [--unix PATH]
+"""
+import argparse
+import asyncio
+import json
+import signal
+
+import main
+
+
+def describe_product(product) -> dict:
+    """
+    Converts a product to a JSON-serializable dict.
+
+    :param product: The product to describe (Product).
+    :return: Name, price, quantity, active flag and promotion name (dict).
+    """
+    return {
+        "name": product.name,
+        "price": product.price,
+        "quantity": product.quantity,
+        "active": product.active,
+        "promotion": product.promotion.name if product.promotion else None,
+    }
+
+
+# OrderService Class
+class OrderService:
+    """
+    Serves concurrent client sessions for a single store.
+    """
+
+    def __init__(self, store_obj, max_pending=1024):
+        """
+        Initializes the service.
+
+        :param store_obj: The store to serve (store.Store).
+        :param max_pending: Maximum number of queued requests (int).
+        """
+        self.store = store_obj
+        self.max_pending = max_pending
+        self._queue = None
+        self._server = None
+        self._worker_task = None
+        self._sessions = set()
+        self._idle_sessions = set()  # sessions waiting for a request
+        self._closing = False
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Starts accepting sessions.
+
+        :param host: Address to listen on for TCP (str).
+        :param port: TCP port, 0 picks a free one (int).
+        :param path: Unix socket path; overrides host and port (str).
+        :return: The address the service listens on.
+        """
+        self._queue = asyncio.Queue(self.max_pending)
+        self._worker_task = asyncio.create_task(self._worker())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._session,
+                                                           path = path)
+        else:
+            self._server = await asyncio.start_server(self._session,
+                                                      host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def shutdown(self, timeout=5.0):
+        """
+        Stops the service gracefully: no new sessions are accepted, queued
+        requests are answered, idle sessions are closed, and sessions with
+        a request in flight finish it before closing.
+
+        :param timeout: Seconds to wait for in-flight requests (float).
+        :return: None
+        """
+        self._closing = True
+        self._server.close()
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for session in self._idle_sessions:
+            session.cancel()
+        if self._sessions:
+            await asyncio.wait(self._sessions, timeout = timeout)
+        for session in self._sessions:
+            session.cancel()
+
+        self._worker_task.cancel()
+        await asyncio.gather(self._worker_task, *self._sessions,
+                             return_exceptions = True)
+        await self._server.wait_closed()
+
+    async def submit(self, raw_request) -> dict:
+        """
+        Queues a request and waits for its response. Waits for room in
+        the queue when it is full.
+
+        :param raw_request: One JSON-encoded request (bytes or str).
+        :return: The response (dict).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((raw_request, future))
+        return await future
+
+    async def _session(self, reader, writer):
+        """
+        Serves one client connection, one request at a time.
+        """
+        session = asyncio.current_task()
+        self._sessions.add(session)
+        try:
+            while not self._closing:
+                self._idle_sessions.add(session)
+                try:
+                    line = await reader.readline()
+                finally:
+                    self._idle_sessions.discard(session)
+                if not line:
+                    break
+                response = await self.submit(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+
+    async def _worker(self):
+        """
+        Answers queued requests in arrival order.
+        """
+        while True:
+            raw_request, future = await self._queue.get()
+            try:
+                response = self.handle(raw_request)
+            except Exception as error:
+                # Keep serving: one bad request must not stop the worker
+                response = {"ok": False, "error": f"Internal error: {error}"}
+            try:
+                if not future.cancelled():
+                    future.set_result(response)
+            finally:
+                self._queue.task_done()
+
+    def handle(self, raw_request) -> dict:
+        """
+        Executes one request against the store.
+
+        :param raw_request: One JSON-encoded request (bytes or str).
+        :return: The response (dict).
+        """
+        try:
+            request = json.loads(raw_request)
+            operation = request["op"]
+            if operation == "order":
+                shopping_list = main.build_shopping_list(self.store,
+                                                         request["items"])
+                return {"ok": True,
+                        "total": self.store.order(shopping_list)}
+            if operation == "list":
+                return {"ok": True,
+                        "products": [describe_product(product) for product
+                                     in self.store.get_all_products()]}
+            if operation == "total":
+                return {"ok": True,
+                        "total": self.store.get_total_quantity()}
+            if operation == "search":
+                product, matches = main.match_product(self.store,
+                                                      request["query"])
+                return {"ok": True,
+                        "product": describe_product(product)
+                        if product else None,
+                        "matches": [describe_product(match)
+                                    for match in matches]}
+            raise ValueError(f"Unknown operation {operation!r}.")
+        except KeyError as error:
+            return {"ok": False, "error": f"Missing field {error}."}
+        except (ValueError, TypeError) as error:
+            return {"ok": False, "error": str(error)}
+
+
+async def serve(store_obj, host, port, path, max_pending):
+    """
+    Runs the service until SIGINT or SIGTERM, then shuts down gracefully.
+    """
+    service = OrderService(store_obj, max_pending = max_pending)
+    address = await service.start(host, port, path)
+    print(f"Serving orders on {address}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    await stop.wait()
+
+    print("Shutting down...")
+    await service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Best Buy order service")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--unix", help = "serve on a Unix socket instead")
+    parser.add_argument("--max-pending", type = int, default = 1024)
+    args = parser.parse_args()
+    asyncio.run(serve(main.build_default_store(), args.host, args.port,
+                      args.unix, args.max_pending))
@@ -0,0 +1,291 @@
+"""
+Multi-process sharded store.
+
+Products are partitioned across worker processes by a stable hash of
+their name, and every worker owns a regular Store with its partition.
+Orders refer to products by name. An order whose lines all belong to one
+shard is sent straight to that shard. An order spanning several shards
+uses two-phase commit: every involved shard applies its lines and keeps
+the undo log (prepare), then all shards either drop the undo log (commit)
+or roll back (abort), so the order stays all-or-nothing.
+
+order_batch() sends the single-shard orders of a batch to all shards at
+once, so shards work through their parts in parallel. This is what lets
+throughput grow with the number of processes.
+
+Cart-level promotion rules look at the whole order, so the coordinator
+sends each order's list-price total along with the lines of every shard.
+"""
+import itertools
+import multiprocessing
+import threading
+import zlib
+
+from promotions import cart_context
+from store import Store
+
+
+def shard_index(name, shard_count) -> int:
+    """
+    Maps a product name to its shard, identically in every process.
+
+    :param name: Product name (str).
+    :param shard_count: Number of shards (int).
+    :return: Shard index (int).
+    """
+    return zlib.crc32(name.encode("utf-8")) % shard_count
+
+
+def _place_order(store_obj, by_name, lines, cart_total):
+    """
+    Resolves named order lines inside a worker and applies them.
+
+    :param cart_total: List-price total of the whole order, across all
+                       shards (float).
+    :return: The total price and the undo log (tuple[float, list]).
+    :raises ValueError: If the order fails; nothing has been changed.
+    """
+    shopping_list = [(by_name[name], quantity) for name, quantity in lines]
+    with store_obj.locked(product for product, _ in shopping_list), \
+            cart_context(cart_total):
+        return store_obj._apply_order(shopping_list)
+
+
+def _shard_worker(connection, products):
+    """
+    Serves requests for one shard until it is told to stop.
+
+    :param connection: Pipe end connected to the ShardedStore.
+    :param products: The products owned by this shard (list[Product]).
+    """
+    store_obj = Store(products)
+    by_name = {product.name: product for product in products}
+    prepared = {}  # transaction id -> undo log
+
+    def attempt(lines, cart_total):
+        try:
+            return "ok", _place_order(store_obj, by_name, lines,
+                                      cart_total)[0]
+        except ValueError as error:
+            return "error", str(error)
+
+    while True:
+        request = connection.recv()
+        command = request[0]
+        if command == "batch":
+            connection.send([attempt(lines, cart_total)
+                             for lines, cart_total in request[1]])
+        elif command == "prepare":
+            _, transaction, lines, cart_total = request
+            try:
+                total, prepared[transaction] = _place_order(
+                    store_obj, by_name, lines, cart_total)
+                connection.send(("ok", total))
+            except ValueError as error:
+                connection.send(("error", str(error)))
+        elif command == "commit":
+            prepared.pop(request[1])
+        elif command == "abort":
+            Store._rollback(prepared.pop(request[1]))
+        elif command == "total":
+            connection.send(store_obj.get_total_quantity())
+        elif command == "products":
+            connection.send(store_obj.get_all_products())
+        elif command == "stop":
+            connection.close()
+            return
+
+
+# ShardedStore Class
+class ShardedStore:
+    """
+    Store partitioned across worker processes.
+    """
+
+    def __init__(self, products, shards=None):
+        """
+        Starts one worker process per shard and hands out the products.
+
+        :param products: Products to partition; names must be unique
+                         (list[Product]).
+        :param shards: Number of worker processes, defaults to the number
+                       of CPUs (int).
+        :raises ValueError: If two products share a name.
+        """
+        self.shard_count = shards or multiprocessing.cpu_count()
+        self._shard_of = {}
+        self._price_of = {}
+        partitions = [[] for _ in range(self.shard_count)]
+        for product in products:
+            if product.name in self._shard_of:
+                raise ValueError(f"Duplicate product name {product.name}.")
+            shard = shard_index(product.name, self.shard_count)
+            self._shard_of[product.name] = shard
+            self._price_of[product.name] = product.price
+            partitions[shard].append(product)
+
+        self._lock = threading.Lock()
+        self._transactions = itertools.count()
+        self._connections = []
+        self._processes = []
+        for partition in partitions:
+            parent_end, worker_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(target = _shard_worker,
+                                              args = (worker_end, partition),
+                                              daemon = True)
+            process.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stops all worker processes.
+
+        :return: None
+        """
+        with self._lock:
+            for connection, process in zip(self._connections,
+                                           self._processes):
+                if process.is_alive():
+                    connection.send(("stop",))
+                process.join()
+                connection.close()
+
+    def _split(self, shopping_list):
+        """
+        Groups named order lines by shard.
+
+        :param shopping_list: List of (product name, quantity) tuples.
+        :return: Lines per shard index (dict[int, list]).
+        :raises ValueError: If a product name is unknown.
+        """
+        lines_by_shard = {}
+        for name, quantity in shopping_list:
+            shard = self._shard_of.get(name)
+            if shard is None:
+                raise ValueError(f"The product {name} "
+                                 f"is not available in the store.")
+            lines_by_shard.setdefault(shard, []).append((name, quantity))
+        return lines_by_shard
+
+    # Function: Process an Order
+    def order(self, shopping_list) -> float:
+        """
+        Processes an all-or-nothing order.
+
+        :param shopping_list: List of (product name, quantity) tuples.
+        :return: Total price of the order (float).
+        :raises ValueError: If any line cannot be bought.
+        """
+        result = self.order_batch([shopping_list])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def order_batch(self, shopping_lists) -> list:
+        """
+        Processes many independent orders. Single-shard orders run in
+        parallel across shards; multi-shard orders follow one by one.
+
+        :param shopping_lists: List of shopping lists of
+                               (product name, quantity) tuples.
+        :return: Per order, its total price or the ValueError explaining
+                 why it failed (list[float | ValueError]).
+        """
+        results = [None] * len(shopping_lists)
+        single_shard = {}  # shard -> list of (order index, lines, total)
+        multi_shard = []
+        for index, shopping_list in enumerate(shopping_lists):
+            try:
+                lines_by_shard = self._split(shopping_list)
+            except ValueError as error:
+                results[index] = error
+                continue
+            cart_total = sum(self._price_of[name] * quantity
+                             for name, quantity in shopping_list)
+            if len(lines_by_shard) == 1:
+                (shard, lines), = lines_by_shard.items()
+                single_shard.setdefault(shard, []).append(
+                    (index, lines, cart_total))
+            elif lines_by_shard:
+                multi_shard.append((index, lines_by_shard, cart_total))
+            else:
+                results[index] = 0.0
+
+        with self._lock:
+            for shard, orders in single_shard.items():
+                self._connections[shard].send(
+                    ("batch", [(lines, cart_total)
+                               for _, lines, cart_total in orders])
+                )
+            for shard, orders in single_shard.items():
+                replies = self._connections[shard].recv()
+                for (index, _, _), reply in zip(orders, replies):
+                    results[index] = self._result(reply)
+
+            for index, lines_by_shard, cart_total in multi_shard:
+                results[index] = self._two_phase_order(lines_by_shard,
+                                                       cart_total)
+        return results
+
+    def _two_phase_order(self, lines_by_shard, cart_total):
+        """
+        Places an order spanning several shards. Caller holds the lock.
+
+        :param lines_by_shard: Lines per shard index (dict[int, list]).
+        :param cart_total: List-price total of the whole order (float).
+        :return: The total price, or the ValueError of a failed shard.
+        """
+        transaction = next(self._transactions)
+        for shard, lines in lines_by_shard.items():
+            self._connections[shard].send(("prepare", transaction, lines,
+                                           cart_total))
+        replies = {shard: self._connections[shard].recv()
+                   for shard in lines_by_shard}
+
+        failures = [reply for reply in replies.values() if reply[0] != "ok"]
+        decision = "abort" if failures else "commit"
+        for shard, reply in replies.items():
+            if reply[0] == "ok":
+                self._connections[shard].send((decision, transaction))
+        if failures:
+            return self._result(failures[0])
+        return sum(reply[1] for reply in replies.values())
+
+    @staticmethod
+    def _result(reply):
+        status, value = reply
+        return value if status == "ok" else ValueError(value)
+
+    # Function: Get Total Quantity of Products
+    def get_total_quantity(self) -> int:
+        """
+        Sums the total quantity of active products over all shards.
+
+        :return: Total quantity of items in the store (int).
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.send(("total",))
+            return sum(connection.recv() for connection in self._connections)
+
+    # Function: Get All Active Products
+    def get_all_products(self):
+        """
+        Retrieves copies of all active products from all shards, grouped
+        by shard.
+
+        :return: List of active products (list[Product]).
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.send(("products",))
+            return [product for connection in self._connections
+                    for product in connection.recv()]
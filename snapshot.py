@@ -0,0 +1,246 @@
+"""
+Compact binary snapshots of a store's inventory.
+
+A snapshot holds one fixed-width column per product attribute (price,
+quantity, active flag, kind, purchase limit and promotion id), the product
+names as one UTF-8 blob with an offset column, and a small promotion
+table. Loading maps the file with mmap and wraps the columns in memoryviews
+without copying or parsing them, so opening a snapshot takes the same
+time for any catalog size and worker processes that open the same file
+share its pages. Product views are only created for rows that are
+accessed. Stock changes made after loading stay private to the process
+(copy-on-write); write a new snapshot to persist them.
+
+File layout: a little-endian header (magic, version, byte order, row and
+promotion counts, section offsets) followed by the sections, each aligned
+to 8 bytes. Columns are stored in the byte order of the machine that
+wrote them.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from catalog import (
+    ColumnarCatalog,
+    ColumnarStore,
+    LIMITED,
+    NO_PROMOTION,
+    product_kind
+)
+from products import PercentDiscount, SecondHalfPrice, ThirdOneFree
+
+MAGIC = b"BBSNAP\x00\x01"
+VERSION = 1
+
+# magic, version, byte order, rows, promotions, 9 section offsets
+_HEADER = struct.Struct("<8sHB5xQQ9Q")
+
+# Typecodes of the fixed-width columns, in file order
+_COLUMNS = (
+    ("prices", "d"),
+    ("quantities", "q"),
+    ("active", "b"),
+    ("kinds", "b"),
+    ("maximums", "q"),
+    ("promotion_ids", "i"),
+)
+
+_PROMOTION_TYPES = {
+    cls.__name__: cls
+    for cls in (PercentDiscount, SecondHalfPrice, ThirdOneFree)
+}
+
+
+def _byte_order_code() -> int:
+    return 0 if sys.byteorder == "little" else 1
+
+
+def encode_promotion(promotion) -> dict:
+    """
+    Converts a built-in promotion to its promotion table entry.
+
+    :param promotion: The promotion to encode (Promotion).
+    :return: The table entry (dict).
+    :raises ValueError: If the promotion type cannot be stored.
+    """
+    promotion_type = type(promotion).__name__
+    if _PROMOTION_TYPES.get(promotion_type) is not type(promotion):
+        raise ValueError(f"Cannot store promotions of type "
+                         f"{promotion_type} in a snapshot.")
+    entry = {"type": promotion_type, "name": promotion.name}
+    if isinstance(promotion, PercentDiscount):
+        entry["percent"] = promotion.percent
+    return entry
+
+
+def decode_promotion(entry):
+    """
+    Recreates a promotion from its promotion table entry.
+
+    :param entry: The table entry (dict).
+    :return: The promotion (Promotion).
+    """
+    promotion_class = _PROMOTION_TYPES[entry["type"]]
+    if promotion_class is PercentDiscount:
+        return promotion_class(entry["name"], percent = entry["percent"])
+    return promotion_class(entry["name"])
+
+
+# SnapshotNames Class
+class SnapshotNames:
+    """
+    Sequence of product names decoded on demand from a snapshot's name
+    blob. Renamed rows are kept in a small override dict.
+    """
+
+    def __init__(self, offsets, blob):
+        """
+        :param offsets: Start offset of each name plus the end offset of
+                        the last one (memoryview, typecode "Q").
+        :param blob: The UTF-8 encoded names (memoryview).
+        """
+        self._offsets = offsets
+        self._blob = blob
+        self._renamed = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row) -> str:
+        row = range(len(self))[row]
+        name = self._renamed.get(row)
+        if name is None:
+            name = str(self._blob[self._offsets[row]:self._offsets[row + 1]],
+                       "utf-8")
+        return name
+
+    def __setitem__(self, row, name):
+        self._renamed[range(len(self))[row]] = name
+
+    def __iter__(self):
+        blob = self._blob
+        renamed = self._renamed
+        offsets = self._offsets
+        for row, start, end in zip(range(len(self)), offsets, offsets[1:]):
+            name = renamed.get(row)
+            yield str(blob[start:end], "utf-8") if name is None else name
+
+
+# Function: Save Snapshot
+def save_snapshot(store_obj, path):
+    """
+    Writes the products of a store to a snapshot file.
+    The file is written next to its destination and then renamed, so
+    readers never see a partially written snapshot.
+
+    :param store_obj: The store to save (store.Store).
+    :param path: Destination file path (str).
+    :return: None
+    :raises ValueError: If a product has a promotion type that cannot be
+                        stored.
+    """
+    columns = {name: array(typecode) for name, typecode in _COLUMNS}
+    name_offsets = array("Q", [0])
+    name_blob = bytearray()
+    promotion_ids = {}
+    promotion_table = []
+
+    for product in store_obj.products:
+        kind = product_kind(product)
+        promotion = product.promotion
+        promotion_id = NO_PROMOTION
+        if promotion is not None:
+            promotion_id = promotion_ids.get(id(promotion))
+            if promotion_id is None:
+                promotion_id = len(promotion_table)
+                promotion_table.append(encode_promotion(promotion))
+                promotion_ids[id(promotion)] = promotion_id
+        columns["prices"].append(product.price)
+        columns["quantities"].append(product.quantity)
+        columns["active"].append(product.active)
+        columns["kinds"].append(kind)
+        columns["maximums"].append(product.maximum if kind == LIMITED else 0)
+        columns["promotion_ids"].append(promotion_id)
+        name_blob += product.name.encode("utf-8")
+        name_offsets.append(len(name_blob))
+
+    sections = [columns[name].tobytes() for name, _ in _COLUMNS]
+    sections.append(name_offsets.tobytes())
+    sections.append(bytes(name_blob))
+    sections.append(json.dumps(promotion_table).encode("utf-8"))
+
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(_HEADER.pack(MAGIC, VERSION, _byte_order_code(),
+                                         len(columns["prices"]),
+                                         len(promotion_table), *offsets))
+        for offset, section in zip(offsets, sections):
+            snapshot_file.write(bytes(offset - snapshot_file.tell()))
+            snapshot_file.write(section)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+
+
+# Function: Load Snapshot
+def load_snapshot(path) -> ColumnarCatalog:
+    """
+    Maps a snapshot file into memory as a columnar catalog.
+
+    :param path: Snapshot file path (str).
+    :return: The catalog backed by the mapped file (ColumnarCatalog).
+    :raises ValueError: If the file is not a compatible snapshot.
+    """
+    with open(path, "rb") as snapshot_file:
+        mapped = mmap.mmap(snapshot_file.fileno(), 0,
+                           access = mmap.ACCESS_COPY)
+    buffer = memoryview(mapped)
+    if len(buffer) < _HEADER.size:
+        raise ValueError(f"{path} is not a store snapshot.")
+    magic, version, byte_order, rows, _, *offsets = _HEADER.unpack_from(
+        buffer
+    )
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a store snapshot.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}.")
+    if byte_order != _byte_order_code():
+        raise ValueError("The snapshot was written on a machine "
+                         "with a different byte order.")
+
+    columns = {}
+    for (name, typecode), offset in zip(_COLUMNS, offsets):
+        size = rows * struct.calcsize(typecode)
+        columns[name] = buffer[offset:offset + size].cast(typecode)
+    name_offsets = buffer[offsets[6]:offsets[6] + (rows + 1) * 8].cast("Q")
+    name_blob = buffer[offsets[7]:offsets[7] + name_offsets[rows]]
+    promotion_table = json.loads(str(buffer[offsets[8]:], "utf-8"))
+
+    return ColumnarCatalog.from_columns(
+        SnapshotNames(name_offsets, name_blob),
+        promotions = [decode_promotion(entry) for entry in promotion_table],
+        **columns
+    )
+
+
+def load_store(path, thread_safe=False) -> ColumnarStore:
+    """
+    Loads a snapshot and builds a store over it. The store only adds a
+    one-byte membership flag per row and creates no product objects, so
+    opening it is nearly as fast as load_snapshot.
+
+    :param path: Snapshot file path (str).
+    :param thread_safe: Whether orders may be placed concurrently (bool).
+    :return: The store (ColumnarStore).
+    """
+    return ColumnarStore(load_snapshot(path), thread_safe = thread_safe)
@@ -1,3 +1,63 @@
+import heapq
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from operator import itemgetter
+
+from products import NonStockedProduct, PurchaseError
+from promotions import cart_context
+
+# Length of the character n-grams used by the substring search index
+NGRAM_SIZE = 3
+
+# Low-stock callbacks of the order being applied, as (callback, product,
+# quantity) tuples; None outside of an order
+_pending_alerts = ContextVar("pending_alerts", default = None)
+
+
+def _ngrams(text):
+    """
+    Splits a (case-folded) string into its distinct character n-grams.
+
+    :param text: The string to split (str).
+    :return: Set of n-grams of length NGRAM_SIZE (set[str]).
+    """
+    return {text[i:i + NGRAM_SIZE]
+            for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _cart_total(shopping_list):
+    """
+    Sums the list prices of a shopping list, before promotions.
+
+    :param shopping_list: A list of (Product, quantity) tuples.
+    :return: Cart total at list prices (float).
+    """
+    return sum(product.price * quantity for product, quantity in shopping_list)
+
+
+# Reservation Class
+class Reservation:
+    """
+    Stock held for a shopping list until it is checked out, released or
+    expires. Created by Store.reserve.
+    """
+    __slots__ = ("lines", "expires_at", "active")
+
+    def __init__(self, lines, expires_at):
+        """
+        Initializes a reservation.
+
+        :param lines: The held (Product, quantity) tuples (tuple).
+        :param expires_at: time.monotonic() value the hold expires at
+                           (float).
+        """
+        self.lines = lines
+        self.expires_at = expires_at
+        self.active = True
+
+
 # Store Class
 class Store:
     """
@@ -5,22 +65,119 @@ class Store:
     """
 
     # Function: Initialize Store
-    def __init__(self, products):
+    def __init__(self, products, thread_safe=False):
         """
         Initializes the store with a list of products.
 
+        Products are kept in an identity-keyed index (an insertion-ordered
+        dict), so membership checks, lookups and removals are O(1)
+        regardless of the catalog size. The set of active products and
+        their total quantity are maintained incrementally from the
+        products' change notifications, as is the name search index once
+        the first search has built it.
+
+        In thread-safe mode every product gets its own lock. Orders hold
+        the locks of the products they touch, acquired in a deterministic
+        order, so orders on disjoint products run in parallel while stock
+        of a shared product is never oversold.
+
+        Set the `wal` attribute to a wal.WriteAheadLog to make orders,
+        additions and removals durable, and the `metrics` attribute to a
+        metrics.Metrics to record order timings and failures. Set the
+        `feed` attribute to a changefeed.ChangeFeed to publish inventory
+        changes to replicas, and the `history` attribute to a
+        history.OrderHistory to record order lines and revenue rollups.
+
+        Units sold and remaining quantities are kept in heaps with lazy
+        deletion: every change pushes a new entry and outdated entries are
+        dropped when a query reaches them, so top_sellers() and
+        low_stock() only look at the entries they return.
+
+        Reservations wait for expiry in a heap ordered by deadline, so
+        expiring them only looks at holds that are actually due instead of
+        scanning every outstanding hold.
+
         :param products: List of product objects (list[Product]).
+        :param thread_safe: Whether orders may be placed concurrently
+                            from several threads (bool).
+        """
+        self.thread_safe = thread_safe
+        self.wal = None  # optional wal.WriteAheadLog for stock changes
+        self.metrics = None  # optional metrics.Metrics for instrumentation
+        self.feed = None  # optional changefeed.ChangeFeed for replicas
+        self.history = None  # optional history.OrderHistory of order lines
+        self._product_locks = {}  # product -> threading.Lock
+        # Guards the indexes and aggregates shared by all products
+        self._index_lock = threading.Lock() if thread_safe else nullcontext()
+        self._products = {}  # product -> insertion sequence number
+        self._next_seq = 0
+        self._active_products = {}  # insertion-ordered set
+        self._active_order_stale = False  # set when a product is reactivated
+        self._total_quantity = 0
+        self._folded_names = {}  # product -> case-folded name
+        self._exact_names = {}  # case-folded name -> list[Product]
+        self._name_grams = {}  # n-gram -> set[Product]
+        self._names_indexed = False  # name indexes are built on first search
+        self._holds = []  # heap of (expires_at, sequence, Reservation)
+        self._units_sold = {}  # product -> units sold through this store
+        self._sold_heap = []  # heap of (-units sold, seq, product)
+        self._stock_heap = []  # heap of (quantity, seq, product)
+        self._low_stock_callbacks = []  # (threshold, callback) tuples
+        self._next_hold = 0
+        for product in products:
+            self.add_product(product)
+
+    @property
+    def products(self):
         """
-        self.products = products
+        Gets all products in the store, in the order they were added.
+
+        :return: List of products (list[Product]).
+        """
+        return list(self._products)
+
+    def __contains__(self, product) -> bool:
+        """
+        Checks whether a product is part of the store inventory in O(1).
+
+        :param product: The product to look up (Product).
+        :return: True if the product is in the store, False otherwise.
+        """
+        return product in self._products
+
+    def __len__(self) -> int:
+        """
+        Gets the number of products in the store inventory.
+
+        :return: Number of products (int).
+        """
+        return len(self._products)
 
     def add_product(self, product):
         """
         Adds a product to the store inventory.
+        Adding a product that is already in the store has no effect.
 
         :param product: The product to add (Product).
         :return: None
         """
-        self.products.append(product)
+        with self._index_lock:
+            if product in self._products:
+                return
+            self._products[product] = self._next_seq
+            self._next_seq += 1
+            if self.thread_safe:
+                self._product_locks[product] = threading.Lock()
+            if self._names_indexed:
+                self._index_name(product)
+            product.add_listener(self)
+            self._track_stock(product)
+            self._push_stock(product)
+            if self.wal is not None:
+                self.wal.log_add(product)
+            if self.feed is not None:
+                self.feed.append("add", product,
+                                 (product.quantity, product.active))
 
     def remove_product(self, product):
         """
@@ -28,40 +185,424 @@ class Store:
 
         :param product: The product to remove (Product).
         :return: None
+        :raises ValueError: If the product is not in the store.
+        """
+        with self._index_lock:
+            try:
+                del self._products[product]
+            except KeyError:
+                raise ValueError(f"The product {product.name} "
+                                 f"is not available in the store.") from None
+            self._product_locks.pop(product, None)
+            product.remove_listener(self)
+            if self._names_indexed:
+                self._unindex_name(product)
+            self._untrack_stock(product)
+            self._units_sold.pop(product, None)
+            if self.wal is not None:
+                self.wal.log_remove(product)
+            if self.feed is not None:
+                self.feed.append("remove", product, None)
+
+    # Function: Lock Products
+    @contextmanager
+    def locked(self, products):
+        """
+        Holds the locks of the given products for the duration of a
+        with-block. Locks are acquired in the order the products were added
+        to the store, which rules out deadlocks between concurrent callers.
+        Products that are not in the store are skipped. Does nothing unless
+        the store is thread-safe.
+
+        :param products: Iterable of products to lock (Iterable[Product]).
+        """
+        if not self.thread_safe:
+            yield
+            return
+
+        with self._index_lock:
+            locks = sorted(
+                ((self._seq(product), self._lock_of(product))
+                 for product in set(products) if product in self),
+                key = itemgetter(0)
+            )
+        acquired = []
+        metrics = self.metrics
+        try:
+            if metrics is not None:
+                start = time.perf_counter()
+            for _, lock in locks:
+                lock.acquire()
+                acquired.append(lock)
+            if metrics is not None:
+                metrics.record_lock_wait(time.perf_counter() - start)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def _seq(self, product) -> int:
+        """
+        Gets the position of a product in the store's order, which orders
+        lock acquisition, rankings and search results.
+
+        :param product: A product in the store (Product).
+        :return: Its sequence number (int).
+        """
+        return self._products[product]
+
+    def _lock_of(self, product):
+        """
+        Gets the lock of a product in a thread-safe store. The caller must
+        hold the index lock.
+
+        :param product: A product in the store (Product).
+        :return: The product's lock (threading.Lock).
+        """
+        return self._product_locks[product]
+
+    # Function: Track Product Changes
+    def product_changed(self, product, field, old, new):
+        """
+        Updates the running aggregates when a product in the store changes.
+        Called by Product through its listener notifications.
+
+        :param product: The product that changed (Product).
+        :param field: Name of the changed field (str).
+        :param old: Value before the change.
+        :param new: Value after the change.
+        :return: None
+        """
+        with self._index_lock:
+            if field in ("quantity", "active"):
+                self._stock_changed(product, field, old, new)
+                if field == "quantity":
+                    self._push_stock(product)
+                if self.feed is not None:
+                    self.feed.append(field, product, new)
+            elif field == "name" and self._names_indexed:
+                self._unindex_name(product)
+                self._index_name(product)
+
+        if field == "quantity":
+            # Called outside the lock, so callbacks may query the store.
+            # During an order they wait until the order commits.
+            pending = _pending_alerts.get()
+            for threshold, callback in self._low_stock_callbacks:
+                if old > threshold >= new:
+                    if pending is None:
+                        callback(product, new)
+                    else:
+                        pending.append((callback, product, new))
+
+    # Function: Maintain Stock Aggregates
+    def _track_stock(self, product):
+        """
+        Adds a newly stored product to the active set and quantity total.
+
+        :param product: The product added to the store (Product).
+        :return: None
+        """
+        if product.active:
+            self._active_products[product] = None
+            self._total_quantity += product.quantity
+
+    def _untrack_stock(self, product):
+        """
+        Removes a product leaving the store from the stock aggregates.
+
+        :param product: The product removed from the store (Product).
+        :return: None
+        """
+        if product in self._active_products:
+            del self._active_products[product]
+            self._total_quantity -= product.quantity
+
+    def _stock_changed(self, product, field, old, new):
+        """
+        Applies a quantity or active change to the stock aggregates.
+
+        :param product: The product that changed (Product).
+        :param field: Either "quantity" or "active" (str).
+        :param old: Value before the change.
+        :param new: Value after the change.
+        :return: None
+        """
+        if field == "quantity":
+            if product.active:
+                self._total_quantity += new - old
+        elif new:
+            self._active_products[product] = None
+            self._active_order_stale = True
+            self._total_quantity += product.quantity
+        else:
+            del self._active_products[product]
+            self._total_quantity -= product.quantity
+
+    # Function: Maintain Sales and Stock Rankings
+    def _push_stock(self, product):
+        """
+        Records a product's current quantity in the low-stock heap.
+        Products that are not stocked are not ranked.
+
+        :param product: The product that was added or changed (Product).
+        :return: None
+        """
+        if isinstance(product, NonStockedProduct):
+            return
+        heap = self._stock_heap
+        heapq.heappush(heap, (product.quantity, self._products[product],
+                              product))
+        if len(heap) > 2 * len(self._products) + 64:
+            heap[:] = [(stocked.quantity, seq, stocked)
+                       for stocked, seq in self._products.items()
+                       if not isinstance(stocked, NonStockedProduct)]
+            heapq.heapify(heap)
+
+    def _record_sales(self, shopping_list):
+        """
+        Adds the lines of a completed order to the units sold ranking.
+        The caller must hold the index lock.
+
+        :param shopping_list: List of (Product, quantity) tuples.
+        :return: None
+        """
+        units_sold = self._units_sold
+        heap = self._sold_heap
+        for product, quantity in shopping_list:
+            units = units_sold.get(product, 0) + quantity
+            units_sold[product] = units
+            heapq.heappush(heap, (-units, self._seq(product), product))
+        if len(heap) > 2 * len(units_sold) + 64:
+            heap[:] = [(-units, self._seq(product), product)
+                       for product, units in units_sold.items()]
+            heapq.heapify(heap)
+
+    @staticmethod
+    def _pop_current(heap, is_current, stop):
+        """
+        Pops the current entries off the top of a lazily updated heap,
+        discarding outdated ones, and pushes the current ones back.
+
+        :param heap: The heap to read (list[tuple]).
+        :param is_current: Tells whether an entry is up to date (callable).
+        :param stop: Tells whether to stop at an entry, given the number
+                     of entries found so far (callable).
+        :return: The current entries, in heap order (list[tuple]).
+        """
+        found = []
+        seen = set()
+        while heap and not stop(heap[0], len(found)):
+            entry = heapq.heappop(heap)
+            product = entry[2]
+            if product in seen or not is_current(entry):
+                continue
+            seen.add(product)
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(heap, entry)
+        return found
+
+    # Function: Get Top Sellers
+    def top_sellers(self, k):
+        """
+        Gets the products that sold the most units through the store, in
+        O(k log n) plus the outdated entries dropped on the way.
+
+        :param k: Number of products (int).
+        :return: (Product, units sold) tuples, best seller first
+                 (list[tuple]).
+        """
+        units_sold = self._units_sold
+        with self._index_lock:
+            entries = self._pop_current(
+                self._sold_heap,
+                lambda entry: units_sold.get(entry[2]) == -entry[0],
+                lambda entry, found: found >= k
+            )
+        return [(product, -units) for units, _, product in entries]
+
+    # Function: Get Low Stock
+    def low_stock(self, threshold):
+        """
+        Gets the stocked products whose quantity is at most the threshold,
+        including sold-out ones, in O(result log n) plus the outdated
+        entries dropped on the way.
+
+        :param threshold: Largest quantity reported (int).
+        :return: Products ordered by ascending quantity (list[Product]).
+        """
+        products = self._products
+        with self._index_lock:
+            entries = self._pop_current(
+                self._stock_heap,
+                lambda entry: entry[2] in products
+                and products[entry[2]] == entry[1]
+                and entry[2].quantity == entry[0],
+                lambda entry, found: entry[0] > threshold
+            )
+        return [product for _, _, product in entries]
+
+    def add_low_stock_callback(self, threshold, callback):
         """
-        self.products.remove(product)
+        Registers a function called when a product's quantity drops from
+        above the threshold to at most the threshold. For orders it is
+        called once the order has succeeded, never for rolled-back lines.
+
+        :param threshold: The low-stock line (int).
+        :param callback: Called as callback(product, quantity) (callable).
+        :return: None
+        """
+        self._low_stock_callbacks.append((threshold, callback))
+
+    # Function: Maintain Name Index
+    def _index_name(self, product):
+        """
+        Adds a product to the exact-match and n-gram name indexes.
+
+        :param product: The product to index (Product).
+        :return: None
+        """
+        folded = product.name.casefold()
+        self._folded_names[product] = folded
+        self._exact_names.setdefault(folded, []).append(product)
+        for gram in _ngrams(folded):
+            self._name_grams.setdefault(gram, set()).add(product)
+
+    def _unindex_name(self, product):
+        """
+        Removes a product from the exact-match and n-gram name indexes.
+
+        :param product: The product to remove from the index (Product).
+        :return: None
+        """
+        folded = self._folded_names.pop(product)
+        same_name = self._exact_names[folded]
+        same_name.remove(product)
+        if not same_name:
+            del self._exact_names[folded]
+        for gram in _ngrams(folded):
+            products_with_gram = self._name_grams[gram]
+            products_with_gram.discard(product)
+            if not products_with_gram:
+                del self._name_grams[gram]
+
+    # Function: Search Products by Name
+    def search(self, query, limit=None):
+        """
+        Searches the store for products whose name contains the query,
+        ignoring case. Inactive products are included.
+
+        Exact name matches come first, followed by partial matches, each
+        in the order the products were added to the store. Queries of at
+        least NGRAM_SIZE characters are answered from the n-gram index, so
+        only products sharing all of the query's n-grams are compared.
+
+        :param query: Text to search for (str).
+        :param limit: Maximum number of results, or None for all (int).
+        :return: List of matching products (list[Product]).
+        """
+        folded_query = query.casefold()
+        with self._index_lock:
+            return self._search(folded_query, limit)
+
+    # Function: Find Products by Exact Name
+    def find_exact(self, name):
+        """
+        Gets the products whose name equals the given name, ignoring case,
+        with a single lookup in the exact-match index. Inactive products
+        are included.
+
+        :param name: Product name to look up (str).
+        :return: List of matching products (list[Product]).
+        """
+        folded_name = name.casefold()
+        with self._index_lock:
+            self._build_name_index()
+            return list(self._exact_names.get(folded_name, ()))
+
+    def _build_name_index(self):
+        """
+        Indexes all product names on first use. Deferred from
+        construction, so bulk loads skip the n-grams. The caller must hold
+        the index lock.
+
+        :return: None
+        """
+        if not self._names_indexed:
+            for product in self.products:
+                self._index_name(product)
+            self._names_indexed = True
+
+    def _search(self, folded_query, limit):
+        """
+        Answers a search from the name indexes, see search().
+
+        :param folded_query: Case-folded text to search for (str).
+        :param limit: Maximum number of results, or None for all (int).
+        :return: List of matching products (list[Product]).
+        """
+        self._build_name_index()
+        exact = self._exact_names.get(folded_query, [])
+
+        if len(folded_query) >= NGRAM_SIZE:
+            gram_sets = sorted(
+                (self._name_grams.get(gram, set())
+                 for gram in _ngrams(folded_query)),
+                key = len
+            )
+            candidates = set.intersection(*gram_sets)
+        else:
+            candidates = self._folded_names
+
+        partial = [product for product in candidates
+                   if folded_query in self._folded_names[product]
+                   and self._folded_names[product] != folded_query]
+
+        if limit is None:
+            return exact + sorted(partial, key = self._seq)
+        exact = exact[:limit]
+        return exact + heapq.nsmallest(limit - len(exact), partial,
+                                       key = self._seq)
 
     # Function: Get Total Quantity of Products
     def get_total_quantity(self) -> int:
         """
-        Calculates the total quantity of all active products in the store.
+        Gets the total quantity of all active products in the store.
+        The total is maintained incrementally, so this is O(1).
 
         :return: Total quantity of items in the store (int).
         """
-        total_quantity = 0
-        for product in self.products:
-            if product.active:  # Use 'active' instead of 'is_active()'
-                total_quantity += product.quantity
-        return total_quantity
+        return self._total_quantity
 
     # Function: Get All Active Products
     def get_all_products(self):
         """
         Retrieves all active products in the store.
+        Only active products are visited, inactive ones are never scanned.
+        Products are listed in store order; after a product has been
+        reactivated the active set is re-sorted once.
 
         :return: List of active products (list[Product]).
         """
-        active_products = []
-        for product in self.products:
-            if product.active:
-                active_products.append(product)
-        return active_products
+        with self._index_lock:
+            if self._active_order_stale:
+                self._active_products = dict.fromkeys(
+                    sorted(self._active_products, key = self._products.get)
+                )
+                self._active_order_stale = False
+            return list(self._active_products)
 
     # Function: Process an Order
     def order(self, shopping_list) -> float:
         """
         Processes an order based on a shopping list
         and calculates the total price.
+
+        Orders are all-or-nothing: every line is validated before any
+        stock is touched, and if buying a line still fails, the lines
+        already bought are rolled back from an undo log, so a failed order
+        leaves the store exactly as it was.
         :param shopping_list: A list of tuples where each tuple contains:
                               - A product object (Product).
                               - The quantity to purchase (int).
@@ -69,18 +610,275 @@ class Store:
         :raises ValueError: If a product is inactive or not available
         in the store, or if the requested quantity exceeds stock.
         """
+        shopping_list = list(shopping_list)
+        if self._holds:
+            self.expire_reservations()
+
+        metrics = self.metrics
+        if metrics is None:
+            return self._order(shopping_list)
+
+        start = time.perf_counter()
+        try:
+            total_price = self._order(shopping_list)
+        except ValueError as error:
+            metrics.record_failure(error)
+            raise
+        metrics.record_order(time.perf_counter() - start)
+        return total_price
+
+    def _order(self, shopping_list) -> float:
+        """
+        Places an order under the locks of its products and logs it.
+
+        :param shopping_list: List of (Product, quantity) tuples.
+        :return: Total price of the order (float).
+        :raises ValueError: If the order is rejected.
+        """
+        with self.locked(product for product, _ in shopping_list), \
+                cart_context(_cart_total(shopping_list)):
+            total_price, _ = self._apply_order(shopping_list)
+            if self.wal is not None:
+                self.wal.log_order(product for product, _ in shopping_list)
+
+        return total_price
+
+    # Function: Quote an Order
+    def quote(self, shopping_list) -> float:
+        """
+        Calculates the total price of a shopping list without buying
+        anything, e.g. to show cart totals. Lines are priced like in
+        order() but stock levels and purchase limits are not checked.
+
+        :param shopping_list: A list of (Product, quantity) tuples.
+        :return: Total price of the shopping list (float).
+        :raises ValueError: If a product is inactive or not available
+        in the store, or if a quantity is not greater than zero.
+        """
+        shopping_list = list(shopping_list)
+        self._validate_order(shopping_list)
+
         total_price = 0.0
+        with cart_context(_cart_total(shopping_list)):
+            for product, quantity in shopping_list:
+                total_price += product.quote(quantity)
+        return total_price
 
-        for product, quantity in shopping_list:
-            if not product.active:
-                raise ValueError(f"The product {product.name} "
-                                 f"is inactive and cannot be ordered.")
+    # Function: Fulfil an Order
+    def fulfil(self, shopping_list):
+        """
+        Places an order like order() and reports which locations each line
+        ships from. Lines of products without locations get an empty split.
 
-            if product not in self.products:
-                raise ValueError(f"The product {product.name} "
-                                 f"is not available in the store.")
+        :param shopping_list: A list of (Product, quantity) tuples.
+        :return: The total price and a list of (Product, [(Warehouse,
+                 quantity), ...]) per line (tuple[float, list]).
+        :raises ValueError: If the order is rejected, see order().
+        """
+        shopping_list = list(shopping_list)
+        if self._holds:
+            self.expire_reservations()
+
+        allocations = []
+        with self.locked(product for product, _ in shopping_list), \
+                cart_context(_cart_total(shopping_list)):
+            total_price, _ = self._apply_order(shopping_list, allocations)
+            if self.wal is not None:
+                self.wal.log_order(product for product, _ in shopping_list)
+
+        return total_price, allocations
+
+    # Function: Reserve Stock
+    def reserve(self, shopping_list, ttl) -> Reservation:
+        """
+        Holds stock for a shopping list, so it cannot be sold to anyone
+        else until the reservation is checked out, released or expires.
+        Reservations are all-or-nothing like orders.
+
+        :param shopping_list: A list of (Product, quantity) tuples.
+        :param ttl: Seconds until the hold expires (float).
+        :return: The reservation (Reservation).
+        :raises ValueError: If ttl is not positive, a product is inactive
+        or not available in the store, or a quantity exceeds the stock
+        that is still available.
+        """
+        if ttl <= 0:
+            raise ValueError("Reservation TTL must be greater than zero.")
+        shopping_list = tuple(shopping_list)
+        if self._holds:
+            self.expire_reservations()
+
+        with self.locked(product for product, _ in shopping_list):
+            self._validate_order(shopping_list)
+            held = []
+            try:
+                for product, quantity in shopping_list:
+                    product.reserve(quantity)
+                    held.append((product, quantity))
+            except Exception:
+                for product, quantity in reversed(held):
+                    product.release(quantity)
+                raise
+
+        reservation = Reservation(shopping_list, time.monotonic() + ttl)
+        with self._index_lock:
+            heapq.heappush(self._holds, (reservation.expires_at,
+                                         self._next_hold, reservation))
+            self._next_hold += 1
+        return reservation
+
+    def release(self, reservation) -> bool:
+        """
+        Returns the stock held by a reservation. Its heap entry is
+        dropped lazily when it comes due.
+
+        :param reservation: The reservation to release (Reservation).
+        :return: True if stock was released, False if the reservation was
+                 no longer active (bool).
+        """
+        with self.locked(product for product, _ in reservation.lines):
+            if not reservation.active:
+                return False
+            reservation.active = False
+            for product, quantity in reservation.lines:
+                product.release(quantity)
+        return True
+
+    def checkout(self, reservation) -> float:
+        """
+        Buys the stock held by a reservation.
+
+        :param reservation: The reservation to check out (Reservation).
+        :return: Total price of the order (float).
+        :raises ValueError: If the reservation has expired or was released,
+        or if the order fails, in which case the hold is kept.
+        """
+        if self._holds:
+            self.expire_reservations()
+        lines = reservation.lines
 
-            # Propagate exceptions from Product.buy
-            total_price += product.buy(quantity)
+        with self.locked(product for product, _ in lines), \
+                cart_context(_cart_total(lines)):
+            if not reservation.active:
+                raise ValueError("The reservation has expired "
+                                 "or was released.")
+            for product, quantity in lines:
+                product.release(quantity)
+            try:
+                total_price, _ = self._apply_order(lines)
+            except Exception:
+                # Restore the holds as they were, without validating again
+                for product, quantity in lines:
+                    product._hold(quantity)
+                raise
+            reservation.active = False
+            if self.wal is not None:
+                self.wal.log_order(product for product, _ in lines)
 
         return total_price
+
+    def expire_reservations(self, now=None) -> int:
+        """
+        Releases every reservation whose TTL has passed. Called by
+        order(), reserve() and checkout(); each hold is popped from the
+        heap at most once.
+
+        :param now: time.monotonic() value to expire against, defaults to
+                    the current time (float).
+        :return: Number of reservations released (int).
+        """
+        if now is None:
+            now = time.monotonic()
+        due = []
+        with self._index_lock:
+            while self._holds and self._holds[0][0] <= now:
+                due.append(heapq.heappop(self._holds)[2])
+        return sum(self.release(reservation) for reservation in due)
+
+    def _validate_order(self, shopping_list):
+        """
+        Checks that every product of an order is active and in the store.
+
+        :param shopping_list: List of (Product, quantity) tuples.
+        :return: None
+        :raises PurchaseError: If a product is inactive or not in the store.
+        """
+        for product, _ in shopping_list:
+            if not product.active:
+                raise PurchaseError(f"The product {product.name} "
+                                    f"is inactive and cannot be ordered.",
+                                    "inactive")
+
+            if product not in self:
+                raise PurchaseError(f"The product {product.name} "
+                                    f"is not available in the store.",
+                                    "not_in_store")
+
+    def _apply_order(self, shopping_list, allocations=None):
+        """
+        Validates and buys all lines of an order, rolling back on failure.
+        The caller must hold the locks of the ordered products.
+
+        :param shopping_list: List of (Product, quantity) tuples.
+        :param allocations: List to append each line's (Product, split
+                            across locations) to, or None (list).
+        :return: The total price and the undo log of the applied lines
+                 (tuple[float, list]).
+        :raises ValueError: If any line cannot be bought. No stock has been
+                            changed and no low-stock callback has been
+                            called when this is raised.
+        """
+        self._validate_order(shopping_list)
+
+        total_price = 0.0
+        undo_log = []
+        metrics = self.metrics
+        on_priced = metrics.record_pricing if metrics is not None else None
+        history = self.history
+        line_prices = []
+        alerts = []
+        token = _pending_alerts.set(alerts)
+        try:
+            for product, quantity in shopping_list:
+                old_quantity, active = product.quantity, product.active
+                # Propagate exceptions from Product.buy_allocated
+                line_price, split = product.buy_allocated(quantity, on_priced)
+                if allocations is not None:
+                    allocations.append((product, split))
+                total_price += line_price
+                if history is not None:
+                    line_prices.append(line_price)
+                undo_log.append((product, old_quantity, active, split))
+        except Exception:
+            _pending_alerts.reset(token)
+            self._rollback(undo_log)
+            raise
+        _pending_alerts.reset(token)
+
+        with self._index_lock:
+            self._record_sales(shopping_list)
+        if history is not None:
+            history.record_order(
+                (product, quantity, line_price) for (product, quantity),
+                line_price in zip(shopping_list, line_prices)
+            )
+        for callback, product, quantity in alerts:
+            callback(product, quantity)
+
+        return total_price, undo_log
+
+    @staticmethod
+    def _rollback(undo_log):
+        """
+        Restores the stock recorded in an undo log, newest entry first.
+
+        :param undo_log: List of (Product, quantity, active, split) tuples:
+                         the stock before each line was bought and the
+                         split across locations it took.
+        :return: None
+        """
+        for product, quantity, active, split in reversed(undo_log):
+            if split:
+                product.return_stock(split)
+            product.quantity = quantity
+            product.active = active
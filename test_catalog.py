@@ -0,0 +1,184 @@
+import pickle
+
+import pytest
+
+import catalog
+import main
+from catalog import ColumnarCatalog, ColumnarStore
+from products import (
+    Product,
+    NonStockedProduct,
+    LimitedProduct,
+    SecondHalfPrice
+)
+
+
+@pytest.fixture(params = [True, False], ids = ["numpy", "pure-python"])
+def columnar_store(request, monkeypatch):
+    """
+    Builds a columnar store with one product of each kind, with and
+    without NumPy.
+    """
+    if request.param and catalog._numpy() is None:
+        pytest.skip("NumPy is not installed")
+    if not request.param:
+        # Mark NumPy as imported, or _numpy() would import it again
+        monkeypatch.setattr(catalog, "_numpy_imported", True)
+        monkeypatch.setattr(catalog, "np", None)
+
+    macbook = Product("MacBook Air M2", price = 1450, quantity = 100)
+    macbook.set_promotion(SecondHalfPrice("Second Half price!"))
+    product_list = [
+        macbook,
+        Product("Google Pixel 7", price = 500, quantity = 250),
+        NonStockedProduct("Windows License", price = 125),
+        LimitedProduct("Shipping", price = 10, quantity = 250, maximum = 1),
+    ]
+    return ColumnarStore(ColumnarCatalog.from_products(product_list))
+
+
+# Test that catalog views behave like the products they copy
+def test_views_behave_like_products(columnar_store):
+    """
+    Test that views expose the product attributes and enforce the same
+    rules as the regular product classes.
+
+    Input: None
+    Output: None (Asserts attributes, pricing and validation of views)
+    """
+    macbook, pixel, license_key, shipping = columnar_store.products
+
+    assert isinstance(license_key, NonStockedProduct)
+    assert isinstance(shipping, LimitedProduct)
+    assert macbook.name == "MacBook Air M2"
+    assert macbook.promotion.name == "Second Half price!"
+    assert shipping.maximum == 1
+    assert "Promotion: Second Half price!" in macbook.show()
+
+    assert macbook.buy(2) == 1450 * 1.5
+    assert macbook.quantity == 98
+
+    with pytest.raises(ValueError, match = "cannot buy more than 1"):
+        shipping.buy(2)
+    with pytest.raises(ValueError):
+        license_key.quantity = 1
+    with pytest.raises(ValueError, match = "Quantity cannot be negative."):
+        pixel.quantity = -1
+
+
+# Test that pickled views become standalone products
+def test_pickled_view_is_standalone_product(columnar_store):
+    """
+    Test that pickling a view yields a regular product of the same kind
+    with the row's values, without the catalog.
+
+    Input: None
+    Output: None (Asserts the classes and values of the copies)
+    """
+    macbook, _, license_key, shipping = columnar_store.products
+    shipping.reserve(1)
+
+    copies = [pickle.loads(pickle.dumps(view))
+              for view in (macbook, license_key, shipping)]
+
+    assert [type(product) for product in copies] == [
+        Product, NonStockedProduct, LimitedProduct
+    ]
+    assert copies[0].show() == macbook.show()
+    assert copies[2].maximum == 1 and copies[2].reserved == 0
+    copies[0].buy(1)
+    assert macbook.quantity == 100
+
+
+# Test that the vectorized aggregates follow stock changes
+def test_columnar_aggregates(columnar_store):
+    """
+    Test get_total_quantity and get_all_products after orders, removals
+    and deactivation.
+
+    Input: None
+    Output: None (Asserts aggregates computed from the columns)
+    """
+    macbook, pixel, license_key, shipping = columnar_store.products
+    assert columnar_store.get_total_quantity() == 600
+
+    columnar_store.order([(pixel, 250), (shipping, 1)])
+    assert pixel.active is False
+    assert columnar_store.get_total_quantity() == 349
+    assert columnar_store.get_all_products() == [macbook, license_key,
+                                                 shipping]
+
+    columnar_store.remove_product(macbook)
+    assert columnar_store.get_total_quantity() == 249
+    assert columnar_store.get_all_products() == [license_key, shipping]
+
+    new_row = columnar_store.catalog.append("Pixel Case", price = 20,
+                                            quantity = 40)
+    columnar_store.add_product(columnar_store.catalog[new_row])
+    assert columnar_store.get_total_quantity() == 289
+
+
+# Test that the store only accepts rows of its own catalog
+def test_columnar_store_rejects_foreign_products(columnar_store):
+    """
+    Test that adding a plain product to a columnar store raises an error.
+
+    Input: None
+    Output: None (Asserts ValueError is raised)
+    """
+    with pytest.raises(ValueError, match = "does not belong"):
+        columnar_store.add_product(Product("Tablet", price = 300,
+                                           quantity = 2))
+
+
+# Test that main's helpers work on a columnar store
+def test_main_helpers_with_columnar_store(columnar_store, capsys):
+    """
+    Test find_product_by_name and show_total_amount on a columnar store.
+
+    Input: None
+    Output: None (Asserts the helpers find products and print totals)
+    """
+    product = main.find_product_by_name(columnar_store, "google pixel 7")
+    assert product is columnar_store.products[1]
+
+    main.show_total_amount(columnar_store)
+    assert "600" in capsys.readouterr().out
+
+
+# Test that a columnar store keeps no objects per product
+def test_columnar_store_is_lazy(columnar_store):
+    """
+    Test that opening a store creates no views and that membership,
+    exact lookups, low stock and removals work from the columns.
+
+    Input: None
+    Output: None (Asserts the created views and query results)
+    """
+    columnar_catalog = columnar_store.catalog
+    store_obj = ColumnarStore(ColumnarCatalog.from_products(
+        columnar_store.products
+    ), thread_safe = True)
+    rows = store_obj.catalog
+    assert len(store_obj) == 4
+    assert not rows._views
+
+    shipping = rows[3]
+    assert shipping in store_obj
+    assert columnar_catalog[3] not in store_obj
+    assert store_obj.find_exact("SHIPPING") == [shipping]
+    assert len(rows._views) == 1
+
+    pixel = rows[1]
+    store_obj.order([(pixel, 245), (shipping, 1)])
+    assert store_obj.low_stock(5) == [rows[1]]
+    assert store_obj.low_stock(250) == [rows[1], rows[0], rows[3]]
+
+    pixel.name = "Pixel 7"
+    assert store_obj.find_exact("google pixel 7") == []
+    assert store_obj.find_exact("pixel 7") == [pixel]
+    store_obj.remove_product(pixel)
+    assert pixel not in store_obj
+    assert len(store_obj) == 3
+    assert store_obj.find_exact("pixel 7") == []
+    assert store_obj.low_stock(5) == []
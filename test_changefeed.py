@@ -0,0 +1,79 @@
+import pytest
+
+from changefeed import ChangeFeed, QUANTITY, ACTIVE, ADDED, REMOVED
+from products import Product
+from store import Store
+
+
+# Test that store changes reach a cursor
+def test_cursor_receives_store_changes():
+    """
+    Test that orders, deactivations, additions and removals are published.
+
+    Input: None
+    Output: None (Asserts the polled events)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    mouse = Product(name = "Mouse", price = 20, quantity = 3)
+    best_buy = Store([laptop])
+    best_buy.feed = ChangeFeed()
+    cursor = best_buy.feed.subscribe()
+
+    best_buy.order([(laptop, 2)])
+    best_buy.add_product(mouse)
+    mouse.quantity = 0
+    best_buy.remove_product(laptop)
+
+    events = [(kind, product, value) for _, kind, product, value
+              in cursor.poll()]
+    assert events == [
+        (QUANTITY, laptop, 3),
+        (ADDED, mouse, (3, True)),
+        (QUANTITY, mouse, 0),
+        (ACTIVE, mouse, False),
+        (REMOVED, laptop, None)
+    ]
+    assert cursor.poll() == []
+
+
+# Test that a replica stays in sync incrementally
+def test_replica_sync_with_limit():
+    """
+    Test that polling in batches yields consecutive sequence numbers.
+
+    Input: None
+    Output: None (Asserts batch sizes and sequence numbers)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    best_buy = Store([laptop])
+    best_buy.feed = ChangeFeed()
+    cursor = best_buy.feed.subscribe()
+    for _ in range(5):
+        best_buy.order([(laptop, 1)])
+
+    first = cursor.poll(limit = 3)
+    second = cursor.poll(limit = 3)
+    assert [event[0] for event in first + second] == [0, 1, 2, 3, 4]
+    assert second[-1][3] == 95
+    assert cursor.pending == 0
+
+
+# Test that an overrun cursor must resync
+def test_overrun_cursor_raises():
+    """
+    Test that reading events that were overwritten raises an error.
+
+    Input: None
+    Output: None (Asserts ValueError and the oldest sequence number)
+    """
+    feed = ChangeFeed(capacity = 2)
+    cursor = feed.subscribe()
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    for quantity in (3, 2, 1):
+        feed.append(QUANTITY, laptop, quantity)
+
+    assert feed.oldest == 1
+    with pytest.raises(ValueError):
+        cursor.poll()
+    assert [event[3] for event in feed.subscribe(from_start = True).poll()] \
+        == [2, 1]
@@ -0,0 +1,107 @@
+import pytest
+
+from history import OrderHistory, read_segment
+from products import Product, PercentDiscount
+from store import Store
+
+
+# Test that orders are recorded with rollups
+def test_orders_update_rollups():
+    """
+    Test that order lines land in the history and in per-promotion
+    minute and hour buckets.
+
+    Input: None
+    Output: None (Asserts line count and bucket totals)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    laptop.set_promotion(PercentDiscount("10% Off", percent = 10))
+    mouse = Product(name = "Mouse", price = 20, quantity = 10)
+    best_buy = Store([laptop, mouse])
+    best_buy.history = OrderHistory()
+
+    best_buy.order([(laptop, 2), (mouse, 1)])
+    best_buy.order([(laptop, 1)])
+    with pytest.raises(ValueError):
+        best_buy.order([(mouse, 100)])
+
+    assert len(best_buy.history) == 3
+    hourly = {promotion: (revenue, units, discount)
+              for _, promotion, revenue, units, discount
+              in best_buy.history.rollup("hour")}
+    assert hourly["10% Off"] == pytest.approx((2700, 3, 300))
+    assert hourly["none"] == pytest.approx((20, 1, 0))
+
+
+# Test bucket boundaries
+def test_rollup_buckets_by_time():
+    """
+    Test that lines are bucketed by minute and filtered by time range.
+
+    Input: None
+    Output: None (Asserts the minute buckets)
+    """
+    mouse = Product(name = "Mouse", price = 20, quantity = 10)
+    history = OrderHistory()
+    history.record_order([(mouse, 1, 20.0)], timestamp = 120.5)
+    history.record_order([(mouse, 2, 40.0)], timestamp = 150.0)
+    history.record_order([(mouse, 1, 20.0)], timestamp = 185.0)
+
+    assert history.rollup("minute") == [(120.0, "none", 60.0, 3, 0.0),
+                                         (180.0, "none", 20.0, 1, 0.0)]
+    assert history.rollup("minute", start = 180) == \
+        [(180.0, "none", 20.0, 1, 0.0)]
+    with pytest.raises(ValueError):
+        history.rollup("week")
+
+
+# Test compaction of old segments
+def test_old_segments_are_compacted(tmp_path):
+    """
+    Test that sealed segments beyond the retention limit are written to
+    disk and can be read back.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts the compacted segment content)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    mouse = Product(name = "Mouse", price = 20, quantity = 100)
+    history = OrderHistory(str(tmp_path), segment_rows = 2,
+                           retain_segments = 1)
+    for timestamp in range(5):
+        history.record_order([(mouse if timestamp % 2 else laptop, 1,
+                               float(timestamp))], timestamp = timestamp)
+
+    assert len(history.compacted) == 1
+    assert len(history) == 3
+    segment = read_segment(history.compacted[0])
+    assert segment["products"] == ["Laptop", "Mouse"]
+    assert list(segment["product_ids"]) == [0, 1]
+    assert list(segment["charged"]) == [0.0, 1.0]
+    assert list(segment["list_prices"]) == [1000.0, 20.0]
+
+
+# Test that a restarted history keeps earlier segments
+def test_restart_does_not_overwrite_segments(tmp_path):
+    """
+    Test that a new history on the same directory numbers its segments
+    after the existing ones instead of overwriting them.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts both runs' segments are kept)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    mouse = Product(name = "Mouse", price = 20, quantity = 100)
+    for product in (laptop, mouse):
+        history = OrderHistory(str(tmp_path), segment_rows = 1,
+                               retain_segments = 0)
+        history.record_order([(product, 1, 5.0)], timestamp = 0)
+        history.record_order([(product, 1, 5.0)], timestamp = 1)
+
+    paths = sorted(tmp_path.glob("segment-*.bin"))
+    assert [path.name for path in paths] == [
+        f"segment-{number:06d}.bin" for number in range(4)
+    ]
+    assert [read_segment(str(path))["products"] for path in paths] == [
+        ["Laptop"], ["Laptop"], ["Mouse"], ["Mouse"]
+    ]
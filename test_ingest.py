@@ -0,0 +1,95 @@
+import io
+import json
+
+import main
+from ingest import ingest, read_orders
+
+
+# Test streaming ingestion of an order log
+def test_ingest_orders():
+    """
+    Test that every record produces one result line, with successful
+    orders applied to the store and failures reported.
+
+    Input: None
+    Output: None (Asserts the result lines and the resulting stock)
+    """
+    best_buy = main.build_default_store()
+    order_log = io.StringIO("\n".join([
+        json.dumps({"order_id": "A-1", "items": [
+            {"name": "Google Pixel 7", "quantity": 2},
+            {"name": "shipping", "quantity": 1},
+        ]}),
+        "",
+        json.dumps({"order_id": "A-2", "items": [
+            {"name": "Google Pixel 7", "quantity": 1},
+            {"name": "iPhone", "quantity": 1},
+        ]}),
+        "{not json",
+        json.dumps({"order_id": "A-3"}),
+        json.dumps({"items": [{"name": "Google Pixel 7",
+                               "quantity": 1000}]}),
+    ]) + "\n")
+    results_file = io.StringIO()
+
+    stats = ingest(best_buy, order_log, results_file)
+
+    results = [json.loads(line)
+               for line in results_file.getvalue().splitlines()]
+    assert results[0] == {"order_id": "A-1", "ok": True, "total": 1010.0}
+    assert results[1] == {"order_id": "A-2", "ok": False,
+                          "error": "Product 'iPhone' not found."}
+    assert results[2]["order_id"] == 4
+    assert results[2]["error"].startswith("Invalid JSON")
+    assert results[3] == {"order_id": "A-3", "ok": False,
+                          "error": "Missing field 'items'."}
+    assert results[4]["order_id"] == 6
+    assert "Not enough stock" in results[4]["error"]
+    assert stats["orders"] == 5
+    assert stats["failed"] == 4
+    assert best_buy.products[2].quantity == 248
+
+
+# Test that records which are not JSON objects are reported
+def test_ingest_rejects_non_object_records():
+    """
+    Test that a valid JSON line that is not an object fails its record
+    without stopping the ingestion.
+
+    Input: None
+    Output: None (Asserts the result lines)
+    """
+    best_buy = main.build_default_store()
+    order_log = io.StringIO("[1, 2]\n" + json.dumps({"items": [
+        {"name": "shipping", "quantity": 1}
+    ]}) + "\n")
+    results_file = io.StringIO()
+
+    stats = ingest(best_buy, order_log, results_file)
+
+    results = [json.loads(line)
+               for line in results_file.getvalue().splitlines()]
+    assert results[0] == {"order_id": 1, "ok": False,
+                          "error": "Order record must be a JSON object."}
+    assert results[1] == {"order_id": 2, "ok": True, "total": 10.0}
+    assert stats["failed"] == 1
+
+
+# Test that records are read lazily
+def test_read_orders_is_lazy():
+    """
+    Test that read_orders only consumes input as records are requested.
+
+    Input: None
+    Output: None (Asserts the generator reads one line per record)
+    """
+    consumed = []
+
+    def lines():
+        for number in range(1_000_000):
+            consumed.append(number)
+            yield json.dumps({"order_id": number, "items": []})
+
+    records = read_orders(lines())
+    assert next(records) == (1, {"order_id": 0, "items": []})
+    assert consumed == [0]
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from loader import load_catalog, load_store
+from products import LimitedProduct, NonStockedProduct, PercentDiscount
+
+CSV_HEADER = "kind,name,price,quantity,maximum,promotion,promotion_name,percent\n"
+
+
+# Test loading a CSV catalog
+def test_load_csv_catalog(tmp_path):
+    """
+    Test that CSV records become products with interned promotions.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts product kinds, fields and shared promotions)
+    """
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV_HEADER
+                    + "product,Laptop,1000,10,,PercentDiscount,Sale,10\n"
+                    + "product,Phone,500,5,,PercentDiscount,Sale,10\n"
+                    + "non_stocked,License,125,,,,,\n"
+                    + "limited,Shipping,10,250,1,,,\n",
+                    encoding = "utf-8")
+
+    best_buy, stats = load_store(str(path), workers = 1)
+    laptop, phone, license_key, shipping = best_buy.products
+
+    assert stats["rows"] == 4
+    assert laptop.name == "Laptop" and laptop.quantity == 10
+    assert isinstance(laptop.promotion, PercentDiscount)
+    assert laptop.promotion is phone.promotion
+    assert isinstance(license_key, NonStockedProduct)
+    assert isinstance(shipping, LimitedProduct) and shipping.maximum == 1
+    assert best_buy.order([(laptop, 1)]) == pytest.approx(900)
+    assert shipping.show() == ("Shipping (Limited, Max: 1), Price: 10, "
+                               "Quantity: 250")
+    assert license_key.show() == "License (Non-Stocked), Price: 125"
+    assert type(license_key.price) is float  # the column's type is kept
+
+
+# Test loading JSON Lines in a process pool
+def test_load_jsonl_with_workers(tmp_path):
+    """
+    Test that parsing chunks in worker processes keeps the file order.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts names and quantities in order)
+    """
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("".join(
+        json.dumps({"kind": "product", "name": f"Product {i}",
+                    "price": 1.5, "quantity": i}) + "\n"
+        for i in range(100)
+    ), encoding = "utf-8")
+
+    catalog, stats = load_catalog(str(path), workers = 2, chunk_size = 7)
+
+    assert stats["rows"] == 100
+    assert [catalog[i].name for i in (0, 50, 99)] == \
+        ["Product 0", "Product 50", "Product 99"]
+    assert list(catalog.quantities) == list(range(100))
+
+
+# Test that invalid records name their line
+def test_invalid_record_reports_line(tmp_path):
+    """
+    Test that a negative price is rejected with its line number.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts the ValueError message)
+    """
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV_HEADER + "product,Laptop,1000,10,,,,\n"
+                    + "product,Phone,-5,5,,,,\n", encoding = "utf-8")
+
+    with pytest.raises(ValueError, match = "Line 3"):
+        load_catalog(str(path), workers = 1)
+
+
+# Test that invalid promotions name their line
+@pytest.mark.parametrize("promotion, message", [
+    ("Bogus,Sale,", "Line 3: Unknown promotion 'Bogus'"),
+    ("PercentDiscount,Sale,", "Line 3: PercentDiscount needs a percent"),
+    ("PercentDiscount,Sale,150", "Line 3: Percent must be between"),
+])
+def test_invalid_promotion_reports_line(tmp_path, promotion, message):
+    """
+    Test that unknown promotion types and missing or invalid percents are
+    rejected with their line number.
+
+    Input: tmp_path (pytest fixture), the promotion fields and the
+           expected message (str)
+    Output: None (Asserts the ValueError message)
+    """
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV_HEADER + "product,Laptop,1000,10,,,,\n"
+                    + f"product,Phone,500,5,,{promotion}\n",
+                    encoding = "utf-8")
+
+    with pytest.raises(ValueError, match = message):
+        load_catalog(str(path), workers = 1)
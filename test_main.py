@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import products
@@ -58,6 +60,59 @@ class TestMain(unittest.TestCase):
         self.assertIsNotNone(product)
         self.assertEqual(product.name, "Google Pixel 7")
 
+    @patch('builtins.print')
+    def test_find_product_by_name_partial_match(self, mock_print):
+        """Test that partial matches are printed when there is no exact match."""
+        product = main.find_product_by_name(self.store, "pixel")
+        self.assertIsNone(product)
+        printed_output = "".join(call[0][0] for call in mock_print.call_args_list)
+        self.assertIn("Google Pixel 7", printed_output)
+
+    @patch('builtins.print')
+    def test_find_product_by_name_skips_inactive(self, mock_print):
+        """Test that an inactive exact match is not returned."""
+        self.product_list[2].deactivate()
+        product = main.find_product_by_name(self.store, "google pixel 7")
+        self.assertIsNone(product)
+
+
+    @patch('builtins.print')
+    def test_cli_total(self, mock_print):
+        """Test that the total subcommand prints the default store total."""
+        self.assertEqual(main.main(["total"]), 0)
+        mock_print.assert_called_once_with(1100)
+
+    @patch('builtins.print')
+    def test_cli_order_from_file(self, mock_print):
+        """Test that the order subcommand orders the items of a file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "order.txt")
+            with open(path, "w", encoding = "utf-8") as order_file:
+                order_file.write("# pixels and shipping\n"
+                                 "Google Pixel 7,2\nshipping,1\n")
+            self.assertEqual(main.main(["order", path]), 0)
+        mock_print.assert_called_once_with("1010.00")
+
+    @patch('builtins.print')
+    def test_cli_catalog_before_or_after_command(self, mock_print):
+        """Test that --catalog is accepted on either side of the command."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "catalog.csv")
+            with open(path, "w", encoding = "utf-8") as catalog_file:
+                catalog_file.write("kind,name,price,quantity,maximum,"
+                                   "promotion,promotion_name,percent\n"
+                                   "product,Cable,12,7,,,,\n")
+            self.assertEqual(main.main(["total", "--catalog", path]), 0)
+            self.assertEqual(main.main(["--catalog", path, "total"]), 0)
+            self.assertEqual(main.main(["total"]), 0)
+        self.assertEqual([call.args for call in mock_print.call_args_list],
+                         [(7,), (7,), (1100,)])
+
+    def test_read_order_file_rejects_bad_line(self):
+        """Test that a line without a quantity is rejected."""
+        with self.assertRaises(ValueError):
+            main.read_order_file(["Google Pixel 7"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,127 @@
+import pytest
+
+from metrics import Metrics
+from products import (
+    LimitedProduct,
+    PercentDiscount,
+    Product,
+    PurchaseError
+)
+from store import Store
+
+
+# Test that orders and failures are recorded
+def test_orders_and_failure_reasons_are_recorded():
+    """
+    Test that a store with metrics counts successful orders and classifies
+    rejected ones.
+
+    Input: None
+    Output: None (Asserts the snapshot counters)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 2)
+    laptop.set_promotion(PercentDiscount("10% Off", percent = 10))
+    pins = LimitedProduct(name = "Pins", price = 5, quantity = 10,
+                          maximum = 1)
+    stranger = Product(name = "Phone", price = 500, quantity = 5)
+    best_buy = Store([laptop, pins], thread_safe = True)
+    best_buy.metrics = Metrics()
+
+    best_buy.order([(laptop, 1), (pins, 1)])
+    for shopping_list in ([(laptop, 5)], [(pins, 2)], [(stranger, 1)]):
+        with pytest.raises(ValueError):
+            best_buy.order(shopping_list)
+    laptop.deactivate()
+    with pytest.raises(ValueError):
+        best_buy.order([(laptop, 1)])
+
+    snapshot = best_buy.metrics.snapshot()
+    assert snapshot["order_latency"]["count"] == 1
+    assert snapshot["order_failures"] == {"inactive": 1, "not_in_store": 1,
+                                          "limit": 1, "stock": 1,
+                                          "invalid": 0}
+    assert snapshot["promotion_lines"]["10% Off"] == 1
+    assert snapshot["promotion_lines"]["none"] == 1
+    assert snapshot["lock_waits"] >= 1
+
+
+# Test that failures are classified by the first failing line
+def test_failure_reason_follows_line_order():
+    """
+    Test that the reason of a rejected order is the one of its first
+    failing line, counting stock taken by earlier lines.
+
+    Input: None
+    Output: None (Asserts the failure counters)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    shipping = LimitedProduct(name = "Shipping", price = 10, quantity = 250,
+                              maximum = 1)
+    best_buy = Store([laptop, shipping])
+    best_buy.metrics = Metrics()
+
+    for shopping_list in ([(laptop, 100), (shipping, 2)],
+                          [(laptop, 3), (laptop, 3)],
+                          [(shipping, 2), (laptop, 100)]):
+        with pytest.raises(ValueError):
+            best_buy.order(shopping_list)
+
+    failures = best_buy.metrics.snapshot()["order_failures"]
+    assert failures["stock"] == 2
+    assert failures["limit"] == 1
+
+
+# Test that each line is priced once and failures carry their reason
+def test_lines_priced_once_and_errors_carry_reason():
+    """
+    Test that timing a line does not price it a second time, and that the
+    error rejecting an order names the reason it is counted under.
+
+    Input: None
+    Output: None (Asserts the pricing calls, the error and the counters)
+    """
+    class CountingDiscount(PercentDiscount):
+        calls = 0
+
+        def apply_promotion(self, product, quantity) -> float:
+            CountingDiscount.calls += 1
+            return super().apply_promotion(product, quantity)
+
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    laptop.set_promotion(CountingDiscount("10% Off", percent = 10))
+    best_buy = Store([laptop], thread_safe = True)
+    best_buy.metrics = Metrics()
+
+    best_buy.order([(laptop, 2)])
+    assert CountingDiscount.calls == 1
+    with pytest.raises(PurchaseError) as error:
+        best_buy.order([(laptop, 1), (laptop, 3)])
+    assert error.value.reason == "stock"
+    assert laptop.quantity == 3
+
+    snapshot = best_buy.metrics.snapshot()
+    assert snapshot["promotion_lines"]["10% Off"] == 2
+    assert snapshot["order_failures"]["stock"] == 1
+
+
+# Test the Prometheus text exporter
+def test_prometheus_textfile(tmp_path):
+    """
+    Test that the exported text contains the histogram and counters.
+
+    Input: tmp_path (pytest fixture)
+    Output: None (Asserts the file content)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 2)
+    best_buy = Store([laptop])
+    best_buy.metrics = Metrics()
+    best_buy.order([(laptop, 1)])
+
+    path = tmp_path / "store.prom"
+    best_buy.metrics.write_textfile(str(path))
+    text = path.read_text(encoding = "utf-8")
+
+    assert "# TYPE store_order_latency_seconds histogram" in text
+    assert 'store_order_latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "store_order_latency_seconds_count 1" in text
+    assert 'store_order_failures_total{reason="stock"} 0' in text
@@ -0,0 +1,106 @@
+import pytest
+
+import pricing
+from products import (
+    Product,
+    PercentDiscount,
+    SecondHalfPrice,
+    ThirdOneFree
+)
+from promotions import PromotionRule, PromotionSet
+
+
+class FlatFee(PercentDiscount):
+    """A promotion without a closed form in the pricing engine."""
+
+    def apply_promotion(self, product, quantity) -> float:
+        return 5.0
+
+
+def make_catalog():
+    """
+    Creates one product per promotion kind.
+
+    :return: List of products (list[Product]).
+    """
+    plain = Product(name = "Monitor", price = 150, quantity = 100)
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    laptop.set_promotion(PercentDiscount(name = "10% Off", percent = 10))
+    macbook = Product(name = "MacBook Air M2", price = 1450, quantity = 100)
+    macbook.set_promotion(SecondHalfPrice("Second Half Price!"))
+    earbuds = Product(name = "Earbuds", price = 250, quantity = 100)
+    earbuds.set_promotion(ThirdOneFree("Third One Free!"))
+    cable = Product(name = "Cable", price = 12, quantity = 100)
+    cable.set_promotion(FlatFee(name = "Flat fee", percent = 0))
+    return [plain, laptop, macbook, earbuds, cable]
+
+
+# Test that bulk pricing matches per-line pricing
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_price_orders_matches_apply_promotion(monkeypatch, use_numpy):
+    """
+    Test that price_orders returns the same totals as pricing every line
+    through Promotion.apply_promotion, and leaves stock untouched.
+
+    Input: None
+    Output: None (Asserts equal totals and unchanged quantities)
+    """
+    if use_numpy and pricing.np is None:
+        pytest.skip("NumPy is not installed")
+    if not use_numpy:
+        monkeypatch.setattr(pricing, "np", None)
+    catalog = make_catalog()
+    shopping_lists = [
+        [(product, quantity) for product in catalog]
+        for quantity in range(1, 8)
+    ] + [[], [(catalog[2], 5), (catalog[3], 9), (catalog[2], 1)]]
+
+    expected = [
+        sum(product.promotion.apply_promotion(product, quantity)
+            if product.promotion else product.price * quantity
+            for product, quantity in shopping_list)
+        for shopping_list in shopping_lists
+    ]
+
+    assert pricing.price_orders(shopping_lists) == pytest.approx(expected)
+    assert all(product.quantity == 100 for product in catalog)
+
+
+# Test that bulk pricing rejects invalid quantities
+def test_price_orders_rejects_non_positive_quantity():
+    """
+    Test that price_orders raises an error for non-positive quantities.
+
+    Input: None
+    Output: None (Asserts ValueError is raised)
+    """
+    catalog = make_catalog()
+    with pytest.raises(
+            ValueError, match = "Quantity to buy must be greater than zero."
+    ):
+        pricing.price_orders([[(catalog[0], 1)], [(catalog[1], 0)]])
+
+
+# Test that bulk pricing applies cart-level promotions
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_price_orders_uses_cart_totals(monkeypatch, use_numpy):
+    """
+    Test that promotion sets see the list-price total of their own cart.
+
+    Input: None
+    Output: None (Asserts the cable is discounted only in the large cart)
+    """
+    if use_numpy and pricing.np is None:
+        pytest.skip("NumPy is not installed")
+    if not use_numpy:
+        monkeypatch.setattr(pricing, "np", None)
+    cable = Product(name = "Cable", price = 100, quantity = 10)
+    cable.set_promotion(PromotionSet("Bundle", [
+        PromotionRule(PercentDiscount("10% Off", percent = 10),
+                      min_cart_total = 500)
+    ]))
+    television = Product(name = "TV", price = 1000, quantity = 10)
+
+    totals = pricing.price_orders([[(cable, 1), (television, 1)],
+                                   [(cable, 1)]])
+    assert totals == pytest.approx([1090, 100])
@@ -4,7 +4,8 @@ from products import (
     Product,
     PercentDiscount,
     SecondHalfPrice,
-    ThirdOneFree
+    ThirdOneFree,
+    price_cache
 )
 
 
@@ -221,5 +222,173 @@ def test_integration_buy_with_promotions():
     assert total_earbuds_price == (250 * 4)
 
 
+# Test: Quotes Are Cached and Do Not Change Stock
+def test_quote_uses_price_cache():
+    """
+    Test that repeated quotes beyond the stock (and so beyond the price
+    curve) are served from the price cache, that products sharing a
+    promotion and price share entries, and that quoting leaves the stock
+    unchanged.
+
+    Inputs:
+        None (test setup includes creating two Products
+        sharing a SecondHalfPrice instance).
+
+    Outputs:
+        Asserts quoted prices, cache statistics and quantities.
+    """
+    price_cache.clear()
+    promo = SecondHalfPrice(name = "Second Half Price")
+    speaker = Product(name = "Speaker", price = 100, quantity = 3)
+    soundbar = Product(name = "Soundbar", price = 100, quantity = 2)
+    speaker.set_promotion(promo)
+    soundbar.set_promotion(promo)
+
+    assert speaker.quote(4) == 300
+    assert speaker.quote(4) == 300
+    assert soundbar.quote(4) == 300
+    assert price_cache.stats()["hits"] == 2
+    assert price_cache.stats()["misses"] == 1
+    assert speaker.quantity == 3  # quoting more than the stock is fine
+
+
+# Test: Cached Quotes Follow Price and Promotion Changes
+def test_quote_cache_invalidation():
+    """
+    Test that changing the price, the promotion or the discount
+    percentage invalidates the cached quotes. Quantities beyond the stock
+    are used so the quotes go through the price cache.
+
+    Inputs:
+        None (test setup includes creating a Product
+        and PercentDiscount instance).
+
+    Outputs:
+        Asserts quotes reflect every change and stale entries are dropped.
+    """
+    price_cache.clear()
+    product = Product(name = "Laptop", price = 1000, quantity = 1)
+    promo = PercentDiscount(name = "10% Off", percent = 10)
+    product.set_promotion(promo)
+    assert product.quote(2) == 1800
+
+    promo.percent = 20
+    assert price_cache.stats()["size"] == 0
+    assert product.quote(2) == 1600
+
+    product.price = 500
+    assert price_cache.stats()["size"] == 0
+    assert product.quote(2) == 800
+
+    product.set_promotion(ThirdOneFree(name = "Buy 2 Get 1 Free"))
+    assert product.quote(3) == 1000
+    assert price_cache.stats()["size"] == 1
+
+
+# Test: Price Curves Match the Promotions
+def test_price_curve_matches_apply_promotion():
+    """
+    Test that every promotion's precomputed price curve matches
+    apply_promotion, and that the curve follows promotion changes.
+
+    Inputs:
+        None (test setup includes creating a Product
+        with each promotion in turn).
+
+    Outputs:
+        Asserts curve prices and quotes for quantities up to the stock.
+    """
+    product = Product(name = "Headphones", price = 299.99, quantity = 25)
+    for promo in (PercentDiscount(name = "15% Off", percent = 15),
+                  SecondHalfPrice(name = "Second Half Price"),
+                  ThirdOneFree(name = "Buy 2 Get 1 Free")):
+        product.set_promotion(promo)
+        curve = product.price_curve(25)
+        assert len(curve) == 26
+        for quantity in range(1, 26):
+            assert curve[quantity] == promo.apply_promotion(product, quantity)
+            assert product.quote(quantity) == curve[quantity]
+
+    percent_promo = PercentDiscount(name = "10% Off", percent = 10)
+    product.set_promotion(percent_promo)
+    assert product.quote(10) == pytest.approx(2699.91)
+    percent_promo.percent = 50
+    assert product.quote(10) == pytest.approx(1499.95)
+    assert product.quantity == 25
+
+
+# Test: Price Curves Grow With the Quantity Quoted
+def test_price_curve_grows_on_demand():
+    """
+    Test that a product with a lot of stock only prices the quantities
+    quoted so far, doubling its curve when a larger one is asked for.
+
+    Inputs:
+        None (test setup includes a Product with 100,000 in stock).
+
+    Outputs:
+        Asserts the curve lengths and the quoted prices.
+    """
+    product = Product(name = "Screws", price = 2, quantity = 100_000)
+    product.set_promotion(PercentDiscount(name = "50% Off", percent = 50))
+    assert product.quote(3) == 3
+    assert len(product.price_curve()) == 17
+    assert product.quote(40) == 40
+    assert len(product.price_curve()) == 41
+    assert product.quote(41) == 41
+    assert len(product.price_curve()) == 81
+    assert product.quote(100_000) == 100_000  # beyond the curve limit
+    assert len(product.price_curve()) == 81
+
+
+# Test: Price Curve of a Promotion Subclass
+def test_price_curve_of_subclass_uses_its_prices():
+    """
+    Test that a subclass overriding apply_promotion is not quoted with
+    its parent's closed-form curve.
+
+    Inputs:
+        None (test setup includes a PercentDiscount subclass charging a
+        flat fee).
+
+    Outputs:
+        Asserts quotes equal the subclass's prices.
+    """
+    class FlatFee(PercentDiscount):
+        def apply_promotion(self, product, quantity) -> float:
+            return 5.0
+
+    product = Product(name = "Cable", price = 12, quantity = 10)
+    product.set_promotion(FlatFee(name = "Flat fee", percent = 0))
+    assert product.quote(3) == 5.0
+    assert product.promotion.price_curve(product, 10)[10] == 5.0
+    assert product.price_curve() is None
+
+
+# Test: Price Cache Keys of a Promotion Subclass
+def test_subclass_does_not_share_cache_entries():
+    """
+    Test that a subclass of PercentDiscount does not reuse cached prices
+    of a real PercentDiscount with the same percentage.
+
+    Inputs:
+        None (test setup includes products with both promotions).
+
+    Outputs:
+        Asserts each product is quoted with its own promotion's price.
+    """
+    class FlatFee(PercentDiscount):
+        def apply_promotion(self, product, quantity) -> float:
+            return 5.0
+
+    regular = Product(name = "Cable", price = 12, quantity = 1)
+    regular.set_promotion(PercentDiscount(name = "No discount", percent = 0))
+    flat = Product(name = "Adapter", price = 12, quantity = 1)
+    flat.set_promotion(FlatFee(name = "Flat fee", percent = 0))
+
+    assert regular.quote(5) == 60.0
+    assert flat.quote(5) == 5.0
+
+
 if __name__ == "__main__":
     pytest.main()
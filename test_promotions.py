@@ -0,0 +1,129 @@
+import pytest
+
+from products import Product, PercentDiscount, SecondHalfPrice, ThirdOneFree
+from promotions import PromotionRule, PromotionSet, cart_context
+from store import Store
+
+
+# Test: Best Exclusive Rule Wins
+def test_best_exclusive_rule_wins():
+    """
+    Test that the cheapest applicable exclusive rule is used.
+
+    Inputs:
+        A set with a 10% discount and "third one free" on 3 items.
+
+    Outputs:
+        Asserts the price of the free third item (2 * 100) is charged.
+    """
+    product = Product(name = "Cable", price = 100, quantity = 10)
+    product.set_promotion(PromotionSet("Sale", [
+        PromotionRule(PercentDiscount("10% Off", percent = 10), priority = 1),
+        PromotionRule(ThirdOneFree("Third One Free!"))
+    ]))
+
+    assert product.buy(3) == pytest.approx(200)
+
+
+# Test: Stackable Rules Combine
+def test_stackable_rules_combine():
+    """
+    Test that stackable rules apply on top of the best exclusive rule.
+
+    Inputs:
+        Second half price plus a stackable 10% discount on 2 items.
+
+    Outputs:
+        Asserts 150 * 0.9 is charged.
+    """
+    product = Product(name = "Cable", price = 100, quantity = 10)
+    product.set_promotion(PromotionSet("Sale", [
+        PromotionRule(SecondHalfPrice("Second Half price!")),
+        PromotionRule(PercentDiscount("Members", percent = 10),
+                      stackable = True)
+    ]))
+
+    assert product.buy(2) == pytest.approx(135)
+
+
+# Test: Time Window
+def test_rule_outside_time_window_is_skipped():
+    """
+    Test that rules only apply inside their time window.
+
+    Inputs:
+        A 50% discount valid from t=100 to t=200, priced at t=50 and t=150.
+
+    Outputs:
+        Asserts list price before the window and half price inside it.
+    """
+    product = Product(name = "Cable", price = 100, quantity = 10)
+    product.set_promotion(PromotionSet("Flash Sale", [
+        PromotionRule(PercentDiscount("Half Off", percent = 50),
+                      starts_at = 100, ends_at = 200)
+    ]))
+
+    with cart_context(100, now = 50):
+        assert product.price_for(1) == pytest.approx(100)
+    with cart_context(100, now = 150):
+        assert product.price_for(1) == pytest.approx(50)
+
+
+# Test: Cart Threshold
+def test_cart_threshold_uses_whole_order():
+    """
+    Test that cart-level thresholds look at the whole order.
+
+    Inputs:
+        A 10% discount on cables for carts of at least 500.
+
+    Outputs:
+        Asserts the cable is discounted only when the cart reaches 500.
+    """
+    cable = Product(name = "Cable", price = 100, quantity = 10)
+    laptop = Product(name = "Laptop", price = 400, quantity = 10)
+    cable.set_promotion(PromotionSet("Bundle", [
+        PromotionRule(PercentDiscount("10% Off", percent = 10),
+                      min_cart_total = 500)
+    ]))
+    store = Store([cable, laptop])
+
+    assert store.quote([(cable, 1)]) == pytest.approx(100)
+    assert store.order([(cable, 1), (laptop, 1)]) == pytest.approx(490)
+
+
+# Test: Rules Recompile
+def test_removing_rule_recompiles_plan():
+    """
+    Test that changing the rules changes the compiled plan.
+
+    Inputs:
+        A set whose only rule is removed.
+
+    Outputs:
+        Asserts the list price is charged afterwards.
+    """
+    rule = PromotionRule(PercentDiscount("10% Off", percent = 10))
+    promotion = PromotionSet("Sale", [rule])
+    product = Product(name = "Cable", price = 100, quantity = 10)
+    product.set_promotion(promotion)
+    assert product.price_for(1) == pytest.approx(90)
+
+    promotion.remove_rule(rule)
+    assert product.price_for(1) == pytest.approx(100)
+
+
+# Test: Invalid Rule
+def test_invalid_time_window():
+    """
+    Test that a rule ending before it starts is rejected.
+
+    Inputs:
+        starts_at = 200, ends_at = 100.
+
+    Outputs:
+        Asserts a ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        PromotionRule(PercentDiscount("10% Off", percent = 10),
+                      starts_at = 200, ends_at = 100)
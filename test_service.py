@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import main
+from service import OrderService
+
+
+async def exchange(reader, writer, request):
+    """
+    Sends one request over a client connection and reads the response.
+
+    :return: The decoded response (dict).
+    """
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+# Test a client session against the order service
+def test_service_session():
+    """
+    Test listing, totals, search and orders through the socket protocol.
+
+    Input: None
+    Output: None (Asserts the responses and the resulting store state)
+    """
+    best_buy = main.build_default_store()
+
+    async def scenario():
+        service = OrderService(best_buy, max_pending = 4)
+        host, port = (await service.start())[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+
+        listing = await exchange(reader, writer, {"op": "list"})
+        assert [item["name"] for item in listing["products"]][:2] == [
+            "MacBook Air M2", "Bose QuietComfort Earbuds"]
+
+        search = await exchange(reader, writer,
+                                {"op": "search", "query": "pixel"})
+        assert search["product"] is None
+        assert search["matches"][0]["name"] == "Google Pixel 7"
+
+        order = await exchange(reader, writer, {
+            "op": "order",
+            "items": [{"name": "Google Pixel 7", "quantity": 2}],
+        })
+        assert order == {"ok": True, "total": 1000.0}
+
+        failed = await exchange(reader, writer, {
+            "op": "order",
+            "items": [{"name": "Shipping", "quantity": 2}],
+        })
+        assert failed["ok"] is False
+        assert "cannot buy more than 1" in failed["error"]
+
+        bad = await exchange(reader, writer, {"op": "refund"})
+        assert bad == {"ok": False, "error": "Unknown operation 'refund'."}
+
+        total = await exchange(reader, writer, {"op": "total"})
+        await service.shutdown()
+        assert await reader.readline() == b""  # session closed on shutdown
+        writer.close()
+        return total
+
+    total = asyncio.run(scenario())
+    assert total == {"ok": True, "total": 1098}
+    assert best_buy.get_total_quantity() == 1098
+
+
+# Test that many concurrent sessions are all served
+def test_service_concurrent_sessions():
+    """
+    Test that concurrent sessions through a small bounded queue all get
+    answered and every order is applied exactly once.
+
+    Input: None
+    Output: None (Asserts all orders succeed and stock matches)
+    """
+    best_buy = main.build_default_store()
+
+    async def client(host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        results = []
+        for _ in range(5):
+            results.append(await exchange(reader, writer, {
+                "op": "order",
+                "items": [{"name": "Bose QuietComfort Earbuds",
+                           "quantity": 1}],
+            }))
+        writer.close()
+        return results
+
+    async def scenario():
+        service = OrderService(best_buy, max_pending = 2)
+        host, port = (await service.start())[:2]
+        results = await asyncio.gather(*(client(host, port)
+                                         for _ in range(20)))
+        await service.shutdown()
+        return [response for session in results for response in session]
+
+    responses = asyncio.run(scenario())
+    assert len(responses) == 100
+    assert all(response["ok"] for response in responses)
+    assert best_buy.products[1].quantity == 400
+
+
+# Test that a malformed request does not stop the service
+def test_bad_request_is_followed_by_good_one():
+    """
+    Test that requests with wrongly typed fields get an error response and
+    that the service keeps answering afterwards.
+
+    Input: None
+    Output: None (Asserts the error and the following responses)
+    """
+    best_buy = main.build_default_store()
+
+    async def scenario():
+        service = OrderService(best_buy, max_pending = 4)
+        host, port = (await service.start())[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        bad_search = await exchange(reader, writer,
+                                    {"op": "search", "query": 5})
+        bad_order = await exchange(reader, writer, {
+            "op": "order", "items": [{"name": 5, "quantity": 1}]})
+        writer.close()
+
+        reader, writer = await asyncio.open_connection(host, port)
+        total = await asyncio.wait_for(
+            exchange(reader, writer, {"op": "total"}), timeout = 5)
+        await service.shutdown()
+        writer.close()
+        return bad_search, bad_order, total
+
+    bad_search, bad_order, total = asyncio.run(scenario())
+    assert bad_search == {"ok": False,
+                          "error": "Product name must be a string."}
+    assert bad_order["ok"] is False
+    assert total == {"ok": True, "total": 1100}
@@ -0,0 +1,138 @@
+import pytest
+
+import main
+from products import Product, LimitedProduct, PercentDiscount, ThirdOneFree
+from promotions import PromotionRule, PromotionSet
+from sharding import ShardedStore, shard_index
+
+
+@pytest.fixture
+def sharded_store():
+    """
+    Starts a two-shard store whose products cover both shards.
+    """
+    earbuds = Product("Bose QuietComfort Earbuds", price = 250,
+                      quantity = 500)
+    earbuds.set_promotion(ThirdOneFree("Third One Free!"))
+    product_list = [
+        Product(f"Product {i}", price = 10, quantity = 5) for i in range(8)
+    ] + [earbuds, LimitedProduct("Shipping", price = 10, quantity = 250,
+                                 maximum = 1)]
+    with ShardedStore(product_list, shards = 2) as store_obj:
+        yield store_obj
+
+
+def names_on_shard(shard):
+    """
+    Gets the fixture's generic product names routed to a shard.
+    """
+    return [f"Product {i}" for i in range(8)
+            if shard_index(f"Product {i}", 2) == shard]
+
+
+# Test single-shard and multi-shard orders
+def test_sharded_orders(sharded_store):
+    """
+    Test that orders are routed to their shards and that multi-shard
+    orders are committed on every shard.
+
+    Input: None
+    Output: None (Asserts totals and the aggregated quantity)
+    """
+    first, second = names_on_shard(0)[0], names_on_shard(1)[0]
+    assert sharded_store.get_total_quantity() == 790
+
+    assert sharded_store.order([(first, 2)]) == 20
+    assert sharded_store.order([(first, 1), (second, 3),
+                                ("Bose QuietComfort Earbuds", 3)]) == 540
+    assert sharded_store.get_total_quantity() == 781
+
+
+# Test that a failing shard aborts the whole order
+def test_sharded_order_failure_is_rolled_back(sharded_store):
+    """
+    Test that when one shard rejects its lines, the other shards roll
+    back theirs.
+
+    Input: None
+    Output: None (Asserts the error and unchanged quantities)
+    """
+    first, second = names_on_shard(0)[0], names_on_shard(1)[0]
+
+    with pytest.raises(ValueError, match = "Not enough stock"):
+        sharded_store.order([(first, 5), (second, 6)])
+    with pytest.raises(ValueError, match = "is not available"):
+        sharded_store.order([("iPhone", 1)])
+
+    assert sharded_store.get_total_quantity() == 790
+    products = {product.name: product
+                for product in sharded_store.get_all_products()}
+    assert len(products) == 10
+    assert products[first].quantity == 5
+
+
+# Test batched ordering
+def test_order_batch(sharded_store):
+    """
+    Test that a batch returns a result per order, in order.
+
+    Input: None
+    Output: None (Asserts totals and errors of the batch)
+    """
+    first, second = names_on_shard(0)[0], names_on_shard(1)[0]
+    results = sharded_store.order_batch([
+        [(first, 1)],
+        [("Shipping", 2)],
+        [(second, 1), (first, 1)],
+        [],
+    ])
+    assert results[0] == 10
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 20
+    assert results[3] == 0
+
+
+# Test cart-level promotions across shards
+def test_cart_promotion_sees_whole_order():
+    """
+    Test that a cart threshold counts lines placed on other shards, both
+    for single-shard and multi-shard orders.
+
+    Input: None
+    Output: None (Asserts the discounted totals)
+    """
+    cable = Product("Cable", price = 100, quantity = 10)
+    cable.set_promotion(PromotionSet("Bundle", [
+        PromotionRule(PercentDiscount("10% Off", percent = 10),
+                      min_cart_total = 500)
+    ]))
+    same_shard = Product("TV", price = 1000, quantity = 10)
+    other_shard = Product("Samsung TV", price = 1000, quantity = 10)
+    assert shard_index("Cable", 2) == shard_index("TV", 2)
+    assert shard_index("Cable", 2) != shard_index("Samsung TV", 2)
+
+    with ShardedStore([cable, same_shard, other_shard],
+                      shards = 2) as store_obj:
+        assert store_obj.order([("Cable", 1)]) == pytest.approx(100)
+        assert store_obj.order([("Cable", 1), ("TV", 1)]) \
+            == pytest.approx(1090)
+        assert store_obj.order([("Cable", 1), ("Samsung TV", 1)]) \
+            == pytest.approx(1090)
+
+
+# Test sharding a store made of catalog views
+def test_sharded_catalog_views():
+    """
+    Test that catalog views are handed to and returned from the shard
+    processes as standalone products.
+
+    Input: None
+    Output: None (Asserts the products, totals and an order)
+    """
+    product_list = main.build_default_store().products
+    with ShardedStore(product_list, shards = 2) as store_obj:
+        products = store_obj.get_all_products()
+        assert sorted(product.name for product in products) \
+            == sorted(product.name for product in product_list)
+        assert store_obj.get_total_quantity() == 1100
+        assert store_obj.order([("Google Pixel 7", 2)]) == 1000
@@ -0,0 +1,87 @@
+import pytest
+
+import main
+from catalog import product_kind
+from snapshot import load_snapshot, load_store, save_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """
+    Saves the default store to a snapshot file after a first order.
+    """
+    best_buy = main.build_default_store()
+    best_buy.order([(best_buy.products[2], 10)])
+    best_buy.products[0].deactivate()
+    path = tmp_path / "store.snap"
+    save_snapshot(best_buy, str(path))
+    return str(path)
+
+
+# Test that a snapshot round-trips the store's inventory
+def test_snapshot_round_trip(snapshot_path):
+    """
+    Test that every product attribute survives a save and load.
+
+    Input: None
+    Output: None (Asserts the loaded products match the saved ones)
+    """
+    original = main.build_default_store()
+    original.order([(original.products[2], 10)])
+    original.products[0].deactivate()
+
+    catalog = load_snapshot(snapshot_path)
+
+    assert len(catalog) == 5
+    for loaded, product in zip(catalog, original.products):
+        assert product_kind(loaded) == product_kind(product)
+        assert (loaded.name, loaded.price, loaded.quantity, loaded.active) \
+            == (product.name, product.price, product.quantity, product.active)
+    assert catalog[4].maximum == 1
+    assert catalog[0].promotion.name == "Second Half price!"
+    assert catalog[3].promotion.percent == 30
+
+
+# Test that a loaded store can be used and extended
+def test_loaded_store_orders_and_appends(snapshot_path):
+    """
+    Test ordering, renaming and adding products on a store loaded from a
+    snapshot, without changing the snapshot file itself.
+
+    Input: None
+    Output: None (Asserts the store state and that the file is unchanged)
+    """
+    best_buy = load_store(snapshot_path)
+    assert len(best_buy) == 5
+    assert not best_buy.catalog._views  # no product objects yet
+    assert best_buy.get_total_quantity() == 990
+
+    pixel = main.find_product_by_name(best_buy, "Google Pixel 7")
+    assert best_buy.order([(pixel, 2)]) == 1000
+    pixel.name = "Google Pixel 7a"
+    assert best_buy.search("pixel 7a") == [pixel]
+
+    case = best_buy.catalog[best_buy.catalog.append("Pixel Case", price = 20,
+                                                    quantity = 40)]
+    best_buy.add_product(case)
+    assert best_buy.get_total_quantity() == 1028
+    assert pixel.quantity == 238
+
+    reloaded = load_snapshot(snapshot_path)
+    assert len(reloaded) == 5
+    assert reloaded[2].name == "Google Pixel 7"
+    assert reloaded[2].quantity == 240
+
+
+# Test that invalid files are rejected
+def test_load_rejects_other_files(tmp_path):
+    """
+    Test that loading a file that is not a snapshot raises an error.
+
+    Input: None
+    Output: None (Asserts ValueError is raised)
+    """
+    path = tmp_path / "orders.jsonl"
+    path.write_text("{}\n" * 100)
+    with pytest.raises(ValueError, match = "is not a store snapshot"):
+        load_snapshot(str(path))
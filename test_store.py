@@ -0,0 +1,455 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from products import (
+    Product,
+    NonStockedProduct,
+    LimitedProduct,
+    SecondHalfPrice
+)
+from store import Store
+from warehouses import Warehouse
+
+
+# Test that the store index tracks added and removed products
+def test_store_index_add_and_remove():
+    """
+    Test that membership checks follow add_product and remove_product.
+
+    Input: None
+    Output: None (Asserts the product index stays in sync)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    mouse = Product(name = "Mouse", price = 20, quantity = 50)
+    best_buy = Store([laptop])
+
+    assert laptop in best_buy
+    assert mouse not in best_buy
+
+    best_buy.add_product(mouse)
+    assert mouse in best_buy
+    assert best_buy.products == [laptop, mouse]
+
+    best_buy.remove_product(laptop)
+    assert laptop not in best_buy
+    assert len(best_buy) == 1
+
+
+# Test that removing an unknown product raises an exception
+def test_remove_unknown_product_raises_exception():
+    """
+    Test that removing a product that is not in the store raises an error.
+
+    Input: None
+    Output: None (Asserts ValueError is raised)
+    """
+    best_buy = Store([])
+    license_key = NonStockedProduct(name = "Windows License", price = 125)
+
+    with pytest.raises(ValueError, match = "is not available in the store."):
+        best_buy.remove_product(license_key)
+
+
+# Test that ordering a product that is not in the store is rejected
+def test_order_product_not_in_store():
+    """
+    Test that ordering a product outside the store raises an error.
+
+    Input: None
+    Output: None (Asserts ValueError is raised and stock is untouched)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    best_buy = Store([])
+
+    with pytest.raises(ValueError, match = "is not available in the store."):
+        best_buy.order([(laptop, 1)])
+    assert laptop.quantity == 10
+
+
+# Test that the running aggregates follow product changes
+def test_aggregates_follow_product_changes():
+    """
+    Test that get_total_quantity and get_all_products stay correct when
+    products are bought, restocked, deactivated and reactivated.
+
+    Input: None
+    Output: None (Asserts the maintained aggregates match a full scan)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    mouse = Product(name = "Mouse", price = 20, quantity = 50)
+    best_buy = Store([laptop, mouse])
+    assert best_buy.get_total_quantity() == 60
+
+    best_buy.order([(laptop, 4)])
+    assert best_buy.get_total_quantity() == 56
+
+    mouse.quantity = 70
+    assert best_buy.get_total_quantity() == 76
+
+    mouse.deactivate()
+    assert best_buy.get_total_quantity() == 6
+    assert best_buy.get_all_products() == [laptop]
+
+    mouse.active = True
+    assert best_buy.get_total_quantity() == 76
+    assert best_buy.get_all_products() == [laptop, mouse]
+
+    best_buy.order([(laptop, 6)])
+    assert laptop.active is False
+    assert best_buy.get_all_products() == [mouse]
+
+    best_buy.remove_product(mouse)
+    assert best_buy.get_total_quantity() == 0
+    mouse.quantity = 5  # no longer tracked by the store
+    assert best_buy.get_total_quantity() == 0
+
+
+# Test the name search index
+def test_search_exact_and_partial_matches():
+    """
+    Test that search returns exact matches first, then partial matches,
+    ignoring case and honouring the limit.
+
+    Input: None
+    Output: None (Asserts the search results and their order)
+    """
+    pixel = Product(name = "Google Pixel 7", price = 500, quantity = 250)
+    pixel_case = Product(name = "Pixel Case", price = 20, quantity = 40)
+    pixel_short = Product(name = "pixel", price = 400, quantity = 5)
+    earbuds = Product(name = "Bose QuietComfort Earbuds", price = 250,
+                      quantity = 500)
+    best_buy = Store([pixel, pixel_case, pixel_short, earbuds])
+
+    assert best_buy.search("PIXEL") == [pixel_short, pixel, pixel_case]
+    assert best_buy.search("pixel", limit = 2) == [pixel_short, pixel]
+    assert best_buy.search("ix") == [pixel, pixel_case, pixel_short]
+    assert best_buy.search("quietcomfort") == [earbuds]
+    assert best_buy.search("iPhone") == []
+
+
+# Test exact name lookups
+def test_find_exact():
+    """
+    Test that find_exact returns only products whose whole name matches,
+    ignoring case, and follows renames.
+
+    Input: None
+    Output: None (Asserts the lookup results)
+    """
+    pixel = Product(name = "Google Pixel 7", price = 500, quantity = 250)
+    pixel_short = Product(name = "pixel", price = 400, quantity = 5)
+    best_buy = Store([pixel, pixel_short])
+
+    assert best_buy.find_exact("PIXEL") == [pixel_short]
+    assert best_buy.find_exact("Pixel 7") == []
+    pixel.name = "Pixel"
+    assert best_buy.find_exact("pixel") == [pixel_short, pixel]
+
+
+# Test that the name index follows renames and removals
+def test_search_follows_rename_and_remove():
+    """
+    Test that renamed and removed products are re-indexed.
+
+    Input: None
+    Output: None (Asserts the search results after the changes)
+    """
+    laptop = Product(name = "MacBook Air M2", price = 1450, quantity = 100)
+    best_buy = Store([laptop])
+
+    laptop.name = "MacBook Pro M3"
+    assert best_buy.search("Air M2") == []
+    assert best_buy.search("macbook pro m3") == [laptop]
+
+    best_buy.remove_product(laptop)
+    assert best_buy.search("MacBook") == []
+
+
+# Test that a failing order leaves the stock untouched
+def test_failed_order_is_rolled_back():
+    """
+    Test that when a later line of an order fails, the stock of the
+    earlier lines is restored, including their active status.
+
+    Input: None
+    Output: None (Asserts quantities, active flags and aggregates are
+    unchanged after the failed orders)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 2)
+    mouse = Product(name = "Mouse", price = 20, quantity = 50)
+    shipping = LimitedProduct(name = "Shipping", price = 10, quantity = 250,
+                              maximum = 1)
+    best_buy = Store([laptop, mouse, shipping])
+
+    with pytest.raises(ValueError, match = "cannot buy more than 1"):
+        best_buy.order([(laptop, 2), (mouse, 5), (shipping, 2)])
+    with pytest.raises(ValueError, match = "Not enough stock."):
+        best_buy.order([(mouse, 30), (mouse, 30)])
+
+    assert (laptop.quantity, mouse.quantity, shipping.quantity) == (2, 50, 250)
+    assert laptop.active is True
+    assert best_buy.get_total_quantity() == 302
+    assert best_buy.get_all_products() == [laptop, mouse, shipping]
+
+
+# Test that quoting prices a cart like an order without buying it
+def test_quote_matches_order_without_side_effects():
+    """
+    Test that Store.quote returns the same total as Store.order, leaves
+    the stock untouched and rejects products an order would reject.
+
+    Input: None
+    Output: None (Asserts totals, quantities and errors)
+    """
+    laptop = Product(name = "Laptop", price = 1450, quantity = 10)
+    laptop.set_promotion(SecondHalfPrice("Second Half price!"))
+    shipping = LimitedProduct(name = "Shipping", price = 10, quantity = 250,
+                              maximum = 1)
+    retired = Product(name = "Retired", price = 5, quantity = 3)
+    retired.deactivate()
+    best_buy = Store([laptop, shipping, retired])
+
+    cart = [(laptop, 3), (shipping, 1)]
+    quoted = best_buy.quote(cart)
+    assert (laptop.quantity, shipping.quantity) == (10, 250)
+    assert best_buy.order(cart) == quoted == 1450 * 2.5 + 10
+
+    with pytest.raises(ValueError, match = "is inactive"):
+        best_buy.quote([(retired, 1)])
+    with pytest.raises(ValueError, match = "greater than zero"):
+        best_buy.quote([(laptop, 0)])
+
+
+# Stress test concurrent orders on a thread-safe store
+def test_concurrent_orders_never_oversell():
+    """
+    Test that many threads ordering from a shared thread-safe store never
+    drive stock negative or sell more units than were in stock.
+
+    Input: None
+    Output: None (Asserts sold units plus remaining stock equal the
+    initial stock for every product)
+    """
+    initial_stock = 15000
+    product_list = [Product(name = f"Product {i}", price = 10,
+                            quantity = initial_stock) for i in range(4)]
+    best_buy = Store(product_list, thread_safe = True)
+    sold = {product: 0 for product in product_list}
+    sold_lock = threading.Lock()
+
+    def place_orders(seed):
+        rng = random.Random(seed)
+        for _ in range(1000):
+            lines = [(product, rng.randint(1, 3))
+                     for product in rng.sample(product_list, 2)]
+            try:
+                best_buy.order(lines)
+            except ValueError:
+                continue
+            with sold_lock:
+                for product, quantity in lines:
+                    sold[product] += quantity
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force frequent thread switches
+    try:
+        threads = [threading.Thread(target = place_orders, args = (seed,))
+                   for seed in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    for product in product_list:
+        assert product.quantity >= 0
+        assert sold[product] + product.quantity == initial_stock
+    assert best_buy.get_total_quantity() == sum(
+        product.quantity for product in product_list if product.active
+    )
+
+
+# Test that reservations hold stock until checkout
+def test_reservation_holds_stock_until_checkout():
+    """
+    Test that reserved stock cannot be bought by other orders and is sold
+    by checkout.
+
+    Input: None
+    Output: None (Asserts available, reserved and quantity levels)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    best_buy = Store([laptop])
+
+    reservation = best_buy.reserve([(laptop, 3)], ttl = 60)
+    assert laptop.reserved == 3
+    assert laptop.available == 2
+    with pytest.raises(ValueError):
+        best_buy.order([(laptop, 3)])
+
+    assert best_buy.checkout(reservation) == 3000
+    assert laptop.quantity == 2
+    assert laptop.reserved == 0
+    with pytest.raises(ValueError):
+        best_buy.checkout(reservation)
+
+
+# Test that expired reservations return their stock
+def test_expired_reservation_is_released():
+    """
+    Test that holds past their TTL are released and cannot be checked out.
+
+    Input: None
+    Output: None (Asserts the held stock is available again)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    mouse = Product(name = "Mouse", price = 20, quantity = 5)
+    best_buy = Store([laptop, mouse])
+
+    short = best_buy.reserve([(laptop, 2), (mouse, 1)], ttl = 1)
+    long = best_buy.reserve([(laptop, 1)], ttl = 3600)
+
+    assert best_buy.expire_reservations(now = short.expires_at) == 1
+    assert laptop.reserved == 1
+    assert mouse.available == 5
+    with pytest.raises(ValueError):
+        best_buy.checkout(short)
+    assert best_buy.release(long)
+    assert laptop.available == 5
+
+
+# Test that stock cannot drop below what is reserved
+def test_quantity_cannot_drop_below_reserved():
+    """
+    Test that setting the quantity below the reserved stock is rejected
+    and that a failed checkout keeps its hold intact, so it can expire
+    later without errors.
+
+    Input: None
+    Output: None (Asserts the errors and the reserved levels)
+    """
+    hub = Warehouse("Hub")
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    mouse = Product(name = "Mouse", price = 20, quantity = 5)
+    mouse.set_stock(hub, 5)
+    best_buy = Store([laptop, mouse])
+
+    reservation = best_buy.reserve([(laptop, 6), (mouse, 3)], ttl = 1)
+    with pytest.raises(ValueError):
+        laptop.quantity = 4
+    with pytest.raises(ValueError):
+        mouse.set_stock(hub, 2)
+    assert laptop.quantity == 10
+    assert mouse.stock_at(hub) == 5
+
+    laptop.deactivate()
+    with pytest.raises(ValueError):
+        best_buy.checkout(reservation)
+    assert laptop.reserved == 6
+    assert reservation.active
+
+    laptop.active = True
+    assert best_buy.expire_reservations(now = reservation.expires_at) == 1
+    assert best_buy.order([(mouse, 1)]) == 20
+    assert laptop.reserved == 0
+
+
+# Test that a reservation is all-or-nothing
+def test_failed_reservation_holds_nothing():
+    """
+    Test that a reservation exceeding the stock of one line holds nothing.
+
+    Input: None
+    Output: None (Asserts no stock is reserved)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 5)
+    mouse = Product(name = "Mouse", price = 20, quantity = 1)
+    best_buy = Store([laptop, mouse])
+
+    with pytest.raises(ValueError):
+        best_buy.reserve([(laptop, 2), (mouse, 2)], ttl = 60)
+    assert laptop.reserved == 0
+    assert mouse.reserved == 0
+
+
+# Test that top sellers follow completed orders
+def test_top_sellers():
+    """
+    Test that top_sellers ranks products by units sold and ignores failed
+    orders.
+
+    Input: None
+    Output: None (Asserts the ranking)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 100)
+    mouse = Product(name = "Mouse", price = 20, quantity = 100)
+    cable = Product(name = "Cable", price = 5, quantity = 100)
+    best_buy = Store([laptop, mouse, cable])
+
+    best_buy.order([(laptop, 2), (mouse, 1)])
+    best_buy.order([(mouse, 3)])
+    best_buy.order([(cable, 1)])
+    with pytest.raises(ValueError):
+        best_buy.order([(cable, 10), (laptop, 1000)])
+
+    assert best_buy.top_sellers(2) == [(mouse, 4), (laptop, 2)]
+    assert best_buy.top_sellers(5) == [(mouse, 4), (laptop, 2), (cable, 1)]
+
+
+# Test low-stock queries and callbacks
+def test_low_stock_and_callbacks():
+    """
+    Test that low_stock lists products at or below a threshold and that
+    callbacks fire once when a product crosses the line.
+
+    Input: None
+    Output: None (Asserts the low-stock list and callback calls)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    mouse = Product(name = "Mouse", price = 20, quantity = 3)
+    license_key = NonStockedProduct(name = "License", price = 125)
+    best_buy = Store([laptop, mouse, license_key])
+    alerts = []
+    best_buy.add_low_stock_callback(5, lambda product, quantity:
+                                    alerts.append((product, quantity)))
+
+    assert best_buy.low_stock(5) == [mouse]
+    best_buy.order([(laptop, 6)])
+    best_buy.order([(laptop, 1)])
+    mouse.quantity = 0
+
+    assert best_buy.low_stock(5) == [mouse, laptop]
+    assert best_buy.low_stock(0) == [mouse]
+    assert alerts == [(laptop, 4)]
+
+    laptop.quantity = 50
+    assert best_buy.low_stock(5) == [mouse]
+
+
+# Test that rolled-back orders do not raise low-stock alerts
+def test_low_stock_callback_skips_failed_order():
+    """
+    Test that a line crossing the low-stock line does not fire callbacks
+    when a later line fails and the order is rolled back.
+
+    Input: None
+    Output: None (Asserts callbacks fire only for the successful order)
+    """
+    laptop = Product(name = "Laptop", price = 1000, quantity = 10)
+    mouse = Product(name = "Mouse", price = 20, quantity = 3)
+    best_buy = Store([laptop, mouse])
+    alerts = []
+    best_buy.add_low_stock_callback(5, lambda product, quantity:
+                                    alerts.append((product, quantity)))
+
+    with pytest.raises(ValueError):
+        best_buy.order([(laptop, 6), (mouse, 5)])
+    assert laptop.quantity == 10
+    assert alerts == []
+
+    best_buy.order([(laptop, 6), (mouse, 1)])
+    assert alerts == [(laptop, 4)]
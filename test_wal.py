@@ -0,0 +1,100 @@
+import os
+
+import main
+from products import LimitedProduct, PercentDiscount
+from snapshot import save_snapshot
+from wal import WriteAheadLog, checkpoint, read_log, recover
+
+
+def start_logged_store(tmp_path, group_commit=1):
+    """
+    Creates the default store, snapshots it and attaches a log.
+
+    :return: The store, snapshot path and log path (tuple).
+    """
+    best_buy = main.build_default_store()
+    snapshot_path = str(tmp_path / "store.snap")
+    log_path = str(tmp_path / "store.wal")
+    save_snapshot(best_buy, snapshot_path)
+    best_buy.wal = WriteAheadLog(log_path, group_commit = group_commit)
+    return best_buy, snapshot_path, log_path
+
+
+# Test that recovery replays orders, additions and removals
+def test_recover_replays_log(tmp_path):
+    """
+    Test that a store recovered from snapshot and log matches the store
+    that wrote the log.
+
+    Input: None
+    Output: None (Asserts the recovered products match the live ones)
+    """
+    best_buy, snapshot_path, log_path = start_logged_store(tmp_path)
+    macbook, earbuds, pixel, license_key, shipping = best_buy.products
+
+    best_buy.order([(pixel, 250), (shipping, 1)])
+    best_buy.order([(macbook, 3)])
+    gift_card = LimitedProduct("Gift Card", price = 50, quantity = 10,
+                               maximum = 2)
+    gift_card.set_promotion(PercentDiscount("5% off", percent = 5))
+    best_buy.add_product(gift_card)
+    best_buy.order([(gift_card, 2)])
+    best_buy.remove_product(earbuds)
+    best_buy.wal.close()
+
+    recovered = recover(snapshot_path, log_path)
+
+    assert [product.name for product in recovered.products] == [
+        product.name for product in best_buy.products]
+    for restored, product in zip(recovered.products, best_buy.products):
+        assert (restored.quantity, restored.active) == (
+            product.quantity, product.active)
+    assert recovered.products[-1].maximum == 2
+    assert recovered.products[-1].promotion.percent == 5
+    assert recovered.get_total_quantity() == best_buy.get_total_quantity()
+
+
+# Test group commit batching and torn writes
+def test_group_commit_and_torn_tail(tmp_path):
+    """
+    Test that records are written in groups and that a partially written
+    last record is ignored during recovery.
+
+    Input: None
+    Output: None (Asserts what reaches the file and what is recovered)
+    """
+    best_buy, snapshot_path, log_path = start_logged_store(
+        tmp_path, group_commit = 3)
+    pixel = best_buy.products[2]
+
+    best_buy.order([(pixel, 1)])
+    best_buy.order([(pixel, 1)])
+    assert os.path.getsize(log_path) == 0  # group not complete yet
+    best_buy.order([(pixel, 1)])
+    assert len(list(read_log(log_path))) == 3
+
+    with open(log_path, "ab") as log_file:
+        log_file.write(b'{"op":"order","lines":[["Google Pixel 7",0')
+
+    recovered = recover(snapshot_path, log_path)
+    assert len(recovered.catalog._views) == 1  # only the logged product
+    assert recovered.products[2].quantity == 247
+
+
+# Test that a checkpoint truncates the log
+def test_checkpoint_truncates_log(tmp_path):
+    """
+    Test that after a checkpoint the snapshot alone holds the state.
+
+    Input: None
+    Output: None (Asserts the log is empty and recovery is correct)
+    """
+    best_buy, snapshot_path, log_path = start_logged_store(tmp_path)
+    best_buy.order([(best_buy.products[0], 5)])
+
+    checkpoint(best_buy, snapshot_path)
+    assert os.path.getsize(log_path) == 0
+
+    best_buy.order([(best_buy.products[0], 5)])
+    best_buy.wal.close()
+    assert recover(snapshot_path, log_path).products[0].quantity == 90
@@ -0,0 +1,112 @@
+import pytest
+
+from products import Product, NonStockedProduct
+from store import Store
+from warehouses import Warehouse
+
+
+# Test that orders draw from locations by priority
+def test_order_allocates_by_priority():
+    """
+    Test that a line is split across warehouses in priority order and the
+    store total follows.
+
+    Input: None
+    Output: None (Asserts the split, location stock and store total)
+    """
+    main_hub = Warehouse("Main", priority = 2)
+    overflow = Warehouse("Overflow", priority = 1)
+    laptop = Product(name = "Laptop", price = 1000, quantity = 0)
+    laptop.set_stock(overflow, 10)
+    laptop.set_stock(main_hub, 3)
+    best_buy = Store([laptop])
+    assert best_buy.get_total_quantity() == 13
+
+    total, allocations = best_buy.fulfil([(laptop, 5)])
+
+    assert total == 5000
+    assert allocations == [(laptop, [(main_hub, 3), (overflow, 2)])]
+    assert laptop.locations == {main_hub: 0, overflow: 8}
+    assert best_buy.get_total_quantity() == 8
+
+
+# Test proximity rankings
+def test_rank_locations_by_proximity():
+    """
+    Test that re-ranking by an origin ships from the nearest warehouse.
+
+    Input: None
+    Output: None (Asserts the allocation)
+    """
+    east = Warehouse("East", priority = 5, position = (100, 0))
+    west = Warehouse("West", priority = 1, position = (0, 0))
+    laptop = Product(name = "Laptop", price = 1000, quantity = 0)
+    laptop.set_stock(east, 5)
+    laptop.set_stock(west, 5)
+    assert laptop.allocate(2) == [(east, 2)]
+
+    laptop.rank_locations(origin = (10, 0))
+    assert laptop.allocate(2) == [(west, 2)]
+
+
+# Test that failed orders restore location stock
+def test_failed_order_restores_locations():
+    """
+    Test that rolling back an order also restores the per-location stock,
+    and that quantity can no longer be set directly.
+
+    Input: None
+    Output: None (Asserts the location stock after a failed order)
+    """
+    hub = Warehouse("Hub")
+    laptop = Product(name = "Laptop", price = 1000, quantity = 0)
+    laptop.set_stock(hub, 4)
+    mouse = Product(name = "Mouse", price = 20, quantity = 1)
+    best_buy = Store([laptop, mouse])
+
+    with pytest.raises(ValueError):
+        best_buy.order([(laptop, 2), (mouse, 2)])
+    assert laptop.stock_at(hub) == 4
+    assert laptop.quantity == 4
+    with pytest.raises(ValueError):
+        laptop.quantity = 10
+
+
+# Test that non-stocked products reject location stock
+def test_non_stocked_product_rejects_location_stock():
+    """
+    Test that a failed set_stock leaves the product unchanged.
+
+    Input: None
+    Output: None (Asserts the error and the unchanged stock)
+    """
+    hub = Warehouse("Hub")
+    license_key = NonStockedProduct(name = "License", price = 125)
+
+    with pytest.raises(ValueError):
+        license_key.set_stock(hub, 3)
+    assert license_key.stock_at(hub) == 0
+    assert license_key.locations == {}
+
+
+# Test that rollbacks return the split of every line
+def test_rollback_returns_split_of_repeated_lines():
+    """
+    Test that a product ordered on two lines gets both splits back when a
+    later line fails.
+
+    Input: None
+    Output: None (Asserts the location stock after a failed order)
+    """
+    main_hub = Warehouse("Main", priority = 2)
+    overflow = Warehouse("Overflow", priority = 1)
+    laptop = Product(name = "Laptop", price = 1000, quantity = 0)
+    laptop.set_stock(main_hub, 3)
+    laptop.set_stock(overflow, 5)
+    mouse = Product(name = "Mouse", price = 20, quantity = 1)
+    best_buy = Store([laptop, mouse])
+
+    with pytest.raises(ValueError):
+        best_buy.fulfil([(laptop, 2), (laptop, 4), (mouse, 2)])
+    assert laptop.locations == {main_hub: 3, overflow: 5}
+    assert best_buy.get_total_quantity() == 9
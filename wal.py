@@ -0,0 +1,274 @@
+"""
+Write-ahead log and crash recovery for store stock changes.
+
+Attach a WriteAheadLog to a store (``store_obj.wal = WriteAheadLog(...)``)
+and every successful Store.order, add_product and remove_product appends
+one JSON line to the log. Order records hold the resulting absolute
+quantity and active flag of each ordered product, so replaying a record
+more than once has no further effect. Changes made directly through
+Product setters are not logged; take a checkpoint after restocking.
+
+Records are written and fsynced in groups of `group_commit` records,
+which amortizes the fsync cost over many orders. Up to group_commit - 1
+of the most recent records may be lost in a crash; call sync() when a
+change must be durable immediately. Products are identified by name in
+the log, so names should be unique within the store.
+
+Recovery loads the latest snapshot and replays the log on top of it.
+checkpoint() writes a new snapshot and truncates the log.
+"""
+import json
+import os
+import threading
+
+from catalog import ColumnarStore, LIMITED, NON_STOCKED, product_kind
+from products import Product, NonStockedProduct, LimitedProduct
+from snapshot import (
+    decode_promotion,
+    encode_promotion,
+    load_store,
+    save_snapshot
+)
+
+
+def _product_record(product) -> dict:
+    """
+    Describes a product completely, for "add" records.
+
+    :param product: The product to describe (Product).
+    :return: The product fields (dict).
+    """
+    kind = product_kind(product)
+    return {
+        "name": product.name,
+        "price": product.price,
+        "quantity": product.quantity,
+        "active": product.active,
+        "kind": kind,
+        "maximum": product.maximum if kind == LIMITED else 0,
+        "promotion": (encode_promotion(product.promotion)
+                      if product.promotion else None),
+    }
+
+
+# WriteAheadLog Class
+class WriteAheadLog:
+    """
+    Append-only log of stock and activation changes with group commit.
+    """
+
+    def __init__(self, path, group_commit=1):
+        """
+        Opens (or creates) a log file for appending.
+
+        :param path: Log file path (str).
+        :param group_commit: Number of records written per fsync (int).
+        :raises ValueError: If group_commit is smaller than 1.
+        """
+        if group_commit < 1:
+            raise ValueError("Group commit size must be at least 1.")
+        self.path = path
+        self.group_commit = group_commit
+        self._file = open(path, "ab")
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def log_add(self, product):
+        """
+        Logs that a product was added to the store.
+
+        :param product: The added product (Product).
+        :return: None
+        """
+        self._append({"op": "add", "product": _product_record(product)})
+
+    def log_remove(self, product):
+        """
+        Logs that a product was removed from the store.
+
+        :param product: The removed product (Product).
+        :return: None
+        """
+        self._append({"op": "remove", "name": product.name})
+
+    def log_order(self, products):
+        """
+        Logs the stock of the products of a completed order.
+
+        :param products: Products the order touched (Iterable[Product]).
+        :return: None
+        """
+        self._append({"op": "order", "lines": [
+            [product.name, product.quantity, product.active]
+            for product in dict.fromkeys(products)
+        ]})
+
+    def _append(self, record):
+        """
+        Buffers a record and writes the group once it is complete.
+        """
+        line = json.dumps(record, separators = (",", ":")) + "\n"
+        with self._lock:
+            self._pending.append(line.encode("utf-8"))
+            if len(self._pending) >= self.group_commit:
+                self._write_pending()
+
+    def _write_pending(self):
+        """
+        Writes and fsyncs all buffered records. Caller holds the lock.
+        """
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending.clear()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def sync(self):
+        """
+        Makes all logged records durable now.
+
+        :return: None
+        """
+        with self._lock:
+            self._write_pending()
+
+    def truncate(self):
+        """
+        Discards every record, e.g. after a checkpoint.
+
+        :return: None
+        """
+        with self._lock:
+            self._pending.clear()
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Syncs and closes the log.
+
+        :return: None
+        """
+        self.sync()
+        self._file.close()
+
+
+def read_log(path):
+    """
+    Reads the records of a log file. A torn last line, left by a crash
+    in the middle of a write, is ignored.
+
+    :param path: Log file path (str).
+    :return: Generator of records (dict).
+    """
+    with open(path, "rb") as log_file:
+        for line in log_file:
+            if not line.endswith(b"\n"):
+                break
+            yield json.loads(line)
+
+
+def _find_by_name(store_obj, name):
+    """
+    Gets the first product in the store with exactly this name, using the
+    exact-name index rather than a full search.
+
+    :return: The product, or None (Product).
+    """
+    for product in store_obj.find_exact(name):
+        if product.name == name:
+            return product
+    return None
+
+
+def _add_from_record(store_obj, fields):
+    """
+    Recreates a logged product and adds it to the store.
+    """
+    promotion = fields["promotion"]
+    promotion = decode_promotion(promotion) if promotion else None
+    if isinstance(store_obj, ColumnarStore):
+        product = store_obj.catalog[store_obj.catalog.append(
+            fields["name"], fields["price"], fields["quantity"],
+            kind = fields["kind"], maximum = fields["maximum"],
+            promotion = promotion, active = fields["active"]
+        )]
+    else:
+        if fields["kind"] == LIMITED:
+            product = LimitedProduct(fields["name"], fields["price"],
+                                     fields["quantity"], fields["maximum"])
+        elif fields["kind"] == NON_STOCKED:
+            product = NonStockedProduct(fields["name"], fields["price"])
+        else:
+            product = Product(fields["name"], fields["price"],
+                              fields["quantity"])
+        product.set_promotion(promotion)
+        product.active = fields["active"]
+    store_obj.add_product(product)
+
+
+def replay(store_obj, records) -> int:
+    """
+    Applies logged records to a store. Records for products that are
+    already in the expected state have no effect.
+
+    :param store_obj: The store to update (store.Store).
+    :param records: Iterable of log records (Iterable[dict]).
+    :return: Number of records applied (int).
+    """
+    applied = 0
+    for record in records:
+        operation = record["op"]
+        if operation == "order":
+            for name, quantity, active in record["lines"]:
+                product = _find_by_name(store_obj, name)
+                if product is not None:
+                    product.quantity = quantity
+                    product.active = active
+        elif operation == "add":
+            if _find_by_name(store_obj, record["product"]["name"]) is None:
+                _add_from_record(store_obj, record["product"])
+        elif operation == "remove":
+            product = _find_by_name(store_obj, record["name"])
+            if product is not None:
+                store_obj.remove_product(product)
+        applied += 1
+    return applied
+
+
+# Function: Recover Store
+def recover(snapshot_path, log_path, thread_safe=False):
+    """
+    Rebuilds a store after a crash from its latest snapshot and log.
+    Opening the snapshot does not depend on the catalog size; the time
+    goes into replaying the log, which only touches the products it
+    names.
+
+    :param snapshot_path: Snapshot file path (str).
+    :param log_path: Log file path; a missing log means no changes (str).
+    :param thread_safe: Whether orders may be placed concurrently (bool).
+    :return: The recovered store (catalog.ColumnarStore).
+    """
+    store_obj = load_store(snapshot_path, thread_safe = thread_safe)
+    if os.path.exists(log_path):
+        replay(store_obj, read_log(log_path))
+    return store_obj
+
+
+# Function: Checkpoint Store
+def checkpoint(store_obj, snapshot_path):
+    """
+    Writes a new snapshot of the store and truncates its log.
+    The log is synced first, so a crash between the two steps only
+    replays logged changes that the new snapshot already contains.
+
+    :param store_obj: The store to save; its wal attribute may be None.
+    :param snapshot_path: Snapshot file path (str).
+    :return: None
+    """
+    if store_obj.wal is not None:
+        store_obj.wal.sync()
+    save_snapshot(store_obj, snapshot_path)
+    if store_obj.wal is not None:
+        store_obj.wal.truncate()
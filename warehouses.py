@@ -0,0 +1,58 @@
+"""
+Fulfillment locations for products stocked in several warehouses.
+
+A product's stock is split across Warehouse objects with
+Product.set_stock; its quantity stays the total over all locations, so
+store aggregates work unchanged. Every product keeps a ranking of its
+locations, computed once when a location is added or re-ranked, and
+buying walks that ranking, taking stock from the first locations that
+have it. Allocating a line therefore only touches the locations it takes
+stock from, plus any empty ones ranked before them.
+"""
+import math
+
+
+# Warehouse Class
+class Warehouse:
+    """
+    A location products can be shipped from.
+    """
+    __slots__ = ("name", "priority", "position")
+
+    def __init__(self, name, priority=0, position=None):
+        """
+        Initializes a warehouse.
+
+        :param name: Name of the warehouse (str).
+        :param priority: Higher priorities ship first (int).
+        :param position: (x, y) coordinates used for proximity rankings,
+                         or None (tuple[float, float]).
+        :raises ValueError: If name is empty.
+        """
+        if not name:
+            raise ValueError("Warehouse name cannot be empty.")
+        self.name = name
+        self.priority = priority
+        self.position = position
+
+    def __repr__(self):
+        return f"Warehouse({self.name!r})"
+
+
+def rank_locations(locations, origin=None):
+    """
+    Orders warehouses for allocation: by distance from origin when one is
+    given (warehouses without a position last), otherwise by descending
+    priority. Ties keep the given order.
+
+    :param locations: The warehouses to rank (Iterable[Warehouse]).
+    :param origin: (x, y) to rank by proximity to, or None (tuple).
+    :return: The ranked warehouses (tuple[Warehouse]).
+    """
+    if origin is None:
+        return tuple(sorted(locations, key = lambda location:
+                            -location.priority))
+    return tuple(sorted(locations, key = lambda location: (
+        math.inf if location.position is None
+        else math.dist(location.position, origin)
+    )))